@@ -0,0 +1,30 @@
+"""Compara dois resultados de `benchmarks.load`.
+
+Uso: python -m benchmarks.compare antes.json depois.json
+"""
+import json
+import sys
+
+FIELDS = ["p50_ms", "p99_ms", "throughput_rps", "queries_per_request", "bytes_per_response"]
+
+def _delta(old, new) -> str:
+    if old is None or new is None:
+        return f"{old} -> {new}"
+    change = (new - old) / old * 100 if old else 0.0
+    return f"{old} -> {new} ({change:+.1f}%)"
+
+def compare(old: dict, new: dict) -> None:
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    for name in sorted(set(old["results"]) | set(new["results"])):
+        before, after = old["results"].get(name), new["results"].get(name)
+        if not before or not after or "skipped" in before or "skipped" in after:
+            continue
+        print(f"\n{name}")
+        for field in FIELDS:
+            print(f"  {field:20} {_delta(before.get(field), after.get(field))}")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        raise SystemExit(__doc__)
+    with open(sys.argv[1]) as a, open(sys.argv[2]) as b:
+        compare(json.load(a), json.load(b))
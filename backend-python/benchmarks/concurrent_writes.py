@@ -0,0 +1,84 @@
+"""Compara escritas concorrentes no SQLite com e sem os pragmas de produção.
+
+Uso: python -m benchmarks.concurrent_writes [threads] [escritas_por_thread]
+
+Cada thread abre a própria conexão e grava mensagens em transações curtas,
+enquanto uma thread leitora consulta a mesma tabela. Sem WAL e busy_timeout,
+parte das escritas falha com "database is locked".
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from database.connection import apply_sqlite_pragmas
+
+def _connect(path: str, tuned: bool) -> sqlite3.Connection:
+    # timeout=0: sem o busy_timeout dos pragmas, o SQLite falha na hora
+    connection = sqlite3.connect(path, timeout=0, check_same_thread=False)
+    if tuned:
+        apply_sqlite_pragmas(connection)
+    return connection
+
+def run(tuned: bool, threads: int, writes: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="lumina-bench-"), "bench.db")
+    setup = _connect(path, tuned)
+    setup.execute("CREATE TABLE messages (id INTEGER PRIMARY KEY, student_id INTEGER, content TEXT)")
+    setup.commit()
+    setup.close()
+
+    errors = 0
+    done = 0
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def writer(worker: int) -> None:
+        nonlocal errors, done
+        connection = _connect(path, tuned)
+        for i in range(writes):
+            try:
+                connection.execute("INSERT INTO messages (student_id, content) VALUES (?, ?)", (worker, f"mensagem {i}"))
+                connection.commit()
+                with lock:
+                    done += 1
+            except sqlite3.OperationalError:
+                connection.rollback()
+                with lock:
+                    errors += 1
+        connection.close()
+
+    def reader() -> None:
+        connection = _connect(path, tuned)
+        while not stop.is_set():
+            try:
+                connection.execute("SELECT COUNT(*) FROM messages").fetchone()
+            except sqlite3.OperationalError:
+                pass
+        connection.close()
+
+    reader_thread = threading.Thread(target=reader)
+    reader_thread.start()
+    workers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    reader_thread.join()
+
+    return {
+        "perfil": "pragmas" if tuned else "padrão",
+        "escritas": done,
+        "erros_locked": errors,
+        "segundos": round(elapsed, 3),
+        "escritas_por_segundo": round(done / elapsed, 1),
+    }
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    for tuned in (False, True):
+        print(run(tuned, threads, writes))
@@ -0,0 +1,66 @@
+"""Compara o RangeFileResponse (/uploads) com o FileResponse do Starlette.
+
+Uso: python -m benchmarks.file_response [MB] [repetições]
+
+Chama as duas respostas direto pela interface ASGI, sem rede, e mede o envio
+do arquivo inteiro e de Ranges de 1MB (o padrão de um <video> buscando
+trechos). Mostra o custo por resposta e a vazão; o servidor (uvicorn) e a
+rede entram igualmente nos dois casos e ficam fora da conta.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from utils.file_response import RangeFileResponse
+
+def _scope(headers: dict) -> dict:
+    raw = [(k.encode(), v.encode()) for k, v in headers.items()]
+    return {"type": "http", "method": "GET", "path": "/", "headers": raw, "extensions": {}}
+
+async def _receive():
+    return {"type": "http.disconnect"}
+
+def _counting_send(counter: list):
+    async def send(message):
+        if message["type"] == "http.response.body":
+            counter[0] += len(message.get("body", b""))
+    return send
+
+async def _run(make_response, request_headers: dict, repeat: int) -> dict:
+    counter = [0]
+    send = _counting_send(counter)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await make_response(request_headers)(_scope(request_headers), _receive, send)
+    elapsed = time.perf_counter() - start
+    return {
+        "ms_por_resposta": round(elapsed / repeat * 1000, 2),
+        "MB_s": round(counter[0] / elapsed / 1e6, 1),
+    }
+
+def run(size_mb: int, repeat: int) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
+        tmp.write(os.urandom(size_mb * 1024 * 1024))
+    try:
+        range_response = lambda headers: RangeFileResponse(tmp.name, Headers(headers), '"bench"', "video/mp4")
+        file_response = lambda headers: FileResponse(tmp.name, media_type="video/mp4")
+        middle = size_mb * 1024 * 1024 // 2
+        cases = {"arquivo_inteiro": {}, "range_1MB": {"range": f"bytes={middle}-{middle + 1024 * 1024 - 1}"}}
+        result = {"arquivo_MB": size_mb}
+        for name, headers in cases.items():
+            result[name] = {
+                "RangeFileResponse": asyncio.run(_run(range_response, headers, repeat)),
+                # O FileResponse desta versão do Starlette ignora Range e envia o arquivo todo
+                "FileResponse": asyncio.run(_run(file_response, headers, repeat)),
+            }
+        return result
+    finally:
+        os.remove(tmp.name)
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(run(size, repeat))
@@ -0,0 +1,267 @@
+"""Gera carga nas rotas reais e mede latência, vazão e consultas SQL.
+
+Uso:
+    python -m benchmarks.load                            # em processo (ASGI)
+    python -m benchmarks.load --url http://localhost:8000 --concurrency 64
+    python -m benchmarks.load --scenarios login,student_dashboard --duration 20
+
+Pressupõe um banco populado com `python -m benchmarks.seed`. As contagens
+de SQL vêm do /metrics (diferença antes/depois), então a API precisa estar
+com METRICS_ENABLED (e, com --url, RATE_LIMIT_ENABLED=false). O resultado
+é salvo em JSON em benchmarks/results/ para comparar commits com
+`python -m benchmarks.compare`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import httpx
+from benchmarks.seed import BENCH_PASSWORD, student_email, teacher_email
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+METRIC_RE = re.compile(r'^lumina_http_request_queries_(sum|count)\{method="([^"]+)",route="([^"]+)"\} (\S+)$')
+
+@dataclass
+class Session:
+    """Credenciais e ids usados pelos cenários (obtidos via API no setup)."""
+    email: str
+    headers: dict
+    class_ids: List[int]
+    user_id: int
+    file_url: Optional[str] = None
+
+class Context:
+    def __init__(self, students: List[Session], teachers: List[Session], rng: random.Random):
+        self.students = students
+        self.teachers = teachers
+        self.rng = rng
+
+    def student(self) -> Session:
+        return self.rng.choice(self.students)
+
+    def teacher(self) -> Session:
+        return self.rng.choice(self.teachers)
+
+# Cada cenário faz uma requisição e devolve a resposta
+async def login(client, ctx):
+    return await client.post("/api/auth/login", json={"email": ctx.student().email, "password": BENCH_PASSWORD})
+
+async def student_subjects(client, ctx):
+    return await client.get("/api/student/subjects", headers=ctx.student().headers)
+
+async def student_materials(client, ctx):
+    return await client.get("/api/student/materials", headers=ctx.student().headers)
+
+async def student_messages(client, ctx):
+    return await client.get("/api/student/messages", params={"limit": 200}, headers=ctx.student().headers)
+
+async def student_unread_count(client, ctx):
+    return await client.get("/api/student/messages/unread-count", headers=ctx.student().headers)
+
+async def student_dashboard(client, ctx):
+    return await client.get("/api/student/dashboard", headers=ctx.student().headers)
+
+async def student_report_card(client, ctx):
+    return await client.get("/api/student/report-card", headers=ctx.student().headers)
+
+async def student_search(client, ctx):
+    return await client.get("/api/student/search", params={"q": "material apoio"}, headers=ctx.student().headers)
+
+async def teacher_classes(client, ctx):
+    return await client.get("/api/teacher/classes", headers=ctx.teacher().headers)
+
+async def teacher_students(client, ctx):
+    session = ctx.teacher()
+    return await client.get("/api/teacher/students", params={"class_id": ctx.rng.choice(session.class_ids)}, headers=session.headers)
+
+async def teacher_class_stats(client, ctx):
+    session = ctx.teacher()
+    return await client.get(f"/api/teacher/classes/{ctx.rng.choice(session.class_ids)}/stats", headers=session.headers)
+
+async def download(client, ctx):
+    session = ctx.student()
+    return await client.get(session.file_url, headers=session.headers)
+
+async def download_range(client, ctx):
+    session = ctx.student()
+    return await client.get(session.file_url, headers={**session.headers, "Range": "bytes=0-65535"})
+
+SCENARIOS: Dict[str, Callable] = {
+    "login": login,
+    "student_subjects": student_subjects,
+    "student_materials": student_materials,
+    "student_messages": student_messages,
+    "student_unread_count": student_unread_count,
+    "student_dashboard": student_dashboard,
+    "student_report_card": student_report_card,
+    "student_search": student_search,
+    "teacher_classes": teacher_classes,
+    "teacher_students": teacher_students,
+    "teacher_class_stats": teacher_class_stats,
+    "download": download,
+    "download_range": download_range,
+}
+
+def _percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+async def _login(client, email: str) -> dict:
+    response = await client.post("/api/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    body = response.json()
+    return {"headers": {"Authorization": f"Bearer {body['access_token']}"}, "user_id": body["user"]["id"]}
+
+async def setup(client, sessions: int, rng: random.Random) -> Context:
+    students, teachers = [], []
+    for n in rng.sample(range(sessions * 50), sessions):
+        try:
+            login_data = await _login(client, student_email(n))
+        except httpx.HTTPStatusError:
+            continue
+        subjects = (await client.get("/api/student/subjects", headers=login_data["headers"])).json()
+        materials = (await client.get("/api/student/materials", params={"limit": 200}, headers=login_data["headers"])).json()
+        file_url = next((m["file_url"] for m in materials if m.get("file_url")), None)
+        students.append(Session(student_email(n), login_data["headers"], [c["id"] for c in subjects], login_data["user_id"], file_url))
+
+    for n in range(sessions):
+        try:
+            login_data = await _login(client, teacher_email(n))
+        except httpx.HTTPStatusError:
+            break
+        classes = (await client.get("/api/teacher/classes", params={"limit": 200}, headers=login_data["headers"])).json()
+        if classes:
+            teachers.append(Session(teacher_email(n), login_data["headers"], [c["id"] for c in classes], login_data["user_id"]))
+
+    if not students or not teachers:
+        raise SystemExit("Banco sem dados de benchmark; rode `python -m benchmarks.seed` antes.")
+    return Context(students, teachers, rng)
+
+async def _query_counts(client) -> Dict[str, list]:
+    response = await client.get("/metrics")
+    counts: Dict[str, list] = defaultdict(lambda: [0.0, 0.0])
+    if response.status_code != 200:
+        return counts
+    for line in response.text.splitlines():
+        match = METRIC_RE.match(line)
+        if match and match.group(3) != "/metrics":
+            kind, method, route, value = match.groups()
+            counts[f"{method} {route}"][0 if kind == "sum" else 1] = float(value)
+    return counts
+
+async def run_scenario(client, ctx: Context, name: str, concurrency: int, duration: float) -> dict:
+    scenario = SCENARIOS[name]
+    if name.startswith("download") and not any(s.file_url for s in ctx.students):
+        return {"skipped": "nenhum material com arquivo"}
+    if name.startswith("download"):
+        ctx = Context([s for s in ctx.students if s.file_url], ctx.teachers, ctx.rng)
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = defaultdict(int)
+    response_bytes = 0
+    before = await _query_counts(client)
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal response_bytes
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await scenario(client, ctx)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+            response_bytes += len(response.content)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    after = await _query_counts(client)
+    queries = sum(after[k][0] - before.get(k, [0, 0])[0] for k in after)
+    counted = sum(after[k][1] - before.get(k, [0, 0])[1] for k in after)
+    errors = sum(n for code, n in statuses.items() if code >= 400)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status": dict(statuses),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "queries_per_request": round(queries / counted, 2) if counted else None,
+        "bytes_per_response": round(response_bytes / len(latencies)),
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def main(args) -> dict:
+    rng = random.Random(args.seed)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+        app = None
+    else:
+        import main as api
+        from utils.rate_limit import rate_limiter
+        # Todas as requisições saem do mesmo "IP": mede a API, não o rate limit
+        rate_limiter.rules = []
+        app = api.app
+        await app.router.startup()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    try:
+        ctx = await setup(client, args.sessions, rng)
+        results = {}
+        for name in args.scenarios:
+            concurrency = min(args.concurrency, args.login_concurrency) if name == "login" else args.concurrency
+            results[name] = await run_scenario(client, ctx, name, concurrency, args.duration)
+            print(f"{name:22} {json.dumps(results[name])}")
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+
+    return {
+        "commit": _git_commit(),
+        "date": datetime.utcnow().isoformat(),
+        "mode": "http" if args.url else "inprocess",
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "results": results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL da API; sem ela, as requisições rodam em processo")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--login-concurrency", type=int, default=4, help="login é limitado pelo bcrypt")
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos por cenário")
+    parser.add_argument("--sessions", type=int, default=20, help="alunos e professores logados no setup")
+    parser.add_argument("--scenarios", type=lambda v: v.split(","), default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="arquivo JSON de saída (padrão: benchmarks/results/<data>-<commit>.json)")
+    args = parser.parse_args()
+
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"cenários desconhecidos: {', '.join(unknown)}")
+
+    report = asyncio.run(main(args))
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.utcnow():%Y%m%d-%H%M%S}-{report['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Resultados salvos em {out}")
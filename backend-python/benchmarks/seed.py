@@ -0,0 +1,177 @@
+"""Popula o banco com volumes realistas para benchmarks.
+
+Uso: python -m benchmarks.seed [--scale 0.1] [--seed 42]
+
+Com --scale 1 gera 50k usuários, 2k turmas, 500k notas e 1M de mensagens
+(ajuste cada volume com --users, --classes, --grades e --messages). Os
+inserts são em lote (executemany) direto nas tabelas de database/models.py.
+Todos os usuários usam a senha BENCH_PASSWORD; os emails seguem
+aluno{n}@bench.lumina e professor{n}@bench.lumina.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+from config import settings
+from database.connection import AsyncSessionLocal, engine
+from database.migrations import upgrade_to_head
+from database.models import Class, Grade, Material, Message, User, Enrollment, UnreadCounter
+from utils.grade_stats import rebuild_class_stats
+from utils.security import hash_password
+
+BENCH_PASSWORD = "benchmark123"
+BATCH_SIZE = 10000
+CLASSES_PER_TEACHER = 5
+CLASSES_PER_STUDENT = 4
+MATERIALS_PER_CLASS = 10
+ASSIGNMENTS = ["Prova 1", "Prova 2", "Trabalho 1", "Trabalho 2", "Seminário"]
+ATTACHMENT_SIZE = 1024 * 1024
+
+def student_email(n: int) -> str:
+    return f"aluno{n}@bench.lumina"
+
+def teacher_email(n: int) -> str:
+    return f"professor{n}@bench.lumina"
+
+def _insert(connection, table, rows) -> int:
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            connection.execute(insert(table), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        connection.execute(insert(table), batch)
+        total += len(batch)
+    return total
+
+def _write_attachment(rng: random.Random) -> tuple:
+    # Um anexo real, endereçado pelo conteúdo, para o benchmark de download
+    content = rng.randbytes(ATTACHMENT_SIZE)
+    content_hash = hashlib.sha256(content).hexdigest()
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(settings.UPLOAD_DIR, f"{content_hash}.pdf")
+    if not os.path.exists(path):
+        with open(path, "wb") as file:
+            file.write(content)
+    return f"/uploads/{content_hash}.pdf", content_hash
+
+def seed(users: int, classes: int, grades: int, messages: int, seed_value: int = 42) -> dict:
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    teachers = max(1, classes // CLASSES_PER_TEACHER)
+    students = max(1, users - teachers)
+    password = hash_password(BENCH_PASSWORD)
+
+    def when() -> datetime:
+        return now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+
+    upgrade_to_head()
+    timings = {}
+    with engine.begin() as connection:
+        if connection.scalar(select(func.count(User.id))):
+            raise SystemExit("O banco já tem usuários; use um DATABASE_URL vazio para o seed.")
+
+        start = time.perf_counter()
+        _insert(connection, User.__table__, (
+            {"name": f"Professor {n}", "email": teacher_email(n), "password": password,
+             "user_type": "teacher", "created_at": when()}
+            for n in range(teachers)
+        ))
+        _insert(connection, User.__table__, (
+            {"name": f"Aluno {n}", "email": student_email(n), "password": password,
+             "user_type": "student", "created_at": when()}
+            for n in range(students)
+        ))
+        teacher_ids = connection.scalars(select(User.id).where(User.user_type == "teacher").order_by(User.id)).all()
+        student_ids = connection.scalars(select(User.id).where(User.user_type == "student").order_by(User.id)).all()
+        timings["users"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _insert(connection, Class.__table__, (
+            {"name": f"Turma {n}", "description": f"Turma de benchmark {n}",
+             "teacher_id": teacher_ids[n % len(teacher_ids)], "created_at": when()}
+            for n in range(classes)
+        ))
+        class_ids = connection.scalars(select(Class.id).order_by(Class.id)).all()
+
+        enrollments = {sid: rng.sample(class_ids, min(CLASSES_PER_STUDENT, len(class_ids))) for sid in student_ids}
+        _insert(connection, Enrollment.__table__, (
+            {"class_id": cid, "student_id": sid} for sid, cids in enrollments.items() for cid in cids
+        ))
+        timings["classes"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        file_url, content_hash = _write_attachment(rng)
+        _insert(connection, Material.__table__, (
+            {"title": f"Material {n}", "description": "Conteúdo de apoio", "class_id": cid,
+             "file_url": file_url if n == 0 else None,
+             "file_type": "application/pdf" if n == 0 else None,
+             "content_hash": content_hash if n == 0 else None,
+             "file_size": ATTACHMENT_SIZE if n == 0 else None,
+             "created_at": when()}
+            for cid in class_ids for n in range(MATERIALS_PER_CLASS)
+        ))
+        timings["materials"] = time.perf_counter() - start
+
+        def enrolled_pair():
+            sid = student_ids[rng.randrange(len(student_ids))]
+            return sid, rng.choice(enrollments[sid])
+
+        start = time.perf_counter()
+        _insert(connection, Grade.__table__, (
+            {"student_id": sid, "class_id": cid, "assignment": rng.choice(ASSIGNMENTS),
+             "grade": round(rng.uniform(0, 10), 1), "feedback": None, "created_at": when()}
+            for sid, cid in (enrolled_pair() for _ in range(grades))
+        ))
+        timings["grades"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _insert(connection, Message.__table__, (
+            {"student_id": sid, "class_id": cid, "title": "Aviso",
+             "content": "Mensagem de benchmark " * rng.randint(1, 8), "created_at": when()}
+            for sid, cid in (enrolled_pair() for _ in range(messages))
+        ))
+        # Todas nascem não lidas: o contador de cada aluno é o total dele
+        connection.execute(insert(UnreadCounter).from_select(
+            ["student_id", "unread"],
+            select(Message.student_id, func.count()).group_by(Message.student_id)
+        ))
+        timings["messages"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    asyncio.run(_rebuild_stats(class_ids))
+    timings["grade_stats"] = time.perf_counter() - start
+
+    return {
+        "teachers": teachers,
+        "students": students,
+        "classes": classes,
+        "grades": grades,
+        "messages": messages,
+        "seconds": {k: round(v, 2) for k, v in timings.items()},
+    }
+
+async def _rebuild_stats(class_ids) -> None:
+    async with AsyncSessionLocal() as db:
+        for class_id in class_ids:
+            await rebuild_class_stats(db, class_id)
+        await db.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplica os volumes padrão")
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--classes", type=int, default=2000)
+    parser.add_argument("--grades", type=int, default=500000)
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    scaled = lambda n: max(1, int(n * args.scale))
+    print(seed(scaled(args.users), scaled(args.classes), scaled(args.grades), scaled(args.messages), args.seed))
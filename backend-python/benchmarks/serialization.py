@@ -0,0 +1,42 @@
+"""Compara a serialização por objeto ORM (caminho antigo) com dump_rows.
+
+Uso: python -m benchmarks.serialization [linhas ...]   # padrão: 10, 1000 e 100000
+"""
+import json
+import sys
+import time
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from database.models import Message
+from schemas.message import MessageResponse
+from utils.serialization import columns_for, dump_rows
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return round((time.perf_counter() - start) * 1000, 1)
+
+def run(rows: int) -> dict:
+    now = datetime.utcnow()
+    objects = [
+        Message(id=n, student_id=1, class_id=1, title="Aviso", content="Mensagem de benchmark " * 4, created_at=now)
+        for n in range(rows)
+    ]
+    columns = [c.key for c in columns_for(MessageResponse, Message)]
+    # Equivalente às linhas de select(*columns_for(...)) usadas pelas rotas
+    row_objects = [{c: getattr(m, c) for c in columns} for m in objects]
+
+    def orm_path():
+        # response_model: valida cada objeto e passa pelo jsonable_encoder + json padrão
+        payload = [MessageResponse.model_validate(m).model_dump() for m in objects]
+        json.dumps(jsonable_encoder(payload)).encode()
+
+    return {
+        "linhas": rows,
+        "orm_response_model_ms": _timed(orm_path),
+        "dump_rows_ms": _timed(lambda: dump_rows(MessageResponse, row_objects)),
+    }
+
+if __name__ == "__main__":
+    for rows in [int(a) for a in sys.argv[1:]] or [10, 1000, 100000]:
+        print(run(rows))
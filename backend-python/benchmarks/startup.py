@@ -0,0 +1,91 @@
+"""Mede o tempo de importação do app e o tempo até a primeira resposta.
+
+Uso:
+    python -m benchmarks.startup                 # falha (código 1) se passar do orçamento
+    python -m benchmarks.startup --runs 10 --import-budget 2.0
+
+Cada medição roda em um processo novo (cache de bytecode já aquecido pela
+primeira execução). O tempo até a primeira resposta sobe `serve.py` com um
+worker em uma porta livre e conta até o primeiro 200 de /health. Usa o banco
+configurado em DATABASE_URL (as migrações pendentes entram na conta).
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamentos (segundos, mediana), medidos em uma VM de 1 vCPU: import de main
+# 1.3-1.9s (só as dependências, ~1.1s; fastapi.openapi.models sozinho ~0.5s)
+# e primeira resposta 1.9-2.5s. A folga cobre máquinas de CI mais lentas;
+# remedir e ajustar junto com a justificativa no commit.
+IMPORT_BUDGET = 3.0
+FIRST_REQUEST_BUDGET = 5.0
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_import() -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+def measure_first_request(timeout: float = 30.0) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", "1", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR
+    )
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - started < timeout:
+                if server.poll() is not None:
+                    raise RuntimeError(f"serve.py saiu com código {server.returncode}")
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.02)
+        raise TimeoutError(f"sem resposta de /health em {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET)
+    parser.add_argument("--first-request-budget", type=float, default=FIRST_REQUEST_BUDGET)
+    args = parser.parse_args()
+
+    measure_import()  # aquece o cache de bytecode
+    imports = [measure_import() for _ in range(args.runs)]
+    first = [measure_first_request() for _ in range(args.runs)]
+    result = {
+        "import_s": round(statistics.median(imports), 3),
+        "first_request_s": round(statistics.median(first), 3),
+    }
+    print(result)
+
+    failed = False
+    if result["import_s"] > args.import_budget:
+        print(f"import de main: {result['import_s']}s > orçamento de {args.import_budget}s")
+        failed = True
+    if result["first_request_s"] > args.first_request_budget:
+        print(f"primeira resposta: {result['first_request_s']}s > orçamento de {args.first_request_budget}s")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,57 @@
-import os
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production-min-32-chars"
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 horas
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    # Links assinados de /uploads: <video>/<audio> não enviam Authorization e
+    # pedem Ranges durante toda a reprodução, então a validade cobre uma aula
+    MEDIA_URL_EXPIRE_MINUTES: int = 120
+    # Chaveiro para rotação: "kid:segredo,kid_antigo:segredo_antigo" (o primeiro assina).
+    # Vazio = SECRET_KEY com kid "default".
+    JWT_KEYS: str = ""
+    
+    # Hash de senhas (bcrypt)
+    BCRYPT_ROUNDS: int = 12
+    HASH_POOL_WORKERS: int = 0  # 0 = número de núcleos
+    HASH_QUEUE_LIMIT: int = 64
+    
+    # Rate limiting por token bucket, por worker: "N/second|minute|hour" (vazio = sem limite)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_IP: str = "600/minute"  # toda a /api
+    RATE_LIMIT_AUTH_PER_ACCOUNT: str = "10/minute"  # login e registro por (IP, email): tentativas numa conta
+    RATE_LIMIT_AUTH_PER_IP: str = "600/minute"  # folgado: uma turma inteira entra ao mesmo tempo pelo IP da escola
+    RATE_LIMIT_AUTH_GLOBAL: str = "30/second"  # login e registro somados (limita o bcrypt)
+    RATE_LIMIT_WRITES_PER_USER: str = "60/minute"  # POST/PUT/PATCH/DELETE de aluno e professor
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    
+    # Descarte de carga (503 para baixa prioridade e depois para o resto); 0 = sinal desligado
+    SHED_MAX_INFLIGHT: int = 256  # requisições aguardando o início da resposta
+    SHED_LATENCY_MS: int = 2000  # média móvel da latência até o início da resposta
+    
+    # Cache do usuário autenticado
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 300  # segundos
     
     # Database
     DATABASE_URL: str = "sqlite:///./lumina.db"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800  # segundos
+    DB_POOL_TIMEOUT: int = 30  # segundos
+    AUTO_MIGRATE: bool = True  # aplica as migrações pendentes ao iniciar
+    # Réplicas de leitura, separadas por vírgula (vazio = tudo no primário)
+    DATABASE_REPLICA_URLS: str = ""
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # após escrever, o usuário lê do primário
+    
+    # Ajustes do SQLite (ignorados em outros bancos)
+    SQLITE_WAL: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE: int = -65536  # negativo = KiB (64MB)
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
     
     # CORS
     CORS_ORIGINS: list = [
@@ -20,15 +63,33 @@ class Settings(BaseSettings):
         "https://*.app.github.dev"
     ]
     
+    # Cache de respostas das listagens (ETag + LRU limitado em bytes)
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    
+    # Pub/sub para entrega em tempo real (vazio = apenas em processo)
+    PUBSUB_BROKER_URL: str = ""  # ex.: tcp://127.0.0.1:8765 (python -m utils.broker)
+    
+    # Métricas (/metrics) e log de requisições lentas
+    METRICS_ENABLED: bool = True
+    SLOW_REQUEST_MS: int = 0  # 0 = desligado
+    SLOW_REQUEST_TOP_SQL: int = 5  # comandos SQL mais lentos incluídos no log
+    HEALTH_DB_TIMEOUT: float = 2.0  # segundos
+    
     # File Storage
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    EXTRACTED_TEXT_MAX_CHARS: int = 200000  # texto extraído guardado para a busca
+    
+    # Fila de jobs (processamento pós-upload)
+    JOB_WORKERS: int = 2  # tarefas no processo da API; 0 = só `python -m utils.jobs`
+    JOB_POLL_INTERVAL: float = 2.0  # segundos
+    JOB_LEASE_SECONDS: int = 300  # após isso, um job "running" pode ser retomado
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 10.0  # backoff exponencial a partir deste valor
+    JOB_RETENTION_DAYS: int = 7  # jobs concluídos são apagados depois disso
     
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 settings = Settings()
-
-# Criar diretório de uploads
-os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
@@ -1,20 +1,191 @@
-from sqlalchemy import create_engine
+import asyncio
+import json
+import random
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import settings
+from utils.cache import TTLCache
+from utils.metrics import instrument_engine
+from utils.pubsub import pubsub
 
+# Drivers assíncronos usados para cada banco
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    if "+" in parsed.drivername:
+        return url
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+def _pool_kwargs(url: str) -> dict:
+    # SQLite em memória usa StaticPool, que não aceita parâmetros de pool
+    if make_url(url).database in (None, "", ":memory:"):
+        return {}
+    # aiosqlite usaria NullPool por padrão; forçamos um pool configurável
+    return {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+
+IS_SQLITE = make_url(settings.DATABASE_URL).get_backend_name() == "sqlite"
+
+connect_args = {"check_same_thread": False} if IS_SQLITE else {}
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    """Ajustes de desempenho aplicados a cada nova conexão SQLite.
+
+    WAL permite leituras simultâneas a uma escrita, e busy_timeout faz
+    escritores concorrentes esperarem em vez de falhar com "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    if settings.SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+# Engine síncrona: migrações e scripts administrativos
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    connect_args=connect_args
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+def _create_async_engine(url: str):
+    async_url = to_async_url(url)
+    sqlite = make_url(url).get_backend_name() == "sqlite"
+    created = create_async_engine(
+        async_url,
+        connect_args={"check_same_thread": False} if sqlite else {},
+        **_pool_kwargs(url)
+    )
+    if sqlite:
+        event.listen(created.sync_engine, "connect", apply_sqlite_pragmas)
+    # Contagem e tempo dos comandos SQL por requisição (utils/metrics.py)
+    instrument_engine(created.sync_engine)
+    return created
+
+# Engine assíncrona: usada pelas rotas da API (primário: todas as escritas)
+async_engine = _create_async_engine(settings.DATABASE_URL)
+
+# Réplicas de leitura; vazias = tudo no primário
+replica_engines = [
+    _create_async_engine(url.strip())
+    for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()
+]
+
+if IS_SQLITE:
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+instrument_engine(engine)
+
+# Usuário autenticado na requisição atual (definido em middleware/auth.py)
+current_user_id: ContextVar[Optional[int]] = ContextVar("lumina_user_id", default=None)
+
+# Quem escreveu há pouco lê do primário, para ver a própria escrita apesar do atraso das réplicas
+recent_writers = TTLCache(100000, settings.READ_YOUR_WRITES_SECONDS)
+WRITES_CHANNEL = "db:writes"
+
+class RoutingSession(Session):
+    """Sessão que escolhe o banco a cada comando.
+
+    Só sessões abertas com `info={"read_only": True}` (get_read_db) usam
+    réplicas, e ainda assim flushes, INSERT/UPDATE/DELETE e usuários que
+    escreveram nos últimos READ_YOUR_WRITES_SECONDS vão para o primário.
+    """
 
-def get_db():
-    db = SessionLocal()
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            replica_engines
+            and self.info.get("read_only")
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+            and recent_writers.get(current_user_id.get()) is None
+        ):
+            # Uma réplica por sessão: as leituras da requisição veem o mesmo estado
+            replica = self.info.get("replica")
+            if replica is None:
+                replica = self.info["replica"] = random.choice(replica_engines)
+            return replica.sync_engine
+        return async_engine.sync_engine
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _track_dml(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["wrote"] = True
+
+@event.listens_for(RoutingSession, "after_flush")
+def _track_flush(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(RoutingSession, "after_commit")
+def _mark_writer(session):
+    user_id = current_user_id.get()
+    if not session.info.pop("wrote", False) or user_id is None or not replica_engines:
+        return
+    recent_writers.set(user_id, True)
+    # Avisa os outros workers; a próxima requisição pode cair em qualquer um
     try:
+        asyncio.get_running_loop().create_task(pubsub.publish(WRITES_CHANNEL, "wrote", json.dumps(user_id)))
+    except RuntimeError:  # fora do event loop (scripts síncronos)
+        pass
+
+async def _listen_writes() -> None:
+    while True:
+        queue = pubsub.subscribe([WRITES_CHANNEL])
+        try:
+            while (item := await queue.get()) is not None:
+                recent_writers.set(json.loads(item.data), True)
+        finally:
+            pubsub.unsubscribe(queue)
+
+def start_write_sync() -> Optional[asyncio.Task]:
+    """Recebe dos outros workers quem escreveu há pouco (só com réplicas)."""
+    return asyncio.create_task(_listen_writes()) if replica_engines else None
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+Base = declarative_base()
+
+def reset_pools_after_fork() -> None:
+    """Descarta, sem fechar, as conexões herdadas do processo pai (chamar no filho após fork).
+
+    Os sockets continuam pertencendo ao pai; cada worker abre as próprias conexões.
+    """
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    for replica in replica_engines:
+        replica.sync_engine.dispose(close=False)
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db():
+    """Sessão para rotas só de leitura: usa réplicas quando configuradas."""
+    async with AsyncSessionLocal(info={"read_only": True}) as db:
         yield db
-    finally:
-        db.close()
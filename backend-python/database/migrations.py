@@ -0,0 +1,50 @@
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from config import settings
+from database.connection import engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+def alembic_config() -> Config:
+    config = Config(ALEMBIC_INI)
+    # Mantém a configuração de logging da aplicação
+    config.attributes["configure_logger"] = False
+    return config
+
+def _stamp_legacy(config: Config) -> None:
+    """Marca a revisão de um banco criado antes das migrações (via create_all)."""
+    tables = inspect(engine).get_table_names()
+    if "alembic_version" not in tables and "users" in tables:
+        # As revisões seguintes só aplicam o que ainda não existe
+        command.stamp(config, "0001")
+
+@contextmanager
+def _migration_lock():
+    """Serializa as migrações entre workers da mesma máquina.
+
+    Em deploys com várias máquinas, use AUTO_MIGRATE=false e rode
+    `alembic upgrade head` uma vez no deploy.
+    """
+    try:
+        import fcntl
+    except ImportError:  # Windows: sem lock entre processos
+        yield
+        return
+    name = hashlib.sha256(settings.DATABASE_URL.encode()).hexdigest()[:16]
+    with open(os.path.join(tempfile.gettempdir(), f"lumina-migrate-{name}.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def upgrade_to_head() -> None:
+    config = alembic_config()
+    with _migration_lock():
+        _stamp_legacy(config)
+        command.upgrade(config, "head")
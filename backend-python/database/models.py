@@ -1,15 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, Table
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database.connection import Base
 
-# Tabela associativa para alunos e turmas
-class_students = Table(
-    'class_students',
-    Base.metadata,
-    Column('class_id', Integer, ForeignKey('classes.id')),
-    Column('student_id', Integer, ForeignKey('users.id'))
-)
+# Matrícula de aluno em turma. A PK (class_id, student_id) atende às consultas por
+# turma e o índice reverso às consultas por aluno; ambas são buscas em B-tree.
+class Enrollment(Base):
+    __tablename__ = "class_students"
+    
+    class_id = Column(Integer, ForeignKey('classes.id'), primary_key=True)
+    student_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    
+    __table_args__ = (
+        Index('ix_class_students_student_class', 'student_id', 'class_id'),
+    )
 
 class User(Base):
     __tablename__ = "users"
@@ -21,9 +25,13 @@ class User(Base):
     user_type = Column(String(20), nullable=False)  # student ou teacher
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
+    
     # Relacionamentos
     classes_teaching = relationship("Class", back_populates="teacher")
-    classes_enrolled = relationship("Class", secondary=class_students, back_populates="students")
+    classes_enrolled = relationship("Class", secondary=Enrollment.__table__, back_populates="students", viewonly=True)
     grades = relationship("Grade", back_populates="student")
     messages_received = relationship("Message", back_populates="student")
 
@@ -36,9 +44,13 @@ class Class(Base):
     teacher_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        Index('ix_classes_teacher_created', 'teacher_id', 'created_at', 'id'),
+    )
+    
     # Relacionamentos
     teacher = relationship("User", back_populates="classes_teaching")
-    students = relationship("User", secondary=class_students, back_populates="classes_enrolled")
+    students = relationship("User", secondary=Enrollment.__table__, back_populates="classes_enrolled", viewonly=True)
     materials = relationship("Material", back_populates="class_obj")
     grades = relationship("Grade", back_populates="class_obj")
     messages = relationship("Message", back_populates="class_obj")
@@ -49,11 +61,22 @@ class Material(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     description = Column(Text)
-    file_url = Column(String(500))
+    file_url = Column(String(500), index=True)
     file_type = Column(String(50))
+    file_size = Column(Integer)
+    content_hash = Column(String(64), index=True)  # SHA-256 do arquivo
+    # Preenchidos pelo job de processamento (utils/material_processing.py)
+    processing_status = Column(String(20), nullable=False, default="pending")  # pending, processing, ready, failed
+    processing_error = Column(Text)
+    page_count = Column(Integer)
+    extracted_text = Column(Text)
     class_id = Column(Integer, ForeignKey('classes.id'), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        Index('ix_materials_class_created', 'class_id', 'created_at', 'id'),
+    )
+    
     # Relacionamentos
     class_obj = relationship("Class", back_populates="materials")
 
@@ -68,10 +91,35 @@ class Grade(Base):
     feedback = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        Index('ix_grades_student_class', 'student_id', 'class_id'),
+        Index('ix_grades_class_assignment', 'class_id', 'assignment'),
+    )
+    
     # Relacionamentos
     student = relationship("User", back_populates="grades")
     class_obj = relationship("Class", back_populates="grades")
 
+# Estatísticas de notas mantidas incrementalmente a cada inserção
+class GradeSummary(Base):
+    __tablename__ = "grade_summaries"
+    
+    class_id = Column(Integer, ForeignKey('classes.id'), primary_key=True)
+    assignment = Column(String(200), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0)
+    total_sq = Column(Float, nullable=False, default=0)
+    min_grade = Column(Float)
+    max_grade = Column(Float)
+
+class GradeBucket(Base):
+    __tablename__ = "grade_buckets"
+    
+    class_id = Column(Integer, ForeignKey('classes.id'), primary_key=True)
+    assignment = Column(String(200), primary_key=True)
+    bucket = Column(Integer, primary_key=True)  # nota * 10, arredondada
+    count = Column(Integer, nullable=False, default=0)
+
 class Message(Base):
     __tablename__ = "messages"
     
@@ -81,7 +129,57 @@ class Message(Base):
     title = Column(String(200), nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    read_at = Column(DateTime)  # confirmação de leitura; NULL = não lida
+    
+    __table_args__ = (
+        Index('ix_messages_student_created', 'student_id', 'created_at', 'id'),
+        # Índice parcial: só as não lidas, que tendem a ser poucas por aluno
+        Index('ix_messages_student_unread', 'student_id', 'id',
+              sqlite_where=text('read_at IS NULL'), postgresql_where=text('read_at IS NULL')),
+    )
     
     # Relacionamentos
     student = relationship("User", back_populates="messages_received")
     class_obj = relationship("Class", back_populates="messages")
+
+# Mensagens não lidas por aluno, mantido no envio e na leitura (utils/unread.py)
+class UnreadCounter(Base):
+    __tablename__ = "unread_counters"
+    
+    student_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
+
+# Versão por recurso, incrementada nas escritas; base dos ETags das listagens
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+    
+    key = Column(String(100), primary_key=True)  # ex.: class:1, student:2, teacher:3
+    version = Column(Integer, nullable=False, default=0)
+
+# jti de tokens revogados (logout/refresh); mantidos só até a expiração do token
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(36), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+# Fila de jobs durável (utils/jobs.py); o job é gravado na mesma transação que o dispara
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False, default="{}")  # JSON
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String(64))
+    locked_until = Column(DateTime)  # lease: passado esse instante, outro worker pode retomar o job
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
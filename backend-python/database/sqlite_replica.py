@@ -0,0 +1,38 @@
+"""Réplica de leitura SQLite por cópia de arquivo, para testar o roteamento localmente.
+
+Uso:
+    python -m database.sqlite_replica lumina.db replica1.db              # cópia única
+    python -m database.sqlite_replica lumina.db replica1.db --interval 2 # recopia a cada 2s
+
+Usa a API de backup do SQLite: a cópia é um snapshot consistente mesmo com
+o primário recebendo escritas, e é aplicada sobre o arquivo da réplica já
+aberto pela API. O intervalo simula o atraso de replicação.
+"""
+import argparse
+import sqlite3
+import time
+
+def copy_database(source: str, target: str) -> None:
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+    src.close()
+    dst.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="arquivo do banco primário")
+    parser.add_argument("targets", nargs="+", help="arquivos das réplicas")
+    parser.add_argument("--interval", type=float, default=0, help="segundos entre cópias (0 = uma vez)")
+    args = parser.parse_args()
+
+    while True:
+        start = time.perf_counter()
+        for target in args.targets:
+            copy_database(args.source, target)
+        print(f"{len(args.targets)} réplica(s) atualizada(s) em {(time.perf_counter() - start) * 1000:.0f}ms", flush=True)
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
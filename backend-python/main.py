@@ -1,18 +1,36 @@
+import asyncio
+import os
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from config import settings
-from database.connection import engine, Base
-from routes import auth, student, teacher
-
-# Criar tabelas
-Base.metadata.create_all(bind=engine)
+from sqlalchemy import text
+from database.connection import async_engine, replica_engines, start_write_sync
+from middleware.auth import user_cache
+from middleware.metrics import MetricsMiddleware
+from middleware.rate_limit import RateLimitMiddleware
+from routes import auth, student, teacher, files, admin
+from utils.security import hashing_pool
+from utils.pubsub import pubsub
+from utils.revocation import start_revocation_sync
+from utils.user_versions import start_user_version_sync
+from utils.jobs import job_worker
+from utils.rate_limit import load_shedder, rate_limiter
+from utils.response_cache import response_cache
+from utils import metrics
 
 app = FastAPI(
     title="LUMINA API",
     description="API para plataforma educacional",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Adicionado antes do CORS (fica por dentro): as respostas 429/503 também recebem os headers de CORS
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, shedder=load_shedder)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,21 +39,128 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Content-Disposition", "Retry-After"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(
+        MetricsMiddleware,
+        slow_request_ms=settings.SLOW_REQUEST_MS,
+        slow_top_sql=settings.SLOW_REQUEST_TOP_SQL
+    )
+
+_prepared = False
+
+def prepare() -> None:
+    """Preparação única do ambiente: diretório de uploads e migrações.
+
+    O serve.py chama no processo mestre, antes do fork; com `uvicorn main:app`
+    roda no startup de cada worker (as migrações têm lock entre processos).
+    """
+    global _prepared
+    if _prepared:
+        return
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    if settings.AUTO_MIGRATE:
+        # Import tardio: o Alembic só é carregado quando há migração a aplicar
+        from database.migrations import upgrade_to_head
+        upgrade_to_head()
+    _prepared = True
+
+@app.on_event("startup")
+async def run_migrations():
+    # Em produção com várias máquinas, prefira AUTO_MIGRATE=false e `alembic upgrade head` no deploy
+    await run_in_threadpool(prepare)
+
+@app.on_event("startup")
+async def start_pubsub():
+    await pubsub.start()
+
+@app.on_event("startup")
+async def start_revocations():
+    # Depois das migrações e do pub/sub: carrega os jti revogados e escuta os novos
+    app.state.revocation_task = await start_revocation_sync()
+    app.state.user_version_task = await start_user_version_sync()
+
+@app.on_event("startup")
+async def start_replica_routing():
+    app.state.write_sync_task = start_write_sync()
+
+@app.on_event("startup")
+async def start_job_worker():
+    # JOB_WORKERS=0: os jobs ficam para `python -m utils.jobs`
+    if settings.JOB_WORKERS > 0:
+        job_worker.start()
+
+@app.on_event("shutdown")
+async def stop_job_worker():
+    await job_worker.stop()
+
+@app.on_event("shutdown")
+async def stop_pubsub():
+    app.state.revocation_task.cancel()
+    app.state.user_version_task.cancel()
+    if app.state.write_sync_task is not None:
+        app.state.write_sync_task.cancel()
+    await pubsub.close()
+
 # Rotas
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(student.router, prefix="/api/student", tags=["Student"])
 app.include_router(teacher.router, prefix="/api/teacher", tags=["Teacher"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(files.router, prefix="/uploads", tags=["Files"])
 
 @app.get("/")
 def root():
     return {"message": "LUMINA API - Backend Running"}
 
+def _pool_stats() -> dict:
+    pool = async_engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}
+    return {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow()}
+
+async def _ping_database() -> None:
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
 @app.get("/health")
-def health_check():
-    return {"status": "healthy", "version": "1.0.0"}
+async def health_check():
+    """Readiness: só responde 200 se o pool entrega uma conexão que responde."""
+    try:
+        await asyncio.wait_for(_ping_database(), settings.HEALTH_DB_TIMEOUT)
+        database = "ok"
+    except Exception as exc:
+        database = f"erro: {type(exc).__name__}"
+
+    body = {
+        "status": "healthy" if database == "ok" else "unhealthy",
+        "version": "1.0.0",
+        "database": database,
+        "db_pool": _pool_stats(),
+        "db_replicas": len(replica_engines),
+        "hash_pool": hashing_pool.stats(),
+    }
+    return ORJSONResponse(body, status_code=200 if database == "ok" else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    hash_stats = hashing_pool.stats()
+    gauges = [
+        *metrics.gauge("lumina_db_pool_connections", "Conexões do pool assíncrono", _pool_stats(), "state"),
+        *metrics.gauge("lumina_bcrypt_pool", "Fila do pool de bcrypt", {
+            k: hash_stats[k] for k in ("workers", "pending", "completed", "rejected")
+        }, "state"),
+        *metrics.gauge("lumina_user_cache", "Cache de usuários autenticados", user_cache.stats(), "state"),
+        *metrics.gauge("lumina_response_cache", "Cache de respostas das listagens", response_cache.stats(), "state"),
+        *metrics.gauge("lumina_pubsub", "Assinantes de tempo real", pubsub.stats(), "state"),
+        *metrics.gauge("lumina_jobs", "Jobs processados neste worker", job_worker.stats(), "state"),
+        *metrics.gauge("lumina_load_shedder", "Pressão usada no descarte de carga", load_shedder.stats(), "state"),
+    ]
+    return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
+    # Desenvolvimento; em produção use `python serve.py`
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
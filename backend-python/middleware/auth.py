@@ -1,42 +1,80 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError
-from sqlalchemy.orm import Session
-from database.connection import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.connection import current_user_id, get_read_db
 from database.models import User
+from schemas.user import UserResponse
 from utils.security import decode_token
+from utils.user_cache import UserCache
+from utils.user_versions import user_versions
+from config import settings
 
 security = HTTPBearer()
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+
+# Mudanças de usuário chegam por pub/sub de todos os workers (ver utils.user_versions)
+user_versions.listeners.append(user_cache.invalidate)
+
+def _invalid_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token inválido ou expirado"
+    )
+
+async def authenticate_token(token: str, db: AsyncSession) -> UserResponse:
     try:
-        token = credentials.credentials
+        # decode_token já recusa jti revogados (logout), com ou sem perfil no token
         payload = decode_token(token)
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token inválido"
+        user_id = int(payload.get("sub"))
+        version = int(payload.get("ver", 0))
+    except (JWTError, TypeError, ValueError):
+        raise _invalid_token()
+    
+    # Perfil alterado (ex.: papel) ou usuário removido depois da emissão: o cliente renova o token
+    if version < user_versions.get(user_id):
+        raise _invalid_token()
+    
+    # Base do roteamento de réplicas (read-your-writes por usuário)
+    current_user_id.set(user_id)
+    
+    # Tokens atuais carregam o perfil: autorização sem banco nem cache
+    if "role" in payload:
+        try:
+            return UserResponse(
+                id=user_id,
+                name=payload["name"],
+                email=payload["email"],
+                user_type=payload["role"],
+                created_at=payload["created_at"]
             )
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido ou expirado"
-        )
+        except (KeyError, ValueError):
+            raise _invalid_token()
+    
+    # Tokens antigos: cache primeiro; o banco só é consultado em caso de miss
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+    db_user = await db.get(User, user_id)
+    if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário não encontrado"
         )
     
+    user = UserResponse.model_validate(db_user)
+    user_cache.set(user)
     return user
 
-async def get_current_student(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_read_db)
+) -> UserResponse:
+    return await authenticate_token(credentials.credentials, db)
+
+async def get_current_student(current_user: UserResponse = Depends(get_current_user)) -> UserResponse:
     if current_user.user_type != "student":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -44,10 +82,19 @@ async def get_current_student(current_user: User = Depends(get_current_user)) ->
         )
     return current_user
 
-async def get_current_teacher(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_teacher(current_user: UserResponse = Depends(get_current_user)) -> UserResponse:
     if current_user.user_type != "teacher":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Acesso negado. Apenas professores podem acessar"
         )
     return current_user
+
+async def get_current_admin(current_user: UserResponse = Depends(get_current_user)) -> UserResponse:
+    # Administradores (secretaria) não se cadastram pela API; são promovidos no banco
+    if current_user.user_type != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado. Apenas administradores podem acessar"
+        )
+    return current_user
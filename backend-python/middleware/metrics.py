@@ -0,0 +1,89 @@
+import logging
+import time
+from typing import Dict
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils import metrics
+
+logger = logging.getLogger("lumina.slow")
+
+class MetricsMiddleware:
+    """Registra latência, comandos SQL, tempo no banco/bcrypt e tamanho dos corpos.
+
+    É um middleware ASGI puro: não bufferiza respostas (SSE, downloads) e o
+    contexto da requisição chega às sessões assíncronas do SQLAlchemy.
+    Com `slow_request_ms` > 0, requisições lentas são logadas com os comandos
+    SQL mais demorados.
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_ms: int = 0, slow_top_sql: int = 5):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+        self.slow_top_sql = slow_top_sql
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope: Scope) -> str:
+        # Usa o caminho declarado (/classes/{class_id}) para não explodir a cardinalidade
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            for candidate in scope["app"].routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = self._routes[endpoint] = candidate.path
+                    break
+            else:
+                route = scope.get("path", "unmatched")
+        return route
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = metrics.RequestStats(capture_sql=self.slow_request_ms > 0)
+        token = metrics.current_request.set(stats)
+        status_code = 500
+        request_bytes = 0
+        response_bytes = 0
+        start = time.perf_counter()
+
+        async def receive_wrapper() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            metrics.current_request.reset(token)
+            elapsed = time.perf_counter() - start
+            method, route = scope["method"], self._route(scope)
+            metrics.REQUESTS.inc(method, route, str(status_code))
+            metrics.REQUEST_SECONDS.observe(elapsed, method, route)
+            metrics.REQUEST_QUERIES.observe(stats.queries, method, route)
+            metrics.REQUEST_DB_SECONDS.observe(stats.db_seconds, method, route)
+            metrics.REQUEST_BYTES.observe(request_bytes, method, route)
+            metrics.RESPONSE_BYTES.observe(response_bytes, method, route)
+            if self.slow_request_ms and elapsed * 1000 >= self.slow_request_ms:
+                metrics.SLOW_REQUESTS.inc(method, route)
+                self._log_slow(scope, status_code, elapsed, stats)
+
+    def _log_slow(self, scope: Scope, status_code: int, elapsed: float, stats: metrics.RequestStats) -> None:
+        worst = sorted(stats.statements, key=lambda item: item[0], reverse=True)[:self.slow_top_sql]
+        lines = [
+            f"{scope['method']} {scope['path']} {status_code} {elapsed * 1000:.1f}ms "
+            f"sql={stats.queries} db={stats.db_seconds * 1000:.1f}ms bcrypt={stats.hash_seconds * 1000:.1f}ms"
+        ]
+        lines.extend(f"  {seconds * 1000:.1f}ms {' '.join(statement.split())}" for seconds, statement in worst)
+        logger.warning("Requisição lenta: %s", "\n".join(lines))
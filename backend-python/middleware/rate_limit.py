@@ -0,0 +1,93 @@
+import math
+import time
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils import metrics
+from utils.rate_limit import MAX_ACCOUNT_BODY, LoadShedder, RateLimiter, request_priority
+
+async def _reject(send: Send, status_code: int, retry_after: float, detail: str) -> None:
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def _buffer_body(receive: Receive) -> tuple:
+    """Lê o corpo até MAX_ACCOUNT_BODY; devolve (corpo, receive que reentrega as mensagens lidas)."""
+    messages = []
+    body = b""
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            break
+        if len(body) > MAX_ACCOUNT_BODY:
+            body = b""  # grande demais para ser login: a regra cai para o IP
+            break
+
+    async def replay() -> Message:
+        return messages.pop(0) if messages else await receive()
+
+    return body, replay
+
+class RateLimitMiddleware:
+    """Aplica o descarte de carga e os token buckets antes de chegar às rotas.
+
+    Ordem: o descarte (503) vem primeiro, por ser o mais barato; depois as
+    regras de rate limit (429). As duas respostas trazem `Retry-After`.
+    Middleware ASGI puro, para não bufferizar streams.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter, shedder: LoadShedder):
+        self.app = app
+        self.limiter = limiter
+        self.shedder = shedder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        priority = request_priority(scope["method"], scope["path"])
+        if not self.shedder.admit(priority):
+            metrics.SHED_REQUESTS.inc(priority)
+            await _reject(send, 503, self.shedder.retry_after(), "Servidor sobrecarregado, tente novamente em instantes")
+            return
+
+        body = b""
+        if self.limiter.needs_body(scope["method"], scope["path"]):
+            body, receive = await _buffer_body(receive)
+        wait, rule = await self.limiter.check(scope, body)
+        if rule is not None:
+            metrics.RATE_LIMITED.inc(rule.name)
+            await _reject(send, 429, wait, "Muitas requisições, tente novamente mais tarde")
+            return
+
+        # Só as requisições "normal" alimentam a latência: buscas e exports são lentos por natureza
+        sample = priority == "normal"
+        start = time.perf_counter()
+        started = False
+        self.shedder.started()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start" and not started:
+                # Latência até o início da resposta: streams longos não distorcem a média
+                started = True
+                self.shedder.finished(time.perf_counter() - start if sample else None)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not started:
+                self.shedder.finished(None)
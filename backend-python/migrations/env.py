@@ -0,0 +1,51 @@
+from logging.config import fileConfig
+from alembic import context
+from config import settings
+from database.connection import engine, Base
+import database.models  # noqa: F401  (registra as tabelas em Base.metadata)
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Estruturas de busca textual (migração 0005) ficam fora dos models:
+    # tabelas FTS5 e suas tabelas-sombra no SQLite, search_vector no PostgreSQL
+    if reflected and compare_to is None:
+        if type_ == "table" and "_fts" in name:
+            return False
+        if name == "search_vector" or (type_ == "index" and name.endswith("_search")):
+            return False
+    return True
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    # render_as_batch: o SQLite não suporta a maioria dos ALTER TABLE
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=True,
+            include_object=include_object,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
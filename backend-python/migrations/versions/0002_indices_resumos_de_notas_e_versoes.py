@@ -0,0 +1,89 @@
+"""índices, resumos de notas e versões de recursos
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 13:12:06
+
+Bancos criados antes das migrações podem já ter parte deste esquema (via
+create_all), então cada operação verifica o que existe antes de aplicar.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('classes', 'ix_classes_teacher_created', ['teacher_id', 'created_at', 'id']),
+    ('grades', 'ix_grades_class_assignment', ['class_id', 'assignment']),
+    ('grades', 'ix_grades_student_class', ['student_id', 'class_id']),
+    ('materials', 'ix_materials_class_created', ['class_id', 'created_at', 'id']),
+    ('materials', 'ix_materials_content_hash', ['content_hash']),
+    ('materials', 'ix_materials_file_url', ['file_url']),
+    ('messages', 'ix_messages_student_created', ['student_id', 'created_at', 'id']),
+    ('users', 'ix_users_created_at_id', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    # Modo offline (--sql) gera o script completo, sem consultar o banco
+    inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names()) if inspector else set()
+
+    if 'resource_versions' not in tables:
+        op.create_table('resource_versions',
+            sa.Column('key', sa.String(length=100), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('key')
+        )
+    if 'grade_buckets' not in tables:
+        op.create_table('grade_buckets',
+            sa.Column('class_id', sa.Integer(), nullable=False),
+            sa.Column('assignment', sa.String(length=200), nullable=False),
+            sa.Column('bucket', sa.Integer(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['class_id'], ['classes.id']),
+            sa.PrimaryKeyConstraint('class_id', 'assignment', 'bucket')
+        )
+    if 'grade_summaries' not in tables:
+        op.create_table('grade_summaries',
+            sa.Column('class_id', sa.Integer(), nullable=False),
+            sa.Column('assignment', sa.String(length=200), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.Column('total', sa.Float(), nullable=False),
+            sa.Column('total_sq', sa.Float(), nullable=False),
+            sa.Column('min_grade', sa.Float(), nullable=True),
+            sa.Column('max_grade', sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(['class_id'], ['classes.id']),
+            sa.PrimaryKeyConstraint('class_id', 'assignment')
+        )
+
+    columns = {c['name'] for c in inspector.get_columns('materials')} if inspector else set()
+    with op.batch_alter_table('materials', schema=None) as batch_op:
+        if 'file_size' not in columns:
+            batch_op.add_column(sa.Column('file_size', sa.Integer(), nullable=True))
+        if 'content_hash' not in columns:
+            batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    for table, name, columns in INDEXES:
+        if not inspector or name not in {i['name'] for i in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for table, name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+
+    with op.batch_alter_table('materials', schema=None) as batch_op:
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('file_size')
+
+    op.drop_table('grade_summaries')
+    op.drop_table('grade_buckets')
+    op.drop_table('resource_versions')
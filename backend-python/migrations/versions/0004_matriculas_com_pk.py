@@ -0,0 +1,46 @@
+"""matrículas com chave primária composta e índice reverso
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 13:31:47
+
+A tabela class_students original não tinha PK nem índices. Ela é recriada
+com PK (class_id, student_id), descartando linhas nulas e duplicadas.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _rebuild(primary_key: bool, where: str) -> None:
+    op.create_table('class_students_new',
+        sa.Column('class_id', sa.Integer(), nullable=not primary_key),
+        sa.Column('student_id', sa.Integer(), nullable=not primary_key),
+        sa.ForeignKeyConstraint(['class_id'], ['classes.id']),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id']),
+        *([sa.PrimaryKeyConstraint('class_id', 'student_id', name='pk_class_students')] if primary_key else [])
+    )
+    op.execute(
+        "INSERT INTO class_students_new (class_id, student_id) "
+        f"SELECT DISTINCT class_id, student_id FROM class_students {where}"
+    )
+    op.drop_table('class_students')
+    op.rename_table('class_students_new', 'class_students')
+
+
+def upgrade() -> None:
+    _rebuild(True, "WHERE class_id IS NOT NULL AND student_id IS NOT NULL")
+    op.create_index('ix_class_students_student_class', 'class_students', ['student_id', 'class_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_class_students_student_class', table_name='class_students')
+    _rebuild(False, "")
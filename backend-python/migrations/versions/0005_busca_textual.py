@@ -0,0 +1,71 @@
+"""busca textual em materiais e mensagens
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 13:44:09
+
+SQLite: tabelas FTS5 de conteúdo externo, sincronizadas por triggers.
+PostgreSQL: coluna gerada search_vector (tsvector) com índice GIN.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tabela -> (coluna de título, coluna de texto)
+SEARCHABLE = {
+    'materials': ('title', 'description'),
+    'messages': ('title', 'content'),
+}
+TS_CONFIG = 'portuguese'
+
+
+def _sqlite_upgrade(table: str, title: str, body: str) -> None:
+    fts = f'{table}_fts'
+    # remove_diacritics: "algebra" encontra "Álgebra"; prefix acelera a busca por prefixo
+    op.execute(
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({title}, {body}, content='{table}', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    insert = f"INSERT INTO {fts}(rowid, {title}, {body}) VALUES (new.id, new.{title}, new.{body});"
+    delete = f"INSERT INTO {fts}({fts}, rowid, {title}, {body}) VALUES ('delete', old.id, old.{title}, old.{body});"
+    op.execute(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END")
+    op.execute(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END")
+    op.execute(f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {title}, {body} ON {table} BEGIN {delete} {insert} END")
+    op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _postgres_upgrade(table: str, title: str, body: str) -> None:
+    op.execute(
+        f"ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('{TS_CONFIG}', coalesce({title}, '')), 'A') || "
+        f"setweight(to_tsvector('{TS_CONFIG}', coalesce({body}, '')), 'B')) STORED"
+    )
+    op.create_index(f'ix_{table}_search', table, ['search_vector'], postgresql_using='gin')
+
+
+def upgrade() -> None:
+    postgres = op.get_context().dialect.name == 'postgresql'
+    for table, (title, body) in SEARCHABLE.items():
+        if postgres:
+            _postgres_upgrade(table, title, body)
+        else:
+            _sqlite_upgrade(table, title, body)
+
+
+def downgrade() -> None:
+    postgres = op.get_context().dialect.name == 'postgresql'
+    for table in SEARCHABLE:
+        if postgres:
+            op.drop_index(f'ix_{table}_search', table_name=table)
+            op.execute(f"ALTER TABLE {table} DROP COLUMN search_vector")
+        else:
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_fts")
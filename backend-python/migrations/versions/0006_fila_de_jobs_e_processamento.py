@@ -0,0 +1,113 @@
+"""fila de jobs e processamento de materiais
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 13:58:30
+
+Cria a tabela jobs, as colunas de processamento em materials e inclui o
+texto extraído na busca. Materiais existentes com arquivo entram na fila.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TS_CONFIG = 'portuguese'
+
+
+def _sqlite_fts(columns: Sequence[str]) -> None:
+    # Tabelas FTS5 têm colunas fixas: recria o índice de materiais com as novas colunas
+    for suffix in ('ai', 'ad', 'au'):
+        op.execute(f"DROP TRIGGER IF EXISTS materials_fts_{suffix}")
+    op.execute("DROP TABLE IF EXISTS materials_fts")
+
+    cols = ', '.join(columns)
+    new = ', '.join(f'new.{c}' for c in columns)
+    old = ', '.join(f'old.{c}' for c in columns)
+    op.execute(
+        f"CREATE VIRTUAL TABLE materials_fts USING fts5({cols}, content='materials', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    insert = f"INSERT INTO materials_fts(rowid, {cols}) VALUES (new.id, {new});"
+    delete = f"INSERT INTO materials_fts(materials_fts, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    op.execute(f"CREATE TRIGGER materials_fts_ai AFTER INSERT ON materials BEGIN {insert} END")
+    op.execute(f"CREATE TRIGGER materials_fts_ad AFTER DELETE ON materials BEGIN {delete} END")
+    op.execute(f"CREATE TRIGGER materials_fts_au AFTER UPDATE OF {cols} ON materials BEGIN {delete} {insert} END")
+    op.execute("INSERT INTO materials_fts(materials_fts) VALUES ('rebuild')")
+
+
+def _postgres_search_vector(with_text: bool) -> None:
+    op.drop_index('ix_materials_search', table_name='materials')
+    op.execute("ALTER TABLE materials DROP COLUMN search_vector")
+    extra = f" || setweight(to_tsvector('{TS_CONFIG}', coalesce(extracted_text, '')), 'C')" if with_text else ""
+    op.execute(
+        "ALTER TABLE materials ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('{TS_CONFIG}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{TS_CONFIG}', coalesce(description, '')), 'B'){extra}) STORED"
+    )
+    op.create_index('ix_materials_search', 'materials', ['search_vector'], postgresql_using='gin')
+
+
+def upgrade() -> None:
+    op.create_table('jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_by', sa.String(length=64), nullable=True),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_status_run_at', 'jobs', ['status', 'run_at'], unique=False)
+
+    # ADD COLUMN simples (sem recriar a tabela), preservando os triggers de busca
+    op.add_column('materials', sa.Column('processing_status', sa.String(length=20), nullable=False, server_default='ready'))
+    op.add_column('materials', sa.Column('processing_error', sa.Text(), nullable=True))
+    op.add_column('materials', sa.Column('page_count', sa.Integer(), nullable=True))
+    op.add_column('materials', sa.Column('extracted_text', sa.Text(), nullable=True))
+
+    if op.get_context().dialect.name == 'postgresql':
+        _postgres_search_vector(with_text=True)
+    else:
+        _sqlite_fts(('title', 'description', 'extracted_text'))
+
+    # Materiais já enviados também passam pelo processamento
+    op.execute("UPDATE materials SET processing_status = 'pending' WHERE file_url IS NOT NULL")
+    op.execute(
+        "INSERT INTO jobs (kind, payload, status, attempts, max_attempts, run_at, created_at) "
+        "SELECT 'material.process', '{\"material_id\": ' || id || '}', 'queued', 0, 5, "
+        "CURRENT_TIMESTAMP, CURRENT_TIMESTAMP FROM materials WHERE file_url IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    postgres = op.get_context().dialect.name == 'postgresql'
+    if postgres:
+        # A coluna gerada depende de extracted_text: recria antes de removê-la
+        _postgres_search_vector(with_text=False)
+
+    with op.batch_alter_table('materials', schema=None) as batch_op:
+        batch_op.drop_column('extracted_text')
+        batch_op.drop_column('page_count')
+        batch_op.drop_column('processing_error')
+        batch_op.drop_column('processing_status')
+
+    if not postgres:
+        # No SQLite o batch recria a tabela e descarta os triggers; o índice volta depois
+        _sqlite_fts(('title', 'description'))
+
+    op.drop_index('ix_jobs_status_run_at', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,48 @@
+"""confirmação de leitura e contador de mensagens não lidas
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 14:40:12
+
+Mensagens existentes ficam como não lidas (não há como saber se foram
+lidas) e o contador de cada aluno é preenchido a partir delas.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UNREAD = sa.text('read_at IS NULL')
+
+
+def upgrade() -> None:
+    # ADD COLUMN simples (sem recriar a tabela), preservando os triggers de busca
+    op.add_column('messages', sa.Column('read_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_messages_student_unread', 'messages', ['student_id', 'id'], unique=False,
+                    sqlite_where=UNREAD, postgresql_where=UNREAD)
+
+    op.create_table('unread_counters',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('unread', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('student_id')
+    )
+    op.execute(
+        "INSERT INTO unread_counters (student_id, unread) "
+        "SELECT student_id, COUNT(*) FROM messages GROUP BY student_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('unread_counters')
+    op.drop_index('ix_messages_student_unread', table_name='messages')
+    # Fora do batch: no SQLite (3.35+) é um DROP COLUMN direto, sem recriar a tabela
+    # e sem perder os triggers de busca
+    op.drop_column('messages', 'read_at')
@@ -0,0 +1,41 @@
+"""recalcula os resumos de notas a partir da tabela grades
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 15:02:44
+
+A 0002 criou grade_summaries e grade_buckets vazias; notas lançadas antes
+dela ficavam de fora dos resumos assim que a turma recebia uma nota nova.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BUCKET_SCALE = 10  # o mesmo de utils/grade_stats.py
+
+
+def upgrade() -> None:
+    op.execute("DELETE FROM grade_buckets")
+    op.execute("DELETE FROM grade_summaries")
+    op.execute(
+        "INSERT INTO grade_summaries (class_id, assignment, count, total, total_sq, min_grade, max_grade) "
+        "SELECT class_id, assignment, COUNT(id), SUM(grade), SUM(grade * grade), MIN(grade), MAX(grade) "
+        "FROM grades GROUP BY class_id, assignment"
+    )
+    op.execute(
+        "INSERT INTO grade_buckets (class_id, assignment, bucket, count) "
+        f"SELECT class_id, assignment, CAST(ROUND(grade * {BUCKET_SCALE}) AS INTEGER), COUNT(id) "
+        f"FROM grades GROUP BY class_id, assignment, CAST(ROUND(grade * {BUCKET_SCALE}) AS INTEGER)"
+    )
+
+
+def downgrade() -> None:
+    # Só dados: os resumos recalculados continuam válidos na revisão anterior
+    pass
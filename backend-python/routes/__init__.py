@@ -1,3 +1,3 @@
-from . import auth, student, teacher
+from . import auth, student, teacher, files
 
-__all__ = ['auth', 'student', 'teacher']
+__all__ = ['auth', 'student', 'teacher', 'files']
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.connection import get_db
+from database.models import Class
+from schemas.user import UserResponse
+from middleware.auth import get_current_admin
+from utils.export import export_response
+from utils.grade_stats import rebuild_class_stats
+from utils.response_cache import bump_versions
+
+router = APIRouter()
+
+@router.get("/export")
+async def export_all(
+    kind: Literal["grades", "roster"] = "grades",
+    format: Literal["csv", "ndjson"] = "csv",
+    gzip: bool = False,
+    class_id: Optional[int] = None,
+    teacher_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: UserResponse = Depends(get_current_admin)
+):
+    """Export de todas as turmas para a secretaria, em streaming com memória constante."""
+    return export_response(
+        kind, format, gzip, f"lumina-{kind}",
+        class_id=class_id, teacher_id=teacher_id, since=since, until=until
+    )
+
+@router.post("/classes/{class_id}/stats/rebuild", status_code=status.HTTP_204_NO_CONTENT)
+async def rebuild_stats(
+    class_id: int,
+    current_user: UserResponse = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Manutenção: recalcula os resumos de notas da turma (ex.: notas gravadas direto no banco)."""
+    if await db.scalar(select(Class.id).where(Class.id == class_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Turma não encontrada"
+        )
+    await rebuild_class_stats(db, class_id)
+    await bump_versions(db, [f"class:{class_id}"])
+    await db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
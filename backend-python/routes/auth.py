@@ -1,16 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
 from database.connection import get_db
 from database.models import User
-from schemas.user import UserRegister, UserLogin, Token, UserResponse
-from utils.security import hash_password, verify_password, create_access_token
+from middleware.auth import security
+from schemas.user import UserRegister, UserLogin, Token, UserResponse, RefreshRequest, LogoutRequest
+from utils.revocation import claim_token, revoke_tokens
+from utils.user_versions import current_version
+from utils.security import (
+    hash_password_async, verify_and_update_password,
+    create_access_token, create_refresh_token, decode_token
+)
 
 router = APIRouter()
 
+async def _token_response(db: AsyncSession, user: User) -> dict:
+    # O access token carrega o perfil para as rotas autorizarem sem consultar o banco;
+    # "ver" faz o token cair quando o perfil muda ou o usuário é removido
+    access_token = create_access_token(data={
+        "sub": str(user.id),
+        "name": user.name,
+        "email": user.email,
+        "role": user.user_type,
+        "created_at": user.created_at.isoformat(),
+        "ver": await current_version(db, user.id),
+    })
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": create_refresh_token(data={"sub": str(user.id)}),
+        "user": UserResponse.model_validate(user)
+    }
+
+def _invalid_refresh() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Refresh token inválido ou expirado"
+    )
+
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
     # Verificar se email já existe
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -21,39 +56,84 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     new_user = User(
         name=user_data.name,
         email=user_data.email,
-        password=hash_password(user_data.password),
+        password=await hash_password_async(user_data.password),
         user_type=user_data.user_type
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
-    # Gerar token
-    access_token = create_access_token(data={"sub": new_user.id})
-    
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": UserResponse.model_validate(new_user)
-    }
+    return await _token_response(db, new_user)
 
 @router.post("/login", response_model=Token)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     # Buscar usuário
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = await db.scalar(select(User).where(User.email == credentials.email))
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Email ou senha incorretos"
+        )
     
-    if not user or not verify_password(credentials.password, user.password):
+    # bcrypt roda no pool dedicado, fora do event loop
+    valid, new_hash = await verify_and_update_password(credentials.password, user.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos"
         )
     
-    # Gerar token
-    access_token = create_access_token(data={"sub": user.id})
+    # Rehash transparente quando o custo do bcrypt mudou
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
     
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": UserResponse.model_validate(user)
-    }
+    return await _token_response(db, user)
+
+@router.post("/refresh", response_model=Token)
+async def refresh(body: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    try:
+        payload = decode_token(body.refresh_token, token_type="refresh")
+        user_id = int(payload["sub"])
+    except (JWTError, KeyError, TypeError, ValueError):
+        raise _invalid_refresh()
+    
+    user = await db.get(User, user_id)
+    if user is None:
+        raise _invalid_refresh()
+    
+    # Rotação: revogar o token usado é o que autoriza a renovação. Vale pelo banco,
+    # mesmo para revogações ainda não propagadas, e entre dois /refresh simultâneos
+    # com o mesmo token só um grava o jti e recebe tokens novos
+    if not await claim_token(db, payload["jti"], payload["exp"]):
+        raise _invalid_refresh()
+    return await _token_response(db, user)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    body: LogoutRequest = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        access = decode_token(credentials.credentials)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido ou expirado"
+        )
+    
+    tokens = [(access.get("jti"), access["exp"])]
+    if body is not None and body.refresh_token:
+        try:
+            refresh_payload = decode_token(body.refresh_token, token_type="refresh")
+        except JWTError:
+            refresh_payload = None
+        # Só revoga refresh tokens do mesmo usuário
+        if refresh_payload and refresh_payload.get("sub") == access.get("sub"):
+            tokens.append((refresh_payload["jti"], refresh_payload["exp"]))
+    
+    await revoke_tokens(db, tokens)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
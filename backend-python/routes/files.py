@@ -0,0 +1,109 @@
+import mimetypes
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.connection import current_user_id, get_read_db
+from database.models import Class, Material, Enrollment
+from schemas.material import MediaLinkResponse
+from schemas.user import UserResponse
+from middleware.auth import authenticate_token, get_current_user
+from utils.file_response import RangeFileResponse
+from utils.security import create_media_token, decode_token
+from config import settings
+
+router = APIRouter()
+
+# Sem Authorization o download ainda pode vir com ?token= (link assinado)
+optional_security = HTTPBearer(auto_error=False)
+
+def _not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Arquivo não encontrado"
+    )
+
+def _check_filename(filename: str) -> None:
+    if os.path.basename(filename) != filename or filename.startswith("."):
+        raise _not_found()
+
+async def _visible_material(db: AsyncSession, filename: str, user_id: int, user_type: str):
+    # O arquivo só é servido se algum material que o referencia for visível ao usuário
+    stmt = select(Material.content_hash, Material.file_type).where(
+        Material.file_url == f"/uploads/{filename}"
+    )
+    if user_type == "teacher":
+        stmt = stmt.join(Class, Class.id == Material.class_id).where(
+            Class.teacher_id == user_id
+        )
+    else:
+        stmt = stmt.join(
+            Enrollment, Enrollment.class_id == Material.class_id
+        ).where(Enrollment.student_id == user_id)
+
+    row = (await db.execute(stmt.limit(1))).first()
+    if row is None or not os.path.isfile(os.path.join(settings.UPLOAD_DIR, filename)):
+        raise _not_found()
+    return row
+
+@router.get("/{filename}/link", response_model=MediaLinkResponse)
+async def media_link(
+    filename: str,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Link assinado e temporário para players que não enviam o header Authorization."""
+    _check_filename(filename)
+    await _visible_material(db, filename, current_user.id, current_user.user_type)
+    token = create_media_token(current_user.id, current_user.user_type, filename)
+    return MediaLinkResponse(url=f"/uploads/{filename}?token={token}",
+                             expires_in=settings.MEDIA_URL_EXPIRE_MINUTES * 60)
+
+@router.api_route("/{filename}", methods=["GET", "HEAD"])
+async def download_file(
+    filename: str,
+    request: Request,
+    token: Optional[str] = Query(None, description="token de /uploads/{filename}/link"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: AsyncSession = Depends(get_read_db)
+):
+    _check_filename(filename)
+
+    if credentials is not None:
+        current_user = await authenticate_token(credentials.credentials, db)
+        user_id, user_type = current_user.id, current_user.user_type
+    elif token:
+        try:
+            payload = decode_token(token, "media")
+            user_id, user_type = int(payload["sub"]), payload["role"]
+        except (JWTError, KeyError, TypeError, ValueError):
+            payload = {}
+        # O token vale só para o arquivo em que foi emitido
+        if payload.get("file") != filename:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Link inválido ou expirado"
+            )
+        current_user_id.set(user_id)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Não autenticado"
+        )
+
+    # Refeita a cada pedido: um link ainda válido para de funcionar se a matrícula sair
+    row = await _visible_material(db, filename, user_id, user_type)
+    path = os.path.join(settings.UPLOAD_DIR, filename)
+
+    # Arquivos novos são nomeados pelo SHA-256: o próprio hash é um ETag forte
+    if row.content_hash:
+        etag = f'"{row.content_hash}"'
+    else:
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    media_type = row.file_type or mimetypes.guess_type(filename)[0]
+    return RangeFileResponse(path, request.headers, etag, media_type)
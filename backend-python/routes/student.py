@@ -1,38 +1,298 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
-from database.connection import get_db
-from database.models import User, Material, Message
+import asyncio
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional, Union
+from datetime import datetime
+from database.connection import get_db, get_read_db, AsyncSessionLocal
+from database.models import Class, Material, Message, Enrollment
 from schemas.class_schema import ClassResponse
 from schemas.material import MaterialResponse
-from schemas.message import MessageResponse
-from middleware.auth import get_current_student
+from schemas.message import MessageResponse, MarkReadRequest, MarkReadResult, UnreadCount
+from schemas.dashboard import StudentDashboard
+from schemas.grade import ReportCard
+from schemas.search import MaterialHit, MessageHit
+from schemas.user import UserResponse
+from middleware.auth import get_current_student, authenticate_token
+from utils.pagination import keyset_page, paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from utils.grade_stats import report_card
+from utils.pubsub import pubsub
+from utils.response_cache import bump_versions, cached_json, etag_matches, student_scope
+from utils.search import search
+from utils.serialization import columns_for, dump_rows, dumps
+from utils.unread import mark_read, unread_count
 
 router = APIRouter()
 
+KEEPALIVE_SECONDS = 15
+MAX_REPLAY = 200
+
+def _enrolled_classes(student_id: int, *columns):
+    # Turmas do aluno via join explícito (sem lazy load de classes_enrolled)
+    return select(*(columns or (Class,))).join(
+        Enrollment, Enrollment.class_id == Class.id
+    ).where(Enrollment.student_id == student_id)
+
+def _student_materials(student_id: int):
+    return select(*columns_for(MaterialResponse, Material)).join(
+        Enrollment, Enrollment.class_id == Material.class_id
+    ).where(Enrollment.student_id == student_id)
+
+def _student_messages(student_id: int):
+    return select(*columns_for(MessageResponse, Message)).where(Message.student_id == student_id)
+
 @router.get("/subjects", response_model=List[ClassResponse])
-def get_student_subjects(
-    current_user: User = Depends(get_current_student),
-    db: Session = Depends(get_db)
+async def get_student_subjects(
+    request: Request,
+    response: Response,
+    current_user: UserResponse = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    classes = current_user.classes_enrolled
-    return [ClassResponse.model_validate(c) for c in classes]
+    async def build():
+        rows = (await db.execute(
+            _enrolled_classes(current_user.id, *columns_for(ClassResponse, Class))
+        )).all()
+        return dump_rows(ClassResponse, rows)
+
+    return await cached_json(request, response, db, current_user.id, student_scope(current_user.id), build)
 
 @router.get("/materials", response_model=List[MaterialResponse])
-def get_student_materials(
-    current_user: User = Depends(get_current_student),
-    db: Session = Depends(get_db)
+async def get_student_materials(
+    request: Request,
+    response: Response,
+    class_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: UserResponse = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    materials = []
-    for class_obj in current_user.classes_enrolled:
-        materials.extend(class_obj.materials)
-    
-    return [MaterialResponse.model_validate(m) for m in materials]
+    # Uma única consulta, independente do número de turmas
+    stmt = _student_materials(current_user.id)
+
+    if class_id is not None:
+        stmt = stmt.where(Material.class_id == class_id)
+    if since is not None:
+        stmt = stmt.where(Material.created_at >= since)
+
+    async def build():
+        rows = await paginate(db, stmt, Material, cursor, limit, response)
+        return dump_rows(MaterialResponse, rows)
+
+    return await cached_json(request, response, db, current_user.id, student_scope(current_user.id), build)
 
 @router.get("/messages", response_model=List[MessageResponse])
-def get_student_messages(
-    current_user: User = Depends(get_current_student),
-    db: Session = Depends(get_db)
+async def get_student_messages(
+    request: Request,
+    response: Response,
+    class_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    unread_only: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: UserResponse = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
+):
+    stmt = _student_messages(current_user.id)
+
+    if class_id is not None:
+        stmt = stmt.where(Message.class_id == class_id)
+    if since is not None:
+        stmt = stmt.where(Message.created_at >= since)
+    if unread_only:
+        stmt = stmt.where(Message.read_at.is_(None))
+
+    async def build():
+        rows = await paginate(db, stmt, Message, cursor, limit, response)
+        return dump_rows(MessageResponse, rows)
+
+    return await cached_json(request, response, db, current_user.id, student_scope(current_user.id), build)
+
+@router.get("/messages/unread-count", response_model=UnreadCount)
+async def get_unread_count(
+    request: Request,
+    current_user: UserResponse = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Contador para o badge de notificações: uma leitura por chave primária.
+
+    O ETag é o próprio valor, então o polling com If-None-Match costuma
+    terminar em 304 sem corpo.
+    """
+    count = await unread_count(db, current_user.id)
+    headers = {"ETag": f'"unread-{current_user.id}-{count}"', "Cache-Control": "private, no-cache"}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(dumps({"unread": count}), media_type="application/json", headers=headers)
+
+@router.post("/messages/read", response_model=MarkReadResult)
+async def mark_messages_read(
+    data: MarkReadRequest,
+    current_user: UserResponse = Depends(get_current_student),
+    db: AsyncSession = Depends(get_db)
+):
+    """Confirma a leitura de um lote de mensagens (ou de todas, com `all`)."""
+    if not data.all and not data.message_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe message_ids ou all=true"
+        )
+
+    marked, unread = await mark_read(db, current_user.id, None if data.all else data.message_ids)
+    if marked:
+        await bump_versions(db, [f"student:{current_user.id}"])
+        await db.commit()
+        # Outras abas/dispositivos do aluno atualizam o badge pelo stream
+        await pubsub.publish(f"student:{current_user.id}", "read", dumps({"marked": marked, "unread": unread}).decode())
+    return {"marked": marked, "unread": unread}
+
+@router.get("/search", response_model=Union[List[MaterialHit], List[MessageHit]])
+async def search_student_content(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Literal["materials", "messages"] = "materials",
+    class_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: UserResponse = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    messages = current_user.messages_received
-    return [MessageResponse.model_validate(m) for m in messages]
+    """Busca textual nos materiais das turmas do aluno ou nas mensagens recebidas."""
+    if kind == "materials":
+        scope = Material.class_id.in_(
+            select(Enrollment.class_id).where(Enrollment.student_id == current_user.id)
+        )
+        if class_id is not None:
+            scope = scope & (Material.class_id == class_id)
+    else:
+        scope = Message.student_id == current_user.id
+        if class_id is not None:
+            scope = scope & (Message.class_id == class_id)
+
+    return await search(db, response, kind, q, scope, cursor, limit)
+
+def _sse(event: str, data: str, event_id: Optional[int] = None) -> str:
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {data}\n\n"
+
+async def _event_stream(request: Request, queue: asyncio.Queue, missed: List[str], last_id: int):
+    try:
+        for chunk in missed:
+            yield chunk
+        while not await request.is_disconnected():
+            try:
+                item = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if item is None:
+                break
+            # Já enviada pelo replay (assinatura feita antes da consulta)
+            if item.id is not None and item.id <= last_id:
+                continue
+            yield _sse(item.event, item.data, item.id)
+    finally:
+        pubsub.unsubscribe(queue)
+
+@router.get("/messages/stream")
+async def stream_student_messages(
+    request: Request,
+    token: Optional[str] = None,
+    authorization: Optional[str] = Header(None),
+    last_event_id: Optional[int] = Header(None)
+):
+    """Server-Sent Events com as novas mensagens do aluno.
+
+    EventSource não envia headers, então o JWT também é aceito em `?token=`.
+    Ao reconectar, o navegador manda Last-Event-ID e as mensagens perdidas
+    são reenviadas a partir do banco.
+    """
+    if token is None and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido ou expirado"
+        )
+
+    # Sessão curta: a conexão não fica presa durante o stream
+    async with AsyncSessionLocal() as db:
+        user = await authenticate_token(token, db)
+        if user.user_type != "student":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Acesso negado. Apenas alunos podem acessar"
+            )
+        # Mensagens diretas e avisos da turma chegam no canal do aluno.
+        # Assina antes do replay para não perder mensagens entre as duas etapas
+        queue = pubsub.subscribe([f"student:{user.id}"])
+        try:
+            missed = []
+            if last_event_id is not None:
+                rows = (await db.scalars(select(Message).where(
+                    Message.student_id == user.id,
+                    Message.id > last_event_id
+                ).order_by(Message.id).limit(MAX_REPLAY))).all()
+                missed = [_sse("message", MessageResponse.model_validate(m).model_dump_json(), m.id) for m in rows]
+                if rows:
+                    last_event_id = rows[-1].id
+        except BaseException:
+            pubsub.unsubscribe(queue)
+            raise
+
+    return StreamingResponse(
+        _event_stream(request, queue, missed, last_event_id or 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/report-card", response_model=ReportCard)
+async def get_student_report_card(
+    request: Request,
+    response: Response,
+    current_user: UserResponse = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
+):
+    async def build():
+        return await report_card(db, current_user.id)
+
+    return await cached_json(request, response, db, current_user.id, student_scope(current_user.id), build)
+
+@router.get("/dashboard", response_model=StudentDashboard)
+async def get_student_dashboard(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    subjects_cursor: Optional[str] = None,
+    materials_cursor: Optional[str] = None,
+    messages_cursor: Optional[str] = None,
+    current_user: UserResponse = Depends(get_current_student),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Turmas, materiais e mensagens do aluno: 3 consultas, independente do volume.
+
+    Cada lista traz no máximo `limit` itens, só com as colunas da resposta,
+    e o cursor da própria próxima página.
+    """
+    async def build():
+        subjects, next_subjects = await keyset_page(
+            db, _enrolled_classes(current_user.id, *columns_for(ClassResponse, Class)), Class, subjects_cursor, limit
+        )
+        materials, next_materials = await keyset_page(
+            db, _student_materials(current_user.id), Material, materials_cursor, limit
+        )
+        messages, next_messages = await keyset_page(
+            db, _student_messages(current_user.id), Message, messages_cursor, limit
+        )
+        dashboard = StudentDashboard.model_validate({
+            "subjects": subjects,
+            "materials": materials,
+            "messages": messages,
+            "subjects_cursor": next_subjects,
+            "materials_cursor": next_materials,
+            "messages_cursor": next_messages,
+        }, from_attributes=True)
+        return dashboard.model_dump_json().encode()
+
+    return await cached_json(request, response, db, current_user.id, student_scope(current_user.id), build)
@@ -1,38 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from typing import List
-import shutil
-import os
+import json
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from pydantic import ValidationError
+from sqlalchemy import select, insert, literal
+from sqlalchemy.types import DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional, Union
 from datetime import datetime
-from database.connection import get_db
-from database.models import User, Class, Material, Grade, Message
-from schemas.class_schema import ClassResponse, StudentInClass
+from database.connection import get_db, get_read_db
+from database.models import User, Class, Material, Grade, Message, Enrollment
+from schemas.class_schema import ClassCreate, ClassResponse, StudentInClass, EnrollmentRequest, EnrollmentResult
 from schemas.material import MaterialCreate, MaterialResponse
-from schemas.grade import GradeCreate, GradeResponse
-from schemas.message import MessageCreate, MessageResponse
+from schemas.grade import GradeCreate, GradeResponse, BulkGradeResult, ClassStats, ReportCard
+from schemas.message import MessageCreate, MessageResponse, MessageBroadcastResponse
+from schemas.search import MaterialHit, MessageHit
+from schemas.user import UserResponse
 from middleware.auth import get_current_teacher
+from utils.pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from utils.storage import save_upload
+from utils.jobs import enqueue, job_worker
+from utils.material_processing import PROCESS_MATERIAL
+from utils.bulk_import import EXTRA_COLUMNS, read_bulk_rows
+from utils.grade_stats import record_grades, class_stats, report_card
+from utils.enrollment import is_enrolled, enrolled_pairs, enroll_students, unenroll_students
+from utils.pubsub import pubsub
+from utils.unread import count_new_message, count_broadcast
+from utils.response_cache import cached_json, bump_versions, keys_scope, teacher_scope
+from utils.search import search
+from utils.export import export_response
+from utils.serialization import columns_for, dump_rows
 from config import settings
 
 router = APIRouter()
 
+BULK_MAX_ROWS = 10000
+
 @router.get("/classes", response_model=List[ClassResponse])
-def get_teacher_classes(
-    current_user: User = Depends(get_current_teacher),
-    db: Session = Depends(get_db)
+async def get_teacher_classes(
+    request: Request,
+    response: Response,
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    classes = current_user.classes_teaching
-    return [ClassResponse.model_validate(c) for c in classes]
+    stmt = select(*columns_for(ClassResponse, Class)).where(Class.teacher_id == current_user.id)
+
+    if since is not None:
+        stmt = stmt.where(Class.created_at >= since)
+
+    async def build():
+        rows = await paginate(db, stmt, Class, cursor, limit, response)
+        return dump_rows(ClassResponse, rows)
+
+    return await cached_json(request, response, db, current_user.id, teacher_scope(current_user.id), build)
+
+@router.post("/classes", response_model=ClassResponse, status_code=status.HTTP_201_CREATED)
+async def create_class(
+    class_data: ClassCreate,
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_db)
+):
+    # A versão teacher:{id} é incrementada pelo evento de Class (utils/response_cache.py)
+    class_obj = Class(name=class_data.name, description=class_data.description, teacher_id=current_user.id)
+    db.add(class_obj)
+    await db.commit()
+    await db.refresh(class_obj)
+    return ClassResponse.model_validate(class_obj)
 
 @router.get("/students", response_model=List[StudentInClass])
-def get_class_students(
+async def get_class_students(
     class_id: int,
-    current_user: User = Depends(get_current_teacher),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    class_obj = db.query(Class).filter(
+    class_obj = await db.scalar(select(Class).where(
         Class.id == class_id,
         Class.teacher_id == current_user.id
-    ).first()
+    ))
     
     if not class_obj:
         raise HTTPException(
@@ -40,22 +90,161 @@ def get_class_students(
             detail="Turma não encontrada"
         )
     
-    return [StudentInClass.model_validate(s) for s in class_obj.students]
+    # created_at entra na seleção por causa do cursor de paginação
+    stmt = select(*columns_for(StudentInClass, User), User.created_at).join(
+        Enrollment, Enrollment.student_id == User.id
+    ).where(Enrollment.class_id == class_id)
+
+    if since is not None:
+        stmt = stmt.where(User.created_at >= since)
+
+    async def build():
+        rows = await paginate(db, stmt, User, cursor, limit, response)
+        return dump_rows(StudentInClass, rows)
+
+    scope = keys_scope(f"class:{class_id}")
+    return await cached_json(request, response, db, current_user.id, scope, build)
 
-@router.post("/materials", response_model=MaterialResponse, status_code=status.HTTP_201_CREATED)
+@router.get("/classes/{class_id}/stats", response_model=ClassStats)
+async def get_class_stats(
+    class_id: int,
+    request: Request,
+    response: Response,
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_read_db)
+):
+    class_obj = await db.scalar(select(Class.id).where(
+        Class.id == class_id,
+        Class.teacher_id == current_user.id
+    ))
+    
+    if not class_obj:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Turma não encontrada"
+        )
+    
+    async def build():
+        return await class_stats(db, class_id)
+
+    scope = keys_scope(f"class:{class_id}")
+    return await cached_json(request, response, db, current_user.id, scope, build)
+
+@router.get("/classes/{class_id}/students/{student_id}/report-card", response_model=ReportCard)
+async def get_student_report_card(
+    class_id: int,
+    student_id: int,
+    request: Request,
+    response: Response,
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if not await is_enrolled(db, class_id, student_id, teacher_id=current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Aluno não encontrado nesta turma"
+        )
+    
+    async def build():
+        return await report_card(db, student_id, class_id)
+
+    scope = keys_scope(f"class:{class_id}", f"student:{student_id}")
+    return await cached_json(request, response, db, current_user.id, scope, build)
+
+@router.get("/search", response_model=Union[List[MaterialHit], List[MessageHit]])
+async def search_teacher_content(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Literal["materials", "messages"] = "materials",
+    class_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Busca textual nos materiais e mensagens das turmas do professor."""
+    model = Material if kind == "materials" else Message
+    scope = model.class_id.in_(select(Class.id).where(Class.teacher_id == current_user.id))
+    if class_id is not None:
+        scope = scope & (model.class_id == class_id)
+
+    return await search(db, response, kind, q, scope, cursor, limit)
+
+async def _owned_class(db: AsyncSession, class_id: int, teacher_id: int) -> None:
+    if await db.scalar(select(Class.id).where(Class.id == class_id, Class.teacher_id == teacher_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Turma não encontrada"
+        )
+
+@router.get("/classes/{class_id}/export")
+async def export_class(
+    class_id: int,
+    kind: Literal["grades", "roster"] = "grades",
+    format: Literal["csv", "ndjson"] = "csv",
+    gzip: bool = False,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Notas ou lista de alunos da turma em CSV/NDJSON, enviadas em streaming."""
+    await _owned_class(db, class_id, current_user.id)
+    return export_response(
+        kind, format, gzip, f"turma-{class_id}-{kind}",
+        class_id=class_id, since=since, until=until
+    )
+
+@router.post("/classes/{class_id}/enroll", response_model=EnrollmentResult)
+async def enroll_class_students(
+    class_id: int,
+    body: EnrollmentRequest,
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_db)
+):
+    """Matricula um lote de alunos; quem já está na turma é ignorado."""
+    await _owned_class(db, class_id, current_user.id)
+    changed = await enroll_students(db, class_id, body.student_ids)
+    if changed:
+        await bump_versions(db, [f"class:{class_id}"])
+    await db.commit()
+    return {"class_id": class_id, "requested": len(set(body.student_ids)), "changed": changed}
+
+@router.post("/classes/{class_id}/unenroll", response_model=EnrollmentResult)
+async def unenroll_class_students(
+    class_id: int,
+    body: EnrollmentRequest,
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_db)
+):
+    """Remove um lote de alunos da turma; ids não matriculados são ignorados."""
+    await _owned_class(db, class_id, current_user.id)
+    changed = await unenroll_students(db, class_id, body.student_ids)
+    if changed:
+        await bump_versions(db, [f"class:{class_id}"])
+    await db.commit()
+    return {"class_id": class_id, "requested": len(set(body.student_ids)), "changed": changed}
+
+# O corpo é lido por save_upload direto do stream; o esquema só documenta o campo
+_UPLOAD_BODY = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}}
+}}}}}
+
+@router.post("/materials", response_model=MaterialResponse, status_code=status.HTTP_201_CREATED,
+             openapi_extra=_UPLOAD_BODY)
 async def upload_material(
+    request: Request,
     title: str,
     description: str = "",
     class_id: int = 0,
-    file: UploadFile = File(...),
-    current_user: User = Depends(get_current_teacher),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_db)
 ):
     # Verificar se a turma pertence ao professor
-    class_obj = db.query(Class).filter(
+    class_obj = await db.scalar(select(Class).where(
         Class.id == class_id,
         Class.teacher_id == current_user.id
-    ).first()
+    ))
     
     if not class_obj:
         raise HTTPException(
@@ -63,41 +252,43 @@ async def upload_material(
             detail="Turma não encontrada"
         )
     
-    # Salvar arquivo
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_extension = os.path.splitext(file.filename)[1]
-    filename = f"{timestamp}_{file.filename}"
-    file_path = os.path.join(settings.UPLOAD_DIR, filename)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Salvar arquivo (streaming, com limite de tamanho e deduplicação por hash)
+    stored = await save_upload(request, settings.MAX_FILE_SIZE)
     
     # Criar registro no banco
     material = Material(
         title=title,
         description=description,
-        file_url=f"/uploads/{filename}",
-        file_type=file.content_type,
+        file_url=f"/uploads/{stored.filename}",
+        file_type=stored.content_type,
+        file_size=stored.size,
+        content_hash=stored.content_hash,
+        processing_status="pending",
         class_id=class_id
     )
     
     db.add(material)
-    db.commit()
-    db.refresh(material)
+    await db.flush()
+    # Tipo real, páginas e texto ficam para a fila; o upload responde sem esperar
+    await enqueue(db, PROCESS_MATERIAL, {"material_id": material.id})
+    await bump_versions(db, [f"class:{class_id}"])
+    await db.commit()
+    await db.refresh(material)
+    job_worker.notify()
     
     return MaterialResponse.model_validate(material)
 
 @router.post("/grades", response_model=GradeResponse, status_code=status.HTTP_201_CREATED)
-def create_grade(
+async def create_grade(
     grade_data: GradeCreate,
-    current_user: User = Depends(get_current_teacher),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_db)
 ):
     # Verificar se a turma pertence ao professor
-    class_obj = db.query(Class).filter(
+    class_obj = await db.scalar(select(Class).where(
         Class.id == grade_data.class_id,
         Class.teacher_id == current_user.id
-    ).first()
+    ))
     
     if not class_obj:
         raise HTTPException(
@@ -106,8 +297,7 @@ def create_grade(
         )
     
     # Verificar se o aluno está na turma
-    student = db.query(User).filter(User.id == grade_data.student_id).first()
-    if not student or class_obj not in student.classes_enrolled:
+    if not await is_enrolled(db, class_obj.id, grade_data.student_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Aluno não encontrado nesta turma"
@@ -123,22 +313,89 @@ def create_grade(
     )
     
     db.add(grade)
-    db.commit()
-    db.refresh(grade)
+    await record_grades(db, [(grade.class_id, grade.assignment, grade.grade)])
+    await bump_versions(db, [f"class:{grade.class_id}"])
+    await db.commit()
+    await db.refresh(grade)
     
     return GradeResponse.model_validate(grade)
 
-@router.post("/messages", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
-def send_message(
+@router.post("/grades/bulk", response_model=BulkGradeResult, status_code=status.HTTP_201_CREATED)
+async def create_grades_bulk(
+    request: Request,
+    class_id: Optional[int] = None,
+    all_or_nothing: bool = False,
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_db)
+):
+    raw_rows = await read_bulk_rows(request)
+    if len(raw_rows) > BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo de {BULK_MAX_ROWS} notas por importação"
+        )
+
+    errors = []
+    parsed = []
+    for index, raw in enumerate(raw_rows, start=1):
+        if raw.get(EXTRA_COLUMNS):
+            errors.append({"row": index, "detail": "Linha com mais colunas que o cabeçalho"})
+            continue
+        if class_id is not None and raw.get("class_id") is None:
+            raw = {**raw, "class_id": class_id}
+        try:
+            parsed.append((index, GradeCreate.model_validate(raw)))
+        except ValidationError as exc:
+            first = exc.errors()[0]
+            field = ".".join(str(p) for p in first["loc"])
+            errors.append({"row": index, "detail": f"{field}: {first['msg']}" if field else first["msg"]})
+
+    # Validação em conjunto: uma consulta de turmas e poucas de matrículas
+    class_ids = {g.class_id for _, g in parsed}
+    owned = set((await db.scalars(select(Class.id).where(
+        Class.id.in_(class_ids),
+        Class.teacher_id == current_user.id
+    ))).all()) if class_ids else set()
+
+    enrolled = await enrolled_pairs(db, owned, (g.student_id for _, g in parsed if g.class_id in owned))
+
+    now = datetime.utcnow()
+    values = []
+    for index, g in parsed:
+        if g.class_id not in owned:
+            errors.append({"row": index, "detail": "Turma não encontrada"})
+        elif (g.class_id, g.student_id) not in enrolled:
+            errors.append({"row": index, "detail": "Aluno não encontrado nesta turma"})
+        else:
+            values.append({**g.model_dump(), "created_at": now})
+
+    errors.sort(key=lambda e: e["row"])
+    if values and not (all_or_nothing and errors):
+        # executemany em uma única transação
+        await db.execute(insert(Grade), values)
+        await record_grades(db, [(v["class_id"], v["assignment"], v["grade"]) for v in values])
+        await bump_versions(db, [f"class:{v['class_id']}" for v in values])
+        await db.commit()
+    else:
+        values = []
+
+    return {"created": len(values), "errors": errors}
+
+@router.post(
+    "/messages",
+    response_model=Union[MessageResponse, MessageBroadcastResponse],
+    status_code=status.HTTP_201_CREATED
+)
+async def send_message(
     message_data: MessageCreate,
-    current_user: User = Depends(get_current_teacher),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_db)
 ):
     # Verificar se a turma pertence ao professor
-    class_obj = db.query(Class).filter(
+    class_obj = await db.scalar(select(Class).where(
         Class.id == message_data.class_id,
         Class.teacher_id == current_user.id
-    ).first()
+    ))
     
     if not class_obj:
         raise HTTPException(
@@ -146,9 +403,12 @@ def send_message(
             detail="Turma não encontrada"
         )
     
+    # Sem student_id: envia para a turma inteira
+    if message_data.student_id is None:
+        return await _broadcast_message(db, message_data)
+    
     # Verificar se o aluno está na turma
-    student = db.query(User).filter(User.id == message_data.student_id).first()
-    if not student or class_obj not in student.classes_enrolled:
+    if not await is_enrolled(db, class_obj.id, message_data.student_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Aluno não encontrado nesta turma"
@@ -163,7 +423,45 @@ def send_message(
     )
     
     db.add(message)
-    db.commit()
-    db.refresh(message)
+    await count_new_message(db, message.student_id)
+    await bump_versions(db, [f"student:{message.student_id}"])
+    await db.commit()
+    await db.refresh(message)
+    
+    response = MessageResponse.model_validate(message)
+    await pubsub.publish(f"student:{message.student_id}", "message", response.model_dump_json(), message.id)
+    return response
+
+async def _broadcast_message(db: AsyncSession, message_data: MessageCreate) -> dict:
+    # INSERT ... SELECT a partir das matrículas: uma instrução, sem objetos ORM por aluno
+    now = datetime.utcnow()
+    recipients = select(
+        Enrollment.student_id,
+        literal(message_data.class_id),
+        literal(message_data.title),
+        literal(message_data.content),
+        literal(now, DateTime)
+    ).where(Enrollment.class_id == message_data.class_id)
     
-    return MessageResponse.model_validate(message)
+    inserted = (await db.execute(insert(Message).from_select(
+        ["student_id", "class_id", "title", "content", "created_at"],
+        recipients
+    ).returning(Message.student_id, Message.id))).tuples().all()
+    unread = await count_broadcast(db, message_data.class_id)
+    await bump_versions(db, [f"class:{message_data.class_id}"])
+    await db.commit()
+    
+    response = MessageBroadcastResponse(
+        class_id=message_data.class_id,
+        title=message_data.title,
+        recipients=len(inserted),
+        created_at=now
+    )
+    # Um evento pequeno no canal de cada aluno, com o id da mensagem dele (também o
+    # id SSE, base do replay por Last-Event-ID) e o seu total de não lidas. A parte
+    # comum é serializada uma vez; os campos do aluno entram antes do "}" final
+    shared = json.dumps({**response.model_dump(mode="json"), "content": message_data.content})[:-1]
+    for student_id, message_id in inserted:
+        data = f'{shared}, "message_id": {message_id}, "unread": {unread.get(student_id, 0)}}}'
+        await pubsub.publish(f"student:{student_id}", "broadcast", data, message_id)
+    return response
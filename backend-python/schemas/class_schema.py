@@ -23,3 +23,11 @@ class StudentInClass(BaseModel):
     
     class Config:
         from_attributes = True
+
+class EnrollmentRequest(BaseModel):
+    student_ids: List[int] = Field(..., min_length=1, max_length=10000)
+
+class EnrollmentResult(BaseModel):
+    class_id: int
+    requested: int  # ids distintos recebidos
+    changed: int  # matrículas criadas ou removidas de fato
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from schemas.class_schema import ClassResponse
+from schemas.material import MaterialResponse
+from schemas.message import MessageResponse
+
+class StudentDashboard(BaseModel):
+    subjects: List[ClassResponse]
+    materials: List[MaterialResponse]
+    messages: List[MessageResponse]
+    # Próxima página de cada lista (None na última); passe de volta como *_cursor
+    subjects_cursor: Optional[str] = None
+    materials_cursor: Optional[str] = None
+    messages_cursor: Optional[str] = None
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 class GradeCreate(BaseModel):
     student_id: int
@@ -20,3 +20,50 @@ class GradeResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class BulkGradeError(BaseModel):
+    row: int
+    detail: str
+
+class BulkGradeResult(BaseModel):
+    created: int
+    errors: List[BulkGradeError]
+
+class HistogramBucket(BaseModel):
+    min: float
+    max: float
+    count: int
+
+class GradeDistribution(BaseModel):
+    count: int
+    mean: Optional[float]
+    median: Optional[float]
+    stddev: Optional[float]
+    min: Optional[float]
+    max: Optional[float]
+    histogram: List[HistogramBucket]
+
+class AssignmentStats(GradeDistribution):
+    assignment: str
+
+class ClassStats(BaseModel):
+    class_id: int
+    overall: GradeDistribution
+    assignments: List[AssignmentStats]
+
+class ReportCardGrade(BaseModel):
+    assignment: str
+    grade: float
+    feedback: Optional[str]
+    created_at: datetime
+    class_mean: Optional[float]
+
+class ReportCardClass(BaseModel):
+    class_id: int
+    class_name: str
+    mean: float
+    grades: List[ReportCardGrade]
+
+class ReportCard(BaseModel):
+    student_id: int
+    classes: List[ReportCardClass]
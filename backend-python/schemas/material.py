@@ -14,8 +14,15 @@ class MaterialResponse(BaseModel):
     description: Optional[str]
     file_url: Optional[str]
     file_type: Optional[str]
+    file_size: Optional[int] = None
+    processing_status: str = "ready"  # pending, processing, ready, failed
+    page_count: Optional[int] = None
     class_id: int
     created_at: datetime
     
     class Config:
         from_attributes = True
+
+class MediaLinkResponse(BaseModel):
+    url: str  # /uploads/<arquivo>?token=...; vale para <video>, <audio> e <img>
+    expires_in: int  # segundos
@@ -1,8 +1,9 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import List, Optional
 
 class MessageCreate(BaseModel):
-    student_id: int
+    student_id: Optional[int] = None  # None = envia para todos os alunos da turma
     class_id: int
     title: str = Field(..., min_length=1, max_length=200)
     content: str = Field(..., min_length=1)
@@ -14,6 +15,24 @@ class MessageResponse(BaseModel):
     title: str
     content: str
     created_at: datetime
+    read_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
+
+class MarkReadRequest(BaseModel):
+    message_ids: List[int] = Field(default_factory=list, max_length=500)
+    all: bool = False  # marca todas as mensagens do aluno
+
+class MarkReadResult(BaseModel):
+    marked: int  # mensagens que ainda não estavam lidas
+    unread: int
+
+class UnreadCount(BaseModel):
+    unread: int
+
+class MessageBroadcastResponse(BaseModel):
+    class_id: int
+    title: str
+    recipients: int
+    created_at: datetime
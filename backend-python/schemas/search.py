@@ -0,0 +1,8 @@
+from schemas.material import MaterialResponse
+from schemas.message import MessageResponse
+
+class MaterialHit(MaterialResponse):
+    rank: float  # maior = mais relevante
+
+class MessageHit(MessageResponse):
+    rank: float
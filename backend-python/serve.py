@@ -0,0 +1,236 @@
+"""Servidor de produção: processo mestre com N workers uvicorn.
+
+Uso:
+    python serve.py                         # um worker por núcleo, porta 8000
+    python serve.py --workers 4 --port 8080
+    python serve.py --reload                # desenvolvimento (recarrega ao editar)
+
+O mestre importa o app uma vez (os workers herdam os módulos já carregados
+via fork), roda a preparação única (`main.prepare`: diretório de uploads e
+migrações), abre o socket e cria os workers. Cada worker descarta as
+conexões herdadas do mestre antes de atender.
+
+Sinais do mestre:
+    SIGTERM/SIGINT  desligamento gracioso: os workers terminam as requisições
+                    em andamento (até --graceful-timeout) e são encerrados
+    SIGHUP          recarga gradual: o mestre se reexecuta (os.execv) mantendo o
+                    socket e o pid, importa o código novo e aplica as migrações,
+                    sobe os workers novos e só então para os antigos. Se o código
+                    novo não importar, a recarga é cancelada e os workers atuais
+                    continuam atendendo
+    SIGTTIN/SIGTTOU adiciona/remove um worker
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, Sequence
+from utils.hashing import default_workers
+
+logger = logging.getLogger("lumina.serve")
+
+RESPAWN_DELAY = 1.0  # segundos entre recriações de workers que morrem em sequência
+
+# Estado passado ao mestre reexecutado no SIGHUP
+LISTEN_FD_ENV = "LUMINA_LISTEN_FD"
+OLD_WORKERS_ENV = "LUMINA_OLD_WORKERS"
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+class Master:
+    """Mantém `workers` processos filhos atendendo o mesmo socket."""
+
+    def __init__(self, app, sock: socket.socket, workers: int, graceful_timeout: int, log_level: str,
+                 old_workers: Sequence[int] = ()):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        # Workers do mestre anterior (mesmo pid após o execv): continuam filhos deste processo
+        self.old_workers = list(old_workers)
+        self.children: Dict[int, float] = {pid: 0.0 for pid in self.old_workers}  # pid -> início
+        self.stopping = False
+        self.reload_requested = False
+
+    # --- worker (processo filho) ---
+
+    def _run_worker(self) -> None:
+        import uvicorn
+        from database.connection import reset_pools_after_fork
+
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        reset_pools_after_fork()
+        config = uvicorn.Config(
+            self.app,
+            log_level=self.log_level,
+            timeout_graceful_shutdown=self.graceful_timeout,
+            proxy_headers=True,
+        )
+        # O uvicorn instala os próprios handlers de SIGTERM/SIGINT (desligamento gracioso)
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException:
+                logger.exception("Worker %s falhou", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        logger.info("Worker %s iniciado", pid)
+        return pid
+
+    # --- mestre ---
+
+    def _on_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def _on_reload(self, signum, frame) -> None:
+        self.reload_requested = True
+
+    def _on_more(self, signum, frame) -> None:
+        self.workers += 1
+
+    def _on_less(self, signum, frame) -> None:
+        self.workers = max(1, self.workers - 1)
+
+    def _reap(self) -> None:
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            if self.children.pop(pid, None) is not None and not self.stopping:
+                logger.warning("Worker %s saiu (status %s)", pid, status)
+
+    def _wait_exit(self, pids, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while any(pid in self.children for pid in pids) and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+
+    def _stop_workers(self, pids) -> None:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        self._wait_exit(pids, self.graceful_timeout + 5)
+        for pid in pids:
+            if pid in self.children:
+                logger.warning("Worker %s não terminou a tempo; SIGKILL", pid)
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        self._wait_exit(pids, 5)
+
+    def _replace_old_workers(self) -> None:
+        # Workers novos primeiro: a capacidade nunca cai abaixo de `workers`
+        logger.info("Substituindo %s workers do código anterior", len(self.old_workers))
+        for _ in range(self.workers):
+            self.spawn()
+        self._stop_workers(self.old_workers)
+        self.old_workers = []
+
+    def _reexec(self) -> None:
+        # Fork herda os módulos do mestre: só reexecutando o mestre o código novo é carregado
+        check = subprocess.run([sys.executable, "-c", "import main"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                               capture_output=True, text=True)
+        if check.returncode != 0:
+            logger.error("Recarga cancelada: o código novo não importa\n%s", check.stderr)
+            return
+        logger.info("Recarregando o mestre com %s workers ativos", len(self.children))
+        os.environ[LISTEN_FD_ENV] = str(self.sock.fileno())
+        os.environ[OLD_WORKERS_ENV] = ",".join(map(str, self.children))
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        signal.signal(signal.SIGTTIN, self._on_more)
+        signal.signal(signal.SIGTTOU, self._on_less)
+
+        if self.old_workers:
+            self._replace_old_workers()
+        last_spawn = -RESPAWN_DELAY
+        while not self.stopping:
+            self._reap()
+            if self.reload_requested:
+                self.reload_requested = False
+                self._reexec()
+            while len(self.children) > self.workers:
+                self._stop_workers([max(self.children, key=self.children.get)])
+            # Um worker que morre logo ao iniciar não vira um loop de fork
+            if len(self.children) < self.workers and time.monotonic() - last_spawn >= RESPAWN_DELAY:
+                for _ in range(self.workers - len(self.children)):
+                    self.spawn()
+                last_spawn = time.monotonic()
+            time.sleep(0.2)
+
+        logger.info("Desligando %s workers", len(self.children))
+        self._stop_workers(list(self.children))
+        self.sock.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor de produção da API LUMINA")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")) or default_workers(),
+                        help="padrão: WEB_CONCURRENCY ou um por núcleo")
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                        help="segundos para os workers concluírem as requisições ao desligar")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--reload", action="store_true", help="desenvolvimento: um processo, recarrega ao editar")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.reload:
+        import uvicorn
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True, log_level=args.log_level)
+        return
+
+    # Preload: os workers herdam o app já importado
+    started = time.perf_counter()
+    from main import app, prepare
+    from database.connection import engine
+    prepare()
+    # As migrações usam o engine síncrono; nenhuma conexão do mestre pode chegar aos filhos
+    engine.dispose()
+    logger.info("App carregado em %.2fs; %s workers em %s:%s",
+                time.perf_counter() - started, args.workers, args.host, args.port)
+
+    inherited_fd = os.environ.pop(LISTEN_FD_ENV, "")
+    old_workers = [int(pid) for pid in os.environ.pop(OLD_WORKERS_ENV, "").split(",") if pid]
+    if inherited_fd:
+        # Recarga por SIGHUP: o socket continua aberto, sem recusar conexões
+        sock = socket.socket(fileno=int(inherited_fd))
+    else:
+        sock = bind_socket(args.host, args.port, args.backlog)
+    Master(app, sock, args.workers, args.graceful_timeout, args.log_level, old_workers).run()
+
+if __name__ == "__main__":
+    sys.exit(main())
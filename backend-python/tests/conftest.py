@@ -0,0 +1,50 @@
+"""Fixtures dos testes: banco SQLite temporário e cliente da API em processo.
+
+As variáveis de ambiente precisam estar definidas antes do primeiro import
+de `config`, por isso ficam no topo deste arquivo.
+"""
+import os
+import sys
+import tempfile
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_tmp = tempfile.mkdtemp(prefix="lumina-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_tmp}/test.db",
+    "DATABASE_REPLICA_URLS": "",
+    "UPLOAD_DIR": os.path.join(_tmp, "uploads"),
+    "BCRYPT_ROUNDS": "4",
+    "JOB_WORKERS": "0",
+    "RATE_LIMIT_ENABLED": "false",
+    "PUBSUB_BROKER_URL": "",
+})
+sys.path.insert(0, BACKEND_DIR)
+
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture(scope="session")
+def app():
+    import main
+    return main.app
+
+@pytest.fixture(scope="session")
+def client(app):
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def register(client):
+    """Cria um usuário com email único; devolve (headers, usuário)."""
+    def create(user_type: str = "student", name: str = "Usuário"):
+        response = client.post("/api/auth/register", json={
+            "name": name,
+            "email": f"{user_type}-{uuid.uuid4().hex[:12]}@teste.lumina",
+            "password": "senha-de-teste",
+            "user_type": user_type,
+        })
+        assert response.status_code == 201, response.text
+        body = response.json()
+        return {"Authorization": f"Bearer {body['access_token']}"}, body["user"]
+    return create
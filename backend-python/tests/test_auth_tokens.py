@@ -0,0 +1,69 @@
+import asyncio
+import uuid
+import pytest
+from jose import JWTError
+from database.connection import AsyncSessionLocal
+from utils import security
+from utils.revocation import claim_token
+from utils.security import KeyRing, create_access_token, decode_token
+
+def _session(client) -> dict:
+    response = client.post("/api/auth/register", json={
+        "name": "Aluno",
+        "email": f"tokens-{uuid.uuid4().hex[:12]}@teste.lumina",
+        "password": "senha-de-teste",
+        "user_type": "student",
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+def _auth(body: dict) -> dict:
+    return {"Authorization": f"Bearer {body['access_token']}"}
+
+def test_refresh_rotates_and_rejects_reuse(client):
+    first = _session(client)
+    second = client.post("/api/auth/refresh", json={"refresh_token": first["refresh_token"]})
+    assert second.status_code == 200
+    assert second.json()["refresh_token"] != first["refresh_token"]
+    assert client.get("/api/student/dashboard", headers=_auth(second.json())).status_code == 200
+
+    # O refresh token usado não renova de novo
+    assert client.post("/api/auth/refresh", json={"refresh_token": first["refresh_token"]}).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": second.json()["refresh_token"]}).status_code == 200
+
+def test_concurrent_claims_of_one_refresh_token_have_one_winner(client):
+    payload = decode_token(_session(client)["refresh_token"], token_type="refresh")
+
+    async def claim():
+        async with AsyncSessionLocal() as db:
+            return await claim_token(db, payload["jti"], payload["exp"])
+
+    async def race():
+        return await asyncio.gather(claim(), claim(), claim())
+
+    assert sorted(client.portal.call(race)) == [False, False, True]
+
+def test_logout_revokes_access_and_refresh_tokens(client):
+    body = _session(client)
+    response = client.post("/api/auth/logout", json={"refresh_token": body["refresh_token"]}, headers=_auth(body))
+    assert response.status_code == 204
+    assert client.get("/api/student/dashboard", headers=_auth(body)).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": body["refresh_token"]}).status_code == 401
+
+def test_key_rotation_keeps_tokens_signed_with_the_previous_key(monkeypatch):
+    monkeypatch.setattr(security, "key_ring", KeyRing("k1:segredo-antigo-com-32-caracteres!!", "", "HS256"))
+    old_token = create_access_token({"sub": "1"})
+
+    # Chave nova assina; a antiga continua verificando
+    monkeypatch.setattr(security, "key_ring", KeyRing(
+        "k2:segredo-novo-com-32-caracteres!!!!,k1:segredo-antigo-com-32-caracteres!!", "", "HS256"
+    ))
+    assert decode_token(old_token)["sub"] == "1"
+    new_token = create_access_token({"sub": "2"})
+    assert security.jwt.get_unverified_header(new_token)["kid"] == "k2"
+
+    # Chave antiga retirada do chaveiro: tokens dela deixam de valer
+    monkeypatch.setattr(security, "key_ring", KeyRing("k2:segredo-novo-com-32-caracteres!!!!", "", "HS256"))
+    assert decode_token(new_token)["sub"] == "2"
+    with pytest.raises(JWTError):
+        decode_token(old_token)
@@ -0,0 +1,39 @@
+import json
+from utils.pubsub import pubsub
+
+def test_broadcast_publishes_each_student_their_message_id_and_unread(client, register):
+    teacher, _ = register("teacher")
+    students = [register("student") for _ in range(2)]
+    class_id = client.post("/api/teacher/classes", json={"name": "Química"}, headers=teacher).json()["id"]
+    client.post(f"/api/teacher/classes/{class_id}/enroll",
+                json={"student_ids": [user["id"] for _, user in students]}, headers=teacher)
+    # Uma mensagem direta antes: os contadores dos dois alunos ficam diferentes
+    client.post("/api/teacher/messages", headers=teacher, json={
+        "student_id": students[0][1]["id"], "class_id": class_id, "title": "Oi", "content": "Direta"
+    })
+
+    queues = [pubsub.subscribe([f"student:{user['id']}"]) for _, user in students]
+    class_queue = pubsub.subscribe([f"class:{class_id}"])
+    try:
+        response = client.post("/api/teacher/messages", headers=teacher, json={
+            "class_id": class_id, "title": "Prova", "content": "Amanhã"
+        })
+        assert response.status_code == 201, response.text
+        assert response.json()["recipients"] == 2
+        items = [queue.get_nowait() for queue in queues]
+        assert all(queue.empty() for queue in queues)
+        # Nada de evento de turma com o mapa de todos os alunos
+        assert class_queue.empty()
+    finally:
+        for queue in queues + [class_queue]:
+            pubsub.unsubscribe(queue)
+
+    for (headers, _), item, expected_unread in zip(students, items, [2, 1]):
+        message = next(m for m in client.get("/api/student/messages", headers=headers).json()
+                       if m["title"] == "Prova")
+        assert (item.event, item.id) == ("broadcast", message["id"])
+        data = json.loads(item.data)
+        assert data["message_id"] == message["id"]
+        assert data["unread"] == expected_unread
+        assert data["content"] == "Amanhã"
+        assert data["class_id"] == class_id
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from config import settings
+from utils.bulk_import import read_bulk_rows
+
+def test_csv_short_and_long_rows_become_row_errors(client, register):
+    headers, _ = register("teacher")
+    _, student = register("student")
+    class_id = client.post("/api/teacher/classes", json={"name": "Geografia"}, headers=headers).json()["id"]
+    client.post(f"/api/teacher/classes/{class_id}/enroll", json={"student_ids": [student["id"]]}, headers=headers)
+
+    sid = student["id"]
+    body = (
+        "student_id,assignment,grade,feedback\n"
+        f"{sid},Prova 1,8.5,Bom\n"
+        f"{sid},Prova 2\n"  # curta: grade e feedback ausentes
+        f"{sid},Prova 3,7,Ok,sobrando\n"  # longa: uma coluna além do cabeçalho
+        f"{sid},Prova 4,9\n"  # curta, mas só falta o opcional
+    )
+    response = client.post(
+        f"/api/teacher/grades/bulk?class_id={class_id}",
+        content=body.encode(),
+        headers={**headers, "Content-Type": "text/csv"},
+    )
+    assert response.status_code == 201, response.text
+    result = response.json()
+    assert result["created"] == 2
+    assert [e["row"] for e in result["errors"]] == [2, 3]
+    assert result["errors"][0]["detail"].startswith("grade")
+    assert "colunas" in result["errors"][1]["detail"]
+
+def _chunked_request(content_type: str, body: bytes, chunk_size: int = 1000):
+    """Request sem Content-Length cujo corpo chega em blocos; conta os blocos lidos."""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    state = {"read": 0, "total": len(chunks)}
+
+    async def receive():
+        index = state["read"]
+        state["read"] += 1
+        return {"type": "http.request", "body": chunks[index], "more_body": index + 1 < len(chunks)}
+
+    scope = {"type": "http", "method": "POST", "path": "/", "query_string": b"",
+             "headers": [(b"content-type", content_type.encode())]}
+    return Request(scope, receive), state
+
+@pytest.mark.parametrize("content_type, wrap", [
+    ("text/csv", lambda csv: csv),
+    ("multipart/form-data; boundary=lim", lambda csv: (
+        b'--lim\r\nContent-Disposition: form-data; name="file"; filename="notas.csv"\r\n\r\n'
+        + csv + b"\r\n--lim--\r\n"
+    )),
+])
+def test_oversized_import_is_rejected_while_streaming(monkeypatch, content_type, wrap):
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", 10_000)
+    csv = b"student_id,assignment,grade\n" + b"1,Prova,10\n" * 20_000
+    request, state = _chunked_request(content_type, wrap(csv))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_bulk_rows(request))
+    assert error.value.status_code == 413
+    assert state["read"] < state["total"] // 5
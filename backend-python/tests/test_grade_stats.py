@@ -0,0 +1,70 @@
+from datetime import datetime
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from database.connection import engine
+from database.migrations import upgrade_to_head
+from database.models import Grade, GradeBucket, GradeSummary, User
+
+def _class_with_student(client, register):
+    headers, _ = register("teacher")
+    _, student = register("student")
+    class_id = client.post("/api/teacher/classes", json={"name": "Matemática"}, headers=headers).json()["id"]
+    client.post(f"/api/teacher/classes/{class_id}/enroll", json={"student_ids": [student["id"]]}, headers=headers)
+    return headers, class_id, student["id"]
+
+def _legacy_grades(class_id: int, student_id: int, grades) -> None:
+    # Notas gravadas sem passar por record_grades, como antes da migração 0002
+    with engine.begin() as connection:
+        connection.execute(insert(Grade), [
+            {"class_id": class_id, "student_id": student_id, "assignment": "Prova 1",
+             "grade": g, "created_at": datetime.utcnow()}
+            for g in grades
+        ])
+
+def _admin_headers(client, register) -> dict:
+    # Administradores não se cadastram pela API: são promovidos no banco
+    _, user = register("teacher")
+    with Session(engine) as session:
+        session.get(User, user["id"]).user_type = "admin"
+        session.commit()
+    token = client.post("/api/auth/login", json={"email": user["email"], "password": "senha-de-teste"}).json()
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+def test_stats_read_only_summaries_and_admin_rebuild_repairs_drift(client, register):
+    headers, class_id, student_id = _class_with_student(client, register)
+    response = client.post("/api/teacher/grades", headers=headers, json={
+        "student_id": student_id, "class_id": class_id, "assignment": "Prova 1", "grade": 10.0
+    })
+    assert response.status_code == 201
+    # Notas gravadas fora da API, sem atualizar os resumos
+    _legacy_grades(class_id, student_id, [2.0, 3.0, 4.0])
+
+    # A leitura não conta as notas nem recalcula: continua vendo só o resumo
+    stats_url = f"/api/teacher/classes/{class_id}/stats"
+    assert client.get(stats_url, headers=headers).json()["overall"]["count"] == 1
+
+    admin = _admin_headers(client, register)
+    assert client.post(f"/api/admin/classes/{class_id}/stats/rebuild", headers=admin).status_code == 204
+    assert client.post("/api/admin/classes/999999/stats/rebuild", headers=admin).status_code == 404
+
+    overall = client.get(stats_url, headers=headers).json()["overall"]
+    assert overall["count"] == 4
+    assert overall["mean"] == 4.75
+    assert overall["median"] == 3.5
+    assert (overall["min"], overall["max"]) == (2.0, 10.0)
+
+def test_migration_backfills_summaries(client, register):
+    headers, class_id, student_id = _class_with_student(client, register)
+    _legacy_grades(class_id, student_id, [6.0, 8.0])
+
+    with engine.begin() as connection:
+        connection.execute(delete(GradeBucket))
+        connection.execute(delete(GradeSummary))
+        connection.exec_driver_sql("UPDATE alembic_version SET version_num = '0007'")
+    upgrade_to_head()
+
+    with engine.connect() as connection:
+        row = connection.execute(
+            GradeSummary.__table__.select().where(GradeSummary.class_id == class_id)
+        ).one()
+    assert (row.count, row.total, row.min_grade, row.max_grade) == (2, 14.0, 6.0, 8.0)
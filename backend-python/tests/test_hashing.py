@@ -0,0 +1,43 @@
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from utils.hashing import HashingPool
+
+def test_cancelled_caller_keeps_slot_until_thread_finishes():
+    pool = HashingPool(workers=1, max_pending=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+        return "hash"
+
+    async def run():
+        task = asyncio.create_task(pool.run(slow_hash))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # A thread ainda está no bcrypt: a vaga continua ocupada
+        assert pool.pending == 1
+        with pytest.raises(HTTPException) as error:
+            await pool.run(slow_hash)
+        assert error.value.status_code == 503
+
+        release.set()
+        deadline = time.monotonic() + 5
+        while pool.pending:
+            assert time.monotonic() < deadline
+            await asyncio.sleep(0.01)
+        assert await pool.run(lambda: "ok") == "ok"
+        assert pool.completed == 2
+
+    try:
+        asyncio.run(run())
+    finally:
+        release.set()
+        pool.shutdown()
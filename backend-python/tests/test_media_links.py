@@ -0,0 +1,36 @@
+CONTENT = b"0123456789" * 1000
+
+def _material(client, register, content: bytes = CONTENT, filename: str = "aula.mp4"):
+    teacher, _ = register("teacher")
+    student, student_user = register("student")
+    class_id = client.post("/api/teacher/classes", json={"name": "Biologia"}, headers=teacher).json()["id"]
+    client.post(f"/api/teacher/classes/{class_id}/enroll", json={"student_ids": [student_user["id"]]},
+                headers=teacher)
+    material = client.post("/api/teacher/materials", params={"title": "Vídeo", "class_id": class_id},
+                           headers=teacher, files={"file": (filename, content, "video/mp4")}).json()
+    return student, class_id, teacher, student_user, material["file_url"]
+
+def test_signed_link_serves_ranges_without_authorization(client, register):
+    student, _, _, _, file_url = _material(client, register)
+    assert client.get(file_url).status_code == 401
+
+    link = client.get(f"{file_url}/link", headers=student)
+    assert link.status_code == 200
+    url = link.json()["url"]
+
+    # Como um <video>: sem Authorization, pedindo um trecho
+    response = client.get(url, headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[10:20]
+
+def test_signed_link_is_bound_to_file_and_enrollment(client, register):
+    student, class_id, teacher, student_user, file_url = _material(client, register)
+    token = client.get(f"{file_url}/link", headers=student).json()["url"].partition("?token=")[2]
+
+    _, _, _, _, other_url = _material(client, register, b"outro video", "outro.mp4")
+    assert client.get(other_url, params={"token": token}).status_code == 401
+    assert client.get(file_url, params={"token": "invalido"}).status_code == 401
+
+    client.post(f"/api/teacher/classes/{class_id}/unenroll", json={"student_ids": [student_user["id"]]},
+                headers=teacher)
+    assert client.get(file_url, params={"token": token}).status_code == 404
@@ -0,0 +1,69 @@
+import asyncio
+import orjson
+from utils.rate_limit import InMemoryRateLimitBackend, RateLimiter, Rule, parse_rate
+
+def _scope(path: str, ip: str = "10.0.0.1") -> dict:
+    return {"type": "http", "method": "POST", "path": path, "headers": [], "client": (ip, 1234)}
+
+def _login(email: str) -> bytes:
+    return orjson.dumps({"email": email, "password": "x"})
+
+def test_rejected_request_refunds_earlier_rules():
+    limiter = RateLimiter([
+        Rule("ip", parse_rate("2/minute"), "ip"),
+        Rule("route", parse_rate("1/minute"), "route", paths=("/a",)),
+    ], InMemoryRateLimitBackend(100))
+
+    async def run():
+        assert (await limiter.check(_scope("/a")))[1] is None
+        # Recusada pela regra da rota: a ficha do IP volta
+        assert (await limiter.check(_scope("/a")))[1].name == "route"
+        assert (await limiter.check(_scope("/b")))[1] is None
+        assert (await limiter.check(_scope("/b")))[1].name == "ip"
+
+    asyncio.run(run())
+
+def test_auth_limit_is_per_account_behind_one_ip():
+    auth = dict(paths=("/api/auth/login",))
+    limiter = RateLimiter([
+        Rule("auth_account", parse_rate("2/minute"), "account", **auth),
+        Rule("auth_ip", parse_rate("600/minute"), "ip", **auth),
+    ], InMemoryRateLimitBackend(1000))
+    scope = _scope("/api/auth/login")
+    assert limiter.needs_body("POST", "/api/auth/login")
+    assert not limiter.needs_body("POST", "/api/student/messages/read")
+
+    async def run():
+        # Uma turma inteira pelo mesmo IP da escola
+        for n in range(40):
+            assert (await limiter.check(scope, _login(f"aluno{n}@escola.br")))[1] is None
+        assert (await limiter.check(scope, _login(" Aluno0@Escola.br ")))[1] is None
+        wait, rule = await limiter.check(scope, _login("aluno0@escola.br"))
+        assert rule.name == "auth_account" and wait > 0
+        # Outro IP com o mesmo email tem o próprio bucket
+        assert (await limiter.check(_scope("/api/auth/login", "10.0.0.2"), _login("aluno0@escola.br")))[1] is None
+
+    asyncio.run(run())
+
+def test_user_bucket_is_keyed_without_verifying_the_token(monkeypatch):
+    from utils import rate_limit
+    from utils.security import create_access_token
+
+    def no_verification(*args, **kwargs):
+        raise AssertionError("o rate limit não deve verificar a assinatura")
+
+    monkeypatch.setattr(rate_limit.jwt, "decode", no_verification)
+    limiter = RateLimiter([Rule("writes_user", parse_rate("1/minute"), "user", prefix="/api/")],
+                          InMemoryRateLimitBackend(100))
+
+    def scope(sub: str, ip: str) -> dict:
+        token = create_access_token({"sub": sub})
+        return {**_scope("/api/student/x", ip), "headers": [(b"authorization", f"Bearer {token}".encode())]}
+
+    async def run():
+        assert (await limiter.check(scope("7", "10.0.0.1")))[1] is None
+        # Mesmo usuário de outro IP: mesmo bucket
+        assert (await limiter.check(scope("7", "10.0.0.2")))[1] is not None
+        assert (await limiter.check(scope("8", "10.0.0.1")))[1] is None
+
+    asyncio.run(run())
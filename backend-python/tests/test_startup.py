@@ -0,0 +1,78 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+import httpx
+import pytest
+from benchmarks.startup import (
+    BACKEND_DIR, FIRST_REQUEST_BUDGET, IMPORT_BUDGET, _free_port, measure_first_request, measure_import
+)
+
+# Tempo de relógio e processos reais variam com a carga da máquina: fora da suíte
+# padrão. Os orçamentos valem sempre em `python -m benchmarks.startup` (mediana)
+pytestmark = [
+    pytest.mark.startup,
+    pytest.mark.skipif(os.getenv("LUMINA_STARTUP_TESTS") != "1", reason="opt-in: LUMINA_STARTUP_TESTS=1"),
+]
+
+def test_import_within_budget():
+    measure_import()  # aquece o cache de bytecode
+    assert measure_import() < IMPORT_BUDGET
+
+def test_first_request_within_budget():
+    assert measure_first_request() < FIRST_REQUEST_BUDGET
+
+def _children(pid: int):
+    found = set()
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    # O nome do processo pode ter espaços: os campos vêm depois do último ")"
+                    if int(stat.read().rpartition(")")[2].split()[1]) == pid:
+                        found.add(int(entry))
+            except (OSError, ValueError):
+                pass
+    return found
+
+def _wait_for(predicate, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.05)
+    raise TimeoutError
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="lê os processos em /proc")
+def test_sighup_reexecs_master_and_replaces_workers():
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", "1", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR
+    )
+    url = f"http://127.0.0.1:{port}/health"
+
+    def healthy():
+        try:
+            return httpx.get(url, timeout=1.0).status_code == 200
+        except httpx.TransportError:
+            return False
+
+    try:
+        _wait_for(healthy)
+        old = _children(server.pid)
+        assert len(old) == 1
+
+        server.send_signal(signal.SIGHUP)
+        new = _wait_for(lambda: (children := _children(server.pid)) and not children & old and children)
+        assert len(new) == 1
+        assert server.poll() is None  # mesmo processo mestre, reexecutado
+        with open(f"/proc/{server.pid}/environ", "rb") as environ:
+            assert b"LUMINA_LISTEN_FD=" in environ.read()
+        _wait_for(healthy)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
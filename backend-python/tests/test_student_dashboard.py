@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from database.connection import async_engine, engine
+from database.models import Material
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+def _student_with_data(client, register, classes: int, per_class: int):
+    teacher_headers, _ = register("teacher")
+    student_headers, student = register("student")
+    with Session(engine) as session:
+        for n in range(classes):
+            class_id = client.post("/api/teacher/classes", json={"name": f"Turma {n}"}, headers=teacher_headers).json()["id"]
+            client.post(f"/api/teacher/classes/{class_id}/enroll", json={"student_ids": [student["id"]]}, headers=teacher_headers)
+            session.add_all([
+                Material(title=f"Material {m}", description="", class_id=class_id, extracted_text="x" * 1000)
+                for m in range(per_class)
+            ])
+            for m in range(per_class):
+                client.post("/api/teacher/messages", headers=teacher_headers, json={
+                    "student_id": student["id"], "class_id": class_id, "title": f"Aviso {m}", "content": "..."
+                })
+        session.commit()
+    return student_headers
+
+def _dashboard_statements(client, headers):
+    with count_statements() as statements:
+        response = client.get("/api/student/dashboard", headers=headers)
+    assert response.status_code == 200
+    return response.json(), statements
+
+def test_dashboard_query_count_is_constant(client, register):
+    small, small_sql = _dashboard_statements(client, _student_with_data(client, register, 1, 1))
+    large, large_sql = _dashboard_statements(client, _student_with_data(client, register, 4, 5))
+
+    assert (len(small["subjects"]), len(small["materials"]), len(small["messages"])) == (1, 1, 1)
+    assert (len(large["subjects"]), len(large["materials"]), len(large["messages"])) == (4, 20, 20)
+    assert len(small_sql) == len(large_sql)
+    # Só as colunas da resposta: o texto extraído dos materiais não é lido
+    assert not any("extracted_text" in s for s in large_sql)
+
+def test_dashboard_lists_are_paginated(client, register):
+    headers = _student_with_data(client, register, 2, 3)
+    first = client.get("/api/student/dashboard", params={"limit": 4}, headers=headers).json()
+    assert len(first["subjects"]) == 2 and first["subjects_cursor"] is None
+    assert len(first["materials"]) == 4 and first["materials_cursor"]
+    assert len(first["messages"]) == 4 and first["messages_cursor"]
+
+    second = client.get("/api/student/dashboard", headers=headers, params={
+        "limit": 4, "materials_cursor": first["materials_cursor"], "messages_cursor": first["messages_cursor"]
+    }).json()
+    assert len(second["materials"]) == 2 and second["materials_cursor"] is None
+    seen = {m["id"] for m in first["materials"]} | {m["id"] for m in second["materials"]}
+    assert len(seen) == 6
+    assert len({m["id"] for m in first["messages"] + second["messages"]}) == 6
@@ -0,0 +1,52 @@
+from sqlalchemy.orm import Session
+from database.connection import engine
+from database.models import Class
+
+def test_class_list_etag_changes_when_a_class_is_created(client, register):
+    headers, teacher = register("teacher")
+    first = client.get("/api/teacher/classes", headers=headers)
+    assert first.status_code == 200
+    assert first.json() == []
+    etag = first.headers["ETag"]
+
+    created = client.post("/api/teacher/classes", json={"name": "Física"}, headers=headers)
+    assert created.status_code == 201
+
+    revalidated = client.get("/api/teacher/classes", headers={**headers, "If-None-Match": etag})
+    assert revalidated.status_code == 200
+    assert [c["name"] for c in revalidated.json()] == ["Física"]
+    assert revalidated.headers["ETag"] != etag
+
+def test_class_list_etag_changes_on_orm_writes_outside_the_routes(client, register):
+    headers, teacher = register("teacher")
+    client.post("/api/teacher/classes", json={"name": "Química"}, headers=headers)
+    etag = client.get("/api/teacher/classes", headers=headers).headers["ETag"]
+
+    # Escrita direta pelo ORM (scripts, admin): o evento de Class incrementa a versão
+    with Session(engine) as session:
+        session.add(Class(name="Biologia", teacher_id=teacher["id"]))
+        session.commit()
+
+    response = client.get("/api/teacher/classes", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert sorted(c["name"] for c in response.json()) == ["Biologia", "Química"]
+
+    with Session(engine) as session:
+        session.delete(session.query(Class).filter_by(name="Biologia", teacher_id=teacher["id"]).one())
+        session.commit()
+
+    response = client.get("/api/teacher/classes", headers={**headers, "If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 200
+    assert [c["name"] for c in response.json()] == ["Química"]
+
+def test_class_list_etag_changes_on_enrollment(client, register):
+    headers, _ = register("teacher")
+    _, student = register("student")
+    class_id = client.post("/api/teacher/classes", json={"name": "História"}, headers=headers).json()["id"]
+    etag = client.get("/api/teacher/classes", headers=headers).headers["ETag"]
+
+    client.post(f"/api/teacher/classes/{class_id}/enroll", json={"student_ids": [student["id"]]}, headers=headers)
+
+    response = client.get("/api/teacher/classes", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,69 @@
+import asyncio
+import hashlib
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from utils.storage import save_upload
+
+BOUNDARY = "limite-de-teste"
+
+def _multipart(content: bytes, filename: str = "aula.pdf") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+def _streamed_request(body: bytes, chunk_size: int, content_length: bool = True):
+    """Request cujo corpo chega em blocos; `chunks_read` conta quantos foram consumidos."""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    state = {"chunks_read": 0, "chunks": len(chunks)}
+
+    async def receive():
+        index = state["chunks_read"]
+        state["chunks_read"] += 1
+        return {"type": "http.request", "body": chunks[index], "more_body": index + 1 < len(chunks)}
+
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": headers, "query_string": b""}
+    return Request(scope, receive), state
+
+def test_size_limit_trips_before_the_body_is_read():
+    # Sem Content-Length (chunked): o limite é verificado enquanto os blocos chegam
+    request, state = _streamed_request(_multipart(b"x" * 1_000_000), chunk_size=10_000, content_length=False)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(save_upload(request, max_size=100_000))
+    assert error.value.status_code == 413
+    assert state["chunks_read"] < state["chunks"] // 5
+
+def test_large_content_length_is_rejected_without_reading():
+    request, state = _streamed_request(_multipart(b"x" * 1_000_000), chunk_size=10_000)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(save_upload(request, max_size=100_000))
+    assert error.value.status_code == 413
+    assert state["chunks_read"] == 0
+
+def test_streamed_file_is_stored_by_hash():
+    content = b"conteudo da aula " * 5000
+    request, _ = _streamed_request(_multipart(content), chunk_size=7_000)
+    stored = asyncio.run(save_upload(request, max_size=1_000_000))
+    assert stored.size == len(content)
+    assert stored.content_hash == hashlib.sha256(content).hexdigest()
+    assert stored.filename == f"{stored.content_hash}.pdf"
+    assert stored.content_type == "application/pdf"
+
+def test_upload_material_route(client, register):
+    headers, _ = register("teacher")
+    class_id = client.post("/api/teacher/classes", json={"name": "Física"}, headers=headers).json()["id"]
+    response = client.post(
+        "/api/teacher/materials", params={"title": "Aula 1", "class_id": class_id}, headers=headers,
+        files={"file": ("aula.pdf", b"%PDF-1.4 teste", "application/pdf")}
+    )
+    assert response.status_code == 201, response.text
+    assert response.json()["file_size"] == len(b"%PDF-1.4 teste")
+
+    missing = client.post("/api/teacher/materials", params={"title": "Aula 2", "class_id": class_id},
+                          headers=headers, files={"outro": ("a.txt", b"x")})
+    assert missing.status_code == 400
@@ -0,0 +1,50 @@
+import json
+import time
+from sqlalchemy.orm import Session
+from database.connection import engine
+from database.models import User
+from middleware.auth import user_cache
+from schemas.user import UserResponse
+from utils.pubsub import pubsub
+from utils.user_versions import USERS_CHANNEL, user_versions
+
+def _login(client, email: str) -> dict:
+    response = client.post("/api/auth/login", json={"email": email, "password": "senha-de-teste"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_role_token_stops_working_after_demotion(client, register):
+    headers, user = register("teacher")
+    assert client.get("/api/teacher/classes", headers=headers).status_code == 200
+
+    with Session(engine) as session:
+        session.get(User, user["id"]).user_type = "student"
+        session.commit()
+
+    # O token ainda diz "teacher", mas a versão do usuário mudou
+    assert client.get("/api/teacher/classes", headers=headers).status_code == 401
+    fresh = _login(client, user["email"])
+    assert client.get("/api/teacher/classes", headers=fresh).status_code == 403
+    assert client.get("/api/student/dashboard", headers=fresh).status_code == 200
+
+def test_role_token_stops_working_after_deletion(client, register):
+    headers, user = register("student")
+    with Session(engine) as session:
+        session.delete(session.get(User, user["id"]))
+        session.commit()
+    assert client.get("/api/student/dashboard", headers=headers).status_code == 401
+
+def test_version_from_another_worker_invalidates_tokens_and_cache(client, register):
+    headers, user = register("student")
+    user_cache.set(UserResponse(**user))
+    assert client.get("/api/student/dashboard", headers=headers).status_code == 200
+
+    # Como se outro worker tivesse alterado o usuário e publicado a versão
+    event = json.dumps({"id": user["id"], "version": user_versions.get(user["id"]) + 1})
+    client.portal.call(pubsub.publish, USERS_CHANNEL, "version", event)
+
+    deadline = time.monotonic() + 5
+    while client.get("/api/student/dashboard", headers=headers).status_code != 401:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert user_cache.local.get(user["id"]) is None
@@ -0,0 +1,85 @@
+"""Broker local de pub/sub para rodar vários workers sem Redis.
+
+Uso: python -m utils.broker [host] [porta]
+
+O protocolo é JSON por linha: cada linha recebida de um cliente é
+repassada a todos os clientes conectados, inclusive quem publicou.
+"""
+import asyncio
+import json
+import logging
+import sys
+from typing import Callable, Optional, Set
+from urllib.parse import urlparse
+from utils.pubsub import Event, PubSubBackend
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+RECONNECT_DELAY = 1.0
+
+class LocalBrokerBackend(PubSubBackend):
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or DEFAULT_HOST
+        self.port = parsed.port or DEFAULT_PORT
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._deliver: Optional[Callable[[Event], None]] = None
+
+    async def start(self, deliver: Callable[[Event], None]) -> None:
+        self._deliver = deliver
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_connection(self.host, self.port)
+                while line := await reader.readline():
+                    self._deliver(Event(**json.loads(line)))
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ValueError, TypeError) as exc:
+                logger.warning("Broker pub/sub indisponível (%s:%s): %s", self.host, self.port, exc)
+            self._writer = None
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def publish(self, event: Event) -> None:
+        if self._writer is None:
+            # Sem broker, ao menos os assinantes deste worker recebem
+            self._deliver(event)
+            return
+        self._writer.write(json.dumps(event.__dict__).encode() + b"\n")
+        await self._writer.drain()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+    clients: Set[asyncio.StreamWriter] = set()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        clients.add(writer)
+        try:
+            while line := await reader.readline():
+                for client in list(clients):
+                    client.write(line)
+                await asyncio.gather(*(c.drain() for c in list(clients)), return_exceptions=True)
+        finally:
+            clients.discard(writer)
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info("Broker pub/sub ouvindo em %s:%s", host, port)
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    host = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_HOST
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+    asyncio.run(serve(host, port))
@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+from typing import List
+from fastapi import HTTPException, Request, status
+from utils.storage import FilePart, read_body, stream_multipart_file
+
+EXTRA_COLUMNS = "__extra__"  # valores além das colunas do cabeçalho (restkey do DictReader)
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+def _parse_csv(raw: bytes) -> List[dict]:
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise _bad_request("CSV deve estar em UTF-8")
+    reader = csv.DictReader(io.StringIO(text), restkey=EXTRA_COLUMNS)
+    rows = []
+    for row in reader:
+        extra = row.pop(EXTRA_COLUMNS, None)
+        # Campos vazios e os que faltam em linhas curtas (None) viram ausentes na validação
+        parsed = {k.strip(): ((v or "").strip() or None) for k, v in row.items() if k}
+        if extra:
+            parsed[EXTRA_COLUMNS] = extra
+        rows.append(parsed)
+    return rows
+
+async def read_bulk_rows(request: Request) -> List[dict]:
+    """Lê as linhas de uma importação em lote.
+
+    Aceita um array JSON (application/json), um CSV no corpo (text/csv) ou
+    um CSV enviado como arquivo no campo `file` (multipart/form-data).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    # Lidos do stream com contagem de bytes: passou do limite, 413 sem bufferizar o resto
+    if content_type == "multipart/form-data":
+        raw = b"".join([chunk async for chunk in stream_multipart_file(request, FilePart("file"))])
+    else:
+        raw = await read_body(request)
+
+    if content_type in ("multipart/form-data", "text/csv"):
+        return _parse_csv(raw)
+
+    try:
+        rows = json.loads(raw)
+    except ValueError:
+        raise _bad_request("JSON inválido")
+    if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+        raise _bad_request("Esperado um array JSON de objetos")
+    return rows
@@ -0,0 +1,69 @@
+from typing import Iterable, List, Set, Tuple
+from sqlalchemy import delete, exists, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import Class, Enrollment, User
+from utils.sql import upsert_insert
+
+IN_CHUNK = 500  # limite de parâmetros por IN (SQLite)
+
+def _chunks(ids: List[int]):
+    for start in range(0, len(ids), IN_CHUNK):
+        yield ids[start:start + IN_CHUNK]
+
+def enrollment_exists(class_id, student_id):
+    """EXISTS sobre a PK (class_id, student_id); aceita valores ou colunas."""
+    return exists().where(Enrollment.class_id == class_id, Enrollment.student_id == student_id)
+
+async def is_enrolled(db: AsyncSession, class_id: int, student_id: int, teacher_id: int = None) -> bool:
+    """Verifica a matrícula sem carregar a lista de turmas do aluno.
+
+    Com `teacher_id`, exige também que a turma pertença ao professor.
+    """
+    condition = enrollment_exists(class_id, student_id)
+    if teacher_id is not None:
+        condition = condition & exists().where(Class.id == class_id, Class.teacher_id == teacher_id)
+    return bool(await db.scalar(select(condition)))
+
+async def enrolled_pairs(db: AsyncSession, class_ids: Iterable[int], student_ids: Iterable[int]) -> Set[Tuple[int, int]]:
+    """Pares (class_id, student_id) matriculados, em poucas consultas por lote."""
+    class_ids = sorted(set(class_ids))
+    pairs = set()
+    if not class_ids:
+        return pairs
+    for chunk in _chunks(sorted(set(student_ids))):
+        result = await db.execute(select(Enrollment.class_id, Enrollment.student_id).where(
+            Enrollment.class_id.in_(class_ids),
+            Enrollment.student_id.in_(chunk)
+        ))
+        pairs.update(tuple(r) for r in result)
+    return pairs
+
+async def enroll_students(db: AsyncSession, class_id: int, student_ids: Iterable[int]) -> int:
+    """Matricula um lote de alunos; ids inexistentes, de professores ou já matriculados são ignorados.
+
+    Retorna quantas matrículas foram criadas. Não faz commit.
+    """
+    created = 0
+    for chunk in _chunks(sorted(set(student_ids))):
+        # INSERT ... SELECT filtra os ids válidos no próprio banco
+        students = select(literal(class_id), User.id).where(
+            User.id.in_(chunk),
+            User.user_type == "student"
+        )
+        stmt = (await upsert_insert(db, Enrollment)).from_select(["class_id", "student_id"], students)
+        result = await db.execute(stmt.on_conflict_do_nothing(
+            index_elements=[Enrollment.class_id, Enrollment.student_id]
+        ))
+        created += max(result.rowcount, 0)
+    return created
+
+async def unenroll_students(db: AsyncSession, class_id: int, student_ids: Iterable[int]) -> int:
+    """Remove um lote de matrículas da turma. Retorna quantas existiam. Não faz commit."""
+    removed = 0
+    for chunk in _chunks(sorted(set(student_ids))):
+        result = await db.execute(delete(Enrollment).where(
+            Enrollment.class_id == class_id,
+            Enrollment.student_id.in_(chunk)
+        ))
+        removed += max(result.rowcount, 0)
+    return removed
@@ -0,0 +1,120 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from database.connection import AsyncSessionLocal
+from database.models import Class, Enrollment, Grade, User
+
+YIELD_PER = 1000  # linhas por lote lido do cursor do banco
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# tipo -> colunas exportadas, na ordem do arquivo
+EXPORTS = {
+    "grades": [
+        ("class_id", Class.id), ("class_name", Class.name),
+        ("student_id", User.id), ("student_name", User.name), ("student_email", User.email),
+        ("assignment", Grade.assignment), ("grade", Grade.grade), ("feedback", Grade.feedback),
+        ("created_at", Grade.created_at),
+    ],
+    "roster": [
+        ("class_id", Class.id), ("class_name", Class.name),
+        ("student_id", User.id), ("student_name", User.name), ("student_email", User.email),
+    ],
+}
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+def export_statement(kind: str, class_id: Optional[int] = None, teacher_id: Optional[int] = None,
+                     since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """SELECT do export, ordenado pelos índices existentes para evitar ordenação em memória."""
+    columns = [column.label(name) for name, column in EXPORTS[kind]]
+    if kind == "grades":
+        stmt = select(*columns).select_from(Grade).join(
+            Class, Class.id == Grade.class_id
+        ).join(User, User.id == Grade.student_id)
+        if since is not None:
+            stmt = stmt.where(Grade.created_at >= since)
+        if until is not None:
+            stmt = stmt.where(Grade.created_at < until)
+        # ix_grades_class_assignment cobre (class_id, assignment, id)
+        order = (Grade.class_id, Grade.assignment, Grade.id)
+        class_column = Grade.class_id
+    else:
+        stmt = select(*columns).select_from(Enrollment).join(
+            Class, Class.id == Enrollment.class_id
+        ).join(User, User.id == Enrollment.student_id)
+        order = (Enrollment.class_id, Enrollment.student_id)  # a própria PK
+        class_column = Enrollment.class_id
+
+    if class_id is not None:
+        stmt = stmt.where(class_column == class_id)
+    if teacher_id is not None:
+        stmt = stmt.where(Class.teacher_id == teacher_id)
+    return stmt.order_by(*order)
+
+def _safe_cell(value):
+    # Evita que planilhas interpretem texto digitado pelo usuário como fórmula
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+class _CsvEncoder:
+    def __init__(self, header: List[str]):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.writer.writerow(header)
+
+    def encode(self, rows) -> bytes:
+        self.writer.writerows(
+            [_safe_cell(v.isoformat() if isinstance(v, datetime) else v) for v in row] for row in rows
+        )
+        chunk = self.buffer.getvalue().encode()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk
+
+class _NdjsonEncoder:
+    def __init__(self, header: List[str]):
+        self.header = header
+
+    def encode(self, rows) -> bytes:
+        return b"".join(orjson.dumps(dict(zip(self.header, row))) + b"\n" for row in rows)
+
+async def _stream_rows(stmt, fmt: str, header: List[str], compress: bool) -> AsyncIterator[bytes]:
+    encoder = _CsvEncoder(header) if fmt == "csv" else _NdjsonEncoder(header)
+    # wbits=31: formato gzip, comprimido incrementalmente a cada lote
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def output(chunk: bytes) -> bytes:
+        return gzip.compress(chunk) if gzip else chunk
+
+    # Sessão própria (a do Depends é fechada antes do corpo ser enviado), em réplica se houver
+    async with AsyncSessionLocal(info={"read_only": True}) as db:
+        result = await db.stream(stmt.execution_options(yield_per=YIELD_PER))
+        async for rows in result.partitions():
+            if chunk := output(encoder.encode(rows)):
+                yield chunk
+    # Resto do buffer: sem linhas, o cabeçalho do CSV ainda não foi enviado
+    tail = output(encoder.encode([])) + (gzip.flush() if gzip else b"")
+    if tail:
+        yield tail
+
+def export_response(kind: str, fmt: str, compress: bool, filename: str, **filters) -> StreamingResponse:
+    """Streaming do export em CSV ou NDJSON, com memória constante.
+
+    As linhas vêm do banco em lotes de YIELD_PER (cursor do lado do servidor
+    no PostgreSQL) e cada lote é codificado e enviado antes do próximo.
+    """
+    header = [name for name, _ in EXPORTS[kind]]
+    extension = fmt + (".gz" if compress else "")
+    return StreamingResponse(
+        _stream_rows(export_statement(kind, **filters), fmt, header, compress),
+        media_type="application/gzip" if compress else MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{extension}"',
+            "Cache-Control": "no-store",
+        }
+    )
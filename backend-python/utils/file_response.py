@@ -0,0 +1,136 @@
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Mapping, Optional, Tuple
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+CHUNK_SIZE = 256 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Interpreta um header Range de intervalo único.
+
+    Retorna (início, fim) inclusivos, None para ignorar o header (formato
+    desconhecido ou múltiplos intervalos) e levanta ValueError quando o
+    intervalo não pode ser atendido.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        suffix = int(end)
+        if suffix == 0:
+            raise ValueError("range vazio")
+        return max(0, size - suffix), size - 1
+    first = int(start)
+    last = int(end) if end else size - 1
+    if first >= size or first > last:
+        raise ValueError("range fora do arquivo")
+    return first, min(last, size - 1)
+
+def _not_modified(headers: Mapping[str, str], etag: str, mtime: float) -> bool:
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+class RangeFileResponse(Response):
+    """Envia um arquivo com suporte a Range, ETag forte e respostas 304.
+
+    Lê o arquivo em blocos sem bloquear o event loop. O uvicorn não oferece a
+    extensão ASGI `http.response.zerocopysend` (sendfile), então não há
+    caminho para ela; comparação com o FileResponse do Starlette em
+    `benchmarks/file_response.py`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        request_headers: Mapping[str, str],
+        etag: str,
+        media_type: Optional[str] = None,
+        cache_control: str = "private, max-age=86400",
+    ):
+        stat = os.stat(path)
+        self.path = path
+        self.media_type = media_type or "application/octet-stream"
+        self.background = None
+        self.start = 0
+        self.length = stat.st_size
+
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": formatdate(stat.st_mtime, usegmt=True),
+            "cache-control": cache_control,
+        }
+
+        if _not_modified(request_headers, etag, stat.st_mtime):
+            self.status_code = 304
+            self.length = 0
+            self.init_headers(headers)
+            return
+
+        byte_range = None
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range == etag):
+            try:
+                byte_range = parse_range(range_header, stat.st_size)
+            except ValueError:
+                self.status_code = 416
+                self.length = 0
+                headers["content-range"] = f"bytes */{stat.st_size}"
+                headers["content-length"] = "0"
+                self.init_headers(headers)
+                return
+
+        if byte_range is not None:
+            first, last = byte_range
+            self.status_code = 206
+            self.start = first
+            self.length = last - first + 1
+            headers["content-range"] = f"bytes {first}-{last}/{stat.st_size}"
+        else:
+            self.status_code = 200
+
+        headers["content-length"] = str(self.length)
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if self.length == 0 or scope.get("method") == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        remaining = self.length
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+
+        if remaining > 0:
+            # Arquivo encolheu durante o envio: encerra a resposta
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
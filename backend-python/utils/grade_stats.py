@@ -0,0 +1,184 @@
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Integer, and_, case, cast, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import Class, Grade, GradeBucket, GradeSummary
+from utils.sql import upsert_insert
+
+BUCKET_SCALE = 10  # buckets finos de 0.1 ponto (mediana exata para notas com 1 casa)
+MAX_GRADE = 10
+
+def _bucket(grade: float) -> int:
+    # Arredondamento "half up", igual ao ROUND do SQL usado no rebuild
+    return int(math.floor(grade * BUCKET_SCALE + 0.5))
+
+async def record_grades(db: AsyncSession, grades: Iterable[Tuple[int, str, float]]) -> None:
+    """Atualiza as tabelas de resumo com novas notas (class_id, assignment, grade).
+
+    Deve ser chamada na mesma transação que insere as notas.
+    """
+    summaries: Dict[Tuple[int, str], list] = {}
+    buckets: Dict[Tuple[int, str, int], int] = defaultdict(int)
+    for class_id, assignment, grade in grades:
+        item = summaries.get((class_id, assignment))
+        if item is None:
+            summaries[(class_id, assignment)] = [1, grade, grade * grade, grade, grade]
+        else:
+            item[0] += 1
+            item[1] += grade
+            item[2] += grade * grade
+            item[3] = min(item[3], grade)
+            item[4] = max(item[4], grade)
+        buckets[(class_id, assignment, _bucket(grade))] += 1
+
+    if not summaries:
+        return
+
+    stmt = await upsert_insert(db, GradeSummary)
+    new = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GradeSummary.class_id, GradeSummary.assignment],
+        set_={
+            "count": GradeSummary.count + new["count"],
+            "total": GradeSummary.total + new.total,
+            "total_sq": GradeSummary.total_sq + new.total_sq,
+            "min_grade": case((new.min_grade < GradeSummary.min_grade, new.min_grade), else_=GradeSummary.min_grade),
+            "max_grade": case((new.max_grade > GradeSummary.max_grade, new.max_grade), else_=GradeSummary.max_grade),
+        }
+    )
+    await db.execute(stmt, [
+        {"class_id": c, "assignment": a, "count": n, "total": t, "total_sq": sq, "min_grade": lo, "max_grade": hi}
+        for (c, a), (n, t, sq, lo, hi) in summaries.items()
+    ])
+
+    stmt = await upsert_insert(db, GradeBucket)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GradeBucket.class_id, GradeBucket.assignment, GradeBucket.bucket],
+        set_={"count": GradeBucket.count + stmt.excluded["count"]}
+    )
+    await db.execute(stmt, [
+        {"class_id": c, "assignment": a, "bucket": b, "count": n}
+        for (c, a, b), n in buckets.items()
+    ])
+
+async def rebuild_class_stats(db: AsyncSession, class_id: int) -> None:
+    """Recalcula os resumos de uma turma a partir das notas, com agregados SQL."""
+    await db.execute(delete(GradeSummary).where(GradeSummary.class_id == class_id))
+    await db.execute(delete(GradeBucket).where(GradeBucket.class_id == class_id))
+
+    await db.execute(insert(GradeSummary).from_select(
+        ["class_id", "assignment", "count", "total", "total_sq", "min_grade", "max_grade"],
+        select(
+            Grade.class_id,
+            Grade.assignment,
+            func.count(Grade.id),
+            func.sum(Grade.grade),
+            func.sum(Grade.grade * Grade.grade),
+            func.min(Grade.grade),
+            func.max(Grade.grade)
+        ).where(Grade.class_id == class_id).group_by(Grade.class_id, Grade.assignment)
+    ))
+
+    bucket = cast(func.round(Grade.grade * BUCKET_SCALE), Integer)
+    await db.execute(insert(GradeBucket).from_select(
+        ["class_id", "assignment", "bucket", "count"],
+        select(Grade.class_id, Grade.assignment, bucket, func.count(Grade.id))
+        .where(Grade.class_id == class_id)
+        .group_by(Grade.class_id, Grade.assignment, bucket)
+    ))
+
+def _median(buckets: Dict[int, int], count: int) -> Optional[float]:
+    if not count:
+        return None
+    lower, upper = (count - 1) // 2, count // 2
+    seen = 0
+    low_value = None
+    for bucket in sorted(buckets):
+        seen += buckets[bucket]
+        if low_value is None and seen > lower:
+            low_value = bucket
+        if seen > upper:
+            return (low_value + bucket) / 2 / BUCKET_SCALE
+    return None
+
+def _summarize(count: int, total: float, total_sq: float, low, high, buckets: Dict[int, int]) -> dict:
+    mean = total / count if count else None
+    stddev = math.sqrt(max(0.0, total_sq / count - mean * mean)) if count else None
+    histogram = [0] * MAX_GRADE
+    for bucket, n in buckets.items():
+        histogram[min(bucket // BUCKET_SCALE, MAX_GRADE - 1)] += n
+    return {
+        "count": count,
+        "mean": round(mean, 4) if mean is not None else None,
+        "median": _median(buckets, count),
+        "stddev": round(stddev, 4) if stddev is not None else None,
+        "min": low,
+        "max": high,
+        "histogram": [{"min": i, "max": i + 1, "count": n} for i, n in enumerate(histogram)],
+    }
+
+async def class_stats(db: AsyncSession, class_id: int) -> dict:
+    # Só lê as tabelas de resumo (a migração 0008 preencheu as notas antigas e
+    # record_grades mantém o resto); divergências se corrigem com rebuild_class_stats
+    summaries = (await db.scalars(
+        select(GradeSummary).where(GradeSummary.class_id == class_id).order_by(GradeSummary.assignment)
+    )).all()
+
+    rows = (await db.execute(
+        select(GradeBucket.assignment, GradeBucket.bucket, GradeBucket.count)
+        .where(GradeBucket.class_id == class_id)
+    )).all()
+    by_assignment: Dict[str, Dict[int, int]] = defaultdict(dict)
+    overall_buckets: Dict[int, int] = defaultdict(int)
+    for assignment, bucket, n in rows:
+        by_assignment[assignment][bucket] = n
+        overall_buckets[bucket] += n
+
+    assignments = [
+        {"assignment": s.assignment, **_summarize(s.count, s.total, s.total_sq, s.min_grade, s.max_grade, by_assignment[s.assignment])}
+        for s in summaries
+    ]
+    overall = _summarize(
+        sum(s.count for s in summaries),
+        sum(s.total for s in summaries),
+        sum(s.total_sq for s in summaries),
+        min((s.min_grade for s in summaries), default=None),
+        max((s.max_grade for s in summaries), default=None),
+        overall_buckets
+    )
+    return {"class_id": class_id, "overall": overall, "assignments": assignments}
+
+async def report_card(db: AsyncSession, student_id: int, class_id: Optional[int] = None) -> dict:
+    stmt = select(
+        Grade, Class.name, GradeSummary.total, GradeSummary.count
+    ).join(Class, Class.id == Grade.class_id).outerjoin(GradeSummary, and_(
+        GradeSummary.class_id == Grade.class_id,
+        GradeSummary.assignment == Grade.assignment
+    )).where(Grade.student_id == student_id)
+    if class_id is not None:
+        stmt = stmt.where(Grade.class_id == class_id)
+    stmt = stmt.order_by(Grade.class_id, Grade.created_at)
+
+    classes: Dict[int, dict] = {}
+    for grade, class_name, total, count in (await db.execute(stmt)).all():
+        entry = classes.setdefault(grade.class_id, {
+            "class_id": grade.class_id,
+            "class_name": class_name,
+            "mean": None,
+            "grades": [],
+        })
+        entry["grades"].append({
+            "assignment": grade.assignment,
+            "grade": grade.grade,
+            "feedback": grade.feedback,
+            "created_at": grade.created_at,
+            "class_mean": round(total / count, 4) if count else None,
+        })
+
+    result: List[dict] = []
+    for entry in classes.values():
+        grades = [g["grade"] for g in entry["grades"]]
+        entry["mean"] = round(sum(grades) / len(grades), 4)
+        result.append(entry)
+    return {"student_id": student_id, "classes": result}
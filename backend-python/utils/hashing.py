@@ -0,0 +1,76 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+
+class HashingPool:
+    """Pool dedicado para bcrypt, com limite de fila.
+
+    O bcrypt libera o GIL, então threads bastam para usar todos os núcleos
+    sem competir com o threadpool padrão do FastAPI. Quando a fila passa de
+    `max_pending`, a requisição recebe 503 na hora em vez de esperar.
+    """
+
+    def __init__(self, workers: int, max_pending: int, observe: Optional[Callable[[float], None]] = None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.observe = observe
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Servidor ocupado, tente novamente em instantes",
+                    headers={"Retry-After": "1"}
+                )
+            self.pending += 1
+
+        start = time.perf_counter()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            raise
+        # A vaga só é liberada quando a thread termina: se quem chamou for
+        # cancelado (cliente desconectou), o bcrypt em andamento continua contando
+        future.add_done_callback(lambda _: self._finished(start))
+        result = await asyncio.wrap_future(future)
+        if self.observe is not None:
+            # No contexto de quem chamou: as métricas da requisição ficam em contextvars
+            self.observe(time.perf_counter() - start)
+        return result
+
+    def _finished(self, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+            self.total_seconds += elapsed
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+def default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
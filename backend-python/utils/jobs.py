@@ -0,0 +1,220 @@
+"""Fila de jobs durável sobre o próprio banco, sem broker externo.
+
+Uso do worker separado: python -m utils.jobs [tarefas]
+
+Com JOB_WORKERS > 0, a API também processa jobs no próprio processo; com
+JOB_WORKERS=0 o processamento fica só com os workers separados.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from config import settings
+from database.connection import AsyncSessionLocal
+from database.models import Job
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 3600  # segundos entre limpezas de jobs concluídos
+
+@dataclass
+class JobHandler:
+    run: Callable[[dict], Awaitable[None]]
+    # Chamado quando as tentativas se esgotam (ex.: marcar o material como falho)
+    give_up: Optional[Callable[[dict, str], Awaitable[None]]] = None
+
+HANDLERS: Dict[str, JobHandler] = {}
+
+def register(kind: str, give_up: Optional[Callable[[dict, str], Awaitable[None]]] = None):
+    """Registra a função que processa jobs do tipo `kind`.
+
+    Um job pode rodar mais de uma vez (retentativa ou lease expirado), então
+    o handler precisa ser idempotente.
+    """
+    def decorator(run):
+        HANDLERS[kind] = JobHandler(run, give_up)
+        return run
+    return decorator
+
+async def enqueue(db: AsyncSession, kind: str, payload: dict, run_at: Optional[datetime] = None) -> Job:
+    """Grava o job na transação da sessão; ele só fica visível após o commit."""
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        status="queued",
+        attempts=0,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        run_at=run_at or datetime.utcnow()
+    )
+    db.add(job)
+    return job
+
+def retry_delay(attempts: int) -> timedelta:
+    # Backoff exponencial: 1x, 2x, 4x... a base, limitado a 1 hora
+    return timedelta(seconds=min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600))
+
+class JobWorker:
+    """Tarefas asyncio que retiram jobs da tabela `jobs` e executam os handlers.
+
+    Cada job é reservado com um UPDATE atômico (FOR UPDATE SKIP LOCKED no
+    PostgreSQL) e um lease; se o worker morrer, o job volta para a fila
+    quando o lease expira.
+    """
+
+    def __init__(self, concurrency: int, poll_interval: float, lease_seconds: int):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._last_purge = 0.0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._loop()) for _ in range(self.concurrency)]
+
+    async def run_forever(self) -> None:
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Acorda as tarefas paradas após um enqueue neste processo."""
+        self._wakeup.set()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Falha ao reservar job")
+                job = None
+            if job is None:
+                await self._maybe_purge()
+                await self._idle()
+                continue
+            await self._execute(job)
+
+    async def _idle(self) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _claim(self) -> Optional[Job]:
+        now = datetime.utcnow()
+        # Alias: sem ele a subconsulta seria correlacionada à tabela do UPDATE
+        pending = aliased(Job)
+        candidate = select(pending.id).where(or_(
+            (pending.status == "queued") & (pending.run_at <= now),
+            (pending.status == "running") & (pending.locked_until < now)
+        )).order_by(pending.run_at).limit(1).with_for_update(skip_locked=True).scalar_subquery()
+
+        async with AsyncSessionLocal() as db:
+            job = (await db.execute(
+                update(Job).where(Job.id == candidate).values(
+                    status="running",
+                    attempts=Job.attempts + 1,
+                    locked_by=self.worker_id,
+                    locked_until=now + timedelta(seconds=self.lease_seconds)
+                ).returning(Job).execution_options(synchronize_session=False)
+            )).scalar_one_or_none()
+            await db.commit()
+        return job
+
+    async def _execute(self, job: Job) -> None:
+        handler = HANDLERS.get(job.kind)
+        payload = json.loads(job.payload)
+        try:
+            if handler is None:
+                raise LookupError(f"Nenhum handler registrado para {job.kind!r}")
+            await handler.run(payload)
+        except asyncio.CancelledError:
+            # Desligamento: o lease expira e outro worker retoma o job
+            raise
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            give_up = handler is None or job.attempts >= job.max_attempts
+            logger.warning("Job %s (%s) falhou na tentativa %s: %s", job.id, job.kind, job.attempts, error)
+            await self._finish(job, "failed" if give_up else "queued", error)
+            if give_up:
+                self.failed += 1
+                if handler is not None and handler.give_up is not None:
+                    try:
+                        await handler.give_up(payload, error)
+                    except Exception:
+                        logger.exception("Falha ao finalizar o job %s (%s)", job.id, job.kind)
+            else:
+                self.retried += 1
+            return
+        await self._finish(job, "done")
+        self.completed += 1
+
+    async def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        now = datetime.utcnow()
+        values = {"status": status, "locked_by": None, "locked_until": None, "last_error": error}
+        if status == "queued":
+            values["run_at"] = now + retry_delay(job.attempts)
+        else:
+            values["finished_at"] = now
+        async with AsyncSessionLocal() as db:
+            # Só finaliza se o lease ainda é deste worker
+            await db.execute(update(Job).where(Job.id == job.id, Job.locked_by == self.worker_id).values(**values))
+            await db.commit()
+
+    async def _maybe_purge(self) -> None:
+        if time.monotonic() - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(days=settings.JOB_RETENTION_DAYS)
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Job).where(Job.status == "done", Job.finished_at < cutoff))
+            await db.commit()
+
+    def stats(self) -> dict:
+        return {
+            "tasks": len(self._tasks),
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+job_worker = JobWorker(settings.JOB_WORKERS, settings.JOB_POLL_INTERVAL, settings.JOB_LEASE_SECONDS)
+
+async def _run_standalone(concurrency: int) -> None:
+    import utils.material_processing  # noqa: F401  (registra os handlers)
+
+    worker = JobWorker(concurrency, settings.JOB_POLL_INTERVAL, settings.JOB_LEASE_SECONDS)
+    logger.info("Worker de jobs %s com %s tarefas", worker.worker_id, concurrency)
+    await worker.run_forever()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else max(settings.JOB_WORKERS, 1)
+    try:
+        asyncio.run(_run_standalone(tasks))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,135 @@
+"""Processamento de materiais após o upload, executado pela fila de jobs.
+
+Detecta o tipo real do arquivo, conta as páginas de PDFs e extrai o texto
+usado pela busca. A extração de texto de PDFs usa `pypdf` quando instalado.
+"""
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from config import settings
+from database.connection import AsyncSessionLocal
+from database.models import Material
+from utils.jobs import register
+from utils.response_cache import bump_versions
+
+PROCESS_MATERIAL = "material.process"
+SNIFF_BYTES = 512
+
+# Assinaturas no início do arquivo; o content-type enviado pelo cliente não é confiável
+MAGIC = [
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"PK\x03\x04", "application/zip"),  # também docx, xlsx, pptx
+    (b"ID3", "audio/mpeg"),
+    (b"OggS", "audio/ogg"),
+]
+TEXT_TYPES = {"text/plain", "text/markdown", "text/csv"}
+PDF_PAGE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+@dataclass
+class FileInfo:
+    file_type: Optional[str]
+    page_count: Optional[int] = None
+    text: Optional[str] = None
+
+def sniff_type(head: bytes, declared: Optional[str]) -> Optional[str]:
+    for signature, media_type in MAGIC:
+        if head.startswith(signature):
+            if media_type == "application/zip" and declared and declared.startswith("application/vnd.openxmlformats"):
+                return declared
+            return media_type
+    if head[4:8] == b"ftyp":
+        return "video/mp4"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return declared
+
+def _pdf_reader():
+    # Import tardio: não pesa no início dos workers
+    try:
+        from pypdf import PdfReader
+    except ImportError:  # opcional: sem pypdf, PDFs têm só contagem de páginas
+        return None
+    return PdfReader
+
+def _pdf_info(path: str) -> FileInfo:
+    PdfReader = _pdf_reader()
+    if PdfReader is not None:
+        reader = PdfReader(path)
+        parts, size = [], 0
+        for page in reader.pages:
+            text = page.extract_text() or ""
+            parts.append(text)
+            size += len(text)
+            if size >= settings.EXTRACTED_TEXT_MAX_CHARS:
+                break
+        return FileInfo("application/pdf", len(reader.pages), "\n".join(parts))
+    # Sem pypdf: conta os objetos /Type /Page, suficiente para a maioria dos PDFs
+    with open(path, "rb") as f:
+        return FileInfo("application/pdf", len(PDF_PAGE.findall(f.read())) or None)
+
+def analyze_file(path: str, declared_type: Optional[str]) -> FileInfo:
+    """Trabalho bloqueante (disco e parsing); roda fora do event loop."""
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+    file_type = sniff_type(head, declared_type)
+    if file_type == "application/pdf":
+        info = _pdf_info(path)
+    elif file_type in TEXT_TYPES:
+        with open(path, "rb") as f:
+            raw = f.read(settings.EXTRACTED_TEXT_MAX_CHARS * 4)
+        info = FileInfo(file_type, text=raw.decode("utf-8", errors="replace"))
+    else:
+        info = FileInfo(file_type)
+    if info.text:
+        info.text = info.text[:settings.EXTRACTED_TEXT_MAX_CHARS].strip() or None
+    return info
+
+async def _processed_copy(db, material: Material) -> Optional[FileInfo]:
+    # O mesmo arquivo (mesmo hash) já processado para outra turma: reaproveita o resultado
+    if not material.content_hash:
+        return None
+    row = (await db.execute(select(Material.file_type, Material.page_count, Material.extracted_text).where(
+        Material.content_hash == material.content_hash,
+        Material.processing_status == "ready",
+        Material.id != material.id
+    ).limit(1))).first()
+    return FileInfo(*row) if row else None
+
+@register(PROCESS_MATERIAL, give_up=lambda payload, error: _mark_failed(payload["material_id"], error))
+async def process_material(payload: dict) -> None:
+    async with AsyncSessionLocal() as db:
+        material = await db.get(Material, payload["material_id"])
+        if material is None or material.processing_status == "ready" or not material.file_url:
+            return
+        material.processing_status = "processing"
+        await db.commit()
+
+        info = await _processed_copy(db, material)
+        if info is None:
+            path = os.path.join(settings.UPLOAD_DIR, os.path.basename(material.file_url))
+            info = await run_in_threadpool(analyze_file, path, material.file_type)
+
+        material.file_type = info.file_type
+        material.page_count = info.page_count
+        material.extracted_text = info.text
+        material.processing_status = "ready"
+        material.processing_error = None
+        await bump_versions(db, [f"class:{material.class_id}"])
+        await db.commit()
+
+async def _mark_failed(material_id: int, error: str) -> None:
+    async with AsyncSessionLocal() as db:
+        material = await db.get(Material, material_id)
+        if material is None:
+            return
+        material.processing_status = "failed"
+        material.processing_error = error[:1000]
+        await bump_versions(db, [f"class:{material.class_id}"])
+        await db.commit()
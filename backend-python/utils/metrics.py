@@ -0,0 +1,143 @@
+"""Métricas da API no formato texto do Prometheus.
+
+Cada worker mantém os próprios contadores; com vários processos, o
+Prometheus deve coletar cada um separadamente (ou somar por instância).
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # Por combinação de labels: [contagem por bucket..., soma, total]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            item = self._values.get(labels)
+            if item is None:
+                item = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                item[index] += 1
+            item[-2] += value
+            item[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for labels, item in sorted(self._values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, item):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (f'{bound:g}',))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {item[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {round(item[-2], 6)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {item[-1]}")
+        return lines
+
+def gauge(name: str, help: str, values: Dict[str, float], label: Optional[str] = None) -> List[str]:
+    """Gauges calculados na hora da coleta (pool, caches...)."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for key, value in values.items():
+        suffix = _labels((label,), (key,)) if label else ""
+        lines.append(f"{name}{suffix} {value}")
+    return lines
+
+REQUESTS = Counter("lumina_http_requests_total", "Requisições HTTP", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("lumina_http_request_duration_seconds", "Latência das requisições", LATENCY_BUCKETS, ("method", "route"))
+REQUEST_QUERIES = Histogram("lumina_http_request_queries", "Comandos SQL por requisição", COUNT_BUCKETS, ("method", "route"))
+REQUEST_DB_SECONDS = Histogram("lumina_http_request_db_seconds", "Tempo no banco por requisição", LATENCY_BUCKETS, ("method", "route"))
+REQUEST_BYTES = Histogram("lumina_http_request_size_bytes", "Tamanho do corpo recebido", SIZE_BUCKETS, ("method", "route"))
+RESPONSE_BYTES = Histogram("lumina_http_response_size_bytes", "Tamanho do corpo enviado", SIZE_BUCKETS, ("method", "route"))
+HASH_SECONDS = Histogram("lumina_bcrypt_duration_seconds", "Tempo de cada operação bcrypt", LATENCY_BUCKETS)
+SLOW_REQUESTS = Counter("lumina_slow_requests_total", "Requisições acima de SLOW_REQUEST_MS", ("method", "route"))
+RATE_LIMITED = Counter("lumina_rate_limited_total", "Requisições recusadas com 429", ("rule",))
+SHED_REQUESTS = Counter("lumina_shed_requests_total", "Requisições descartadas com 503 por sobrecarga", ("priority",))
+
+METRICS = [REQUESTS, REQUEST_SECONDS, REQUEST_QUERIES, REQUEST_DB_SECONDS, REQUEST_BYTES, RESPONSE_BYTES, HASH_SECONDS, SLOW_REQUESTS, RATE_LIMITED, SHED_REQUESTS]
+
+@dataclass
+class RequestStats:
+    capture_sql: bool = False
+    queries: int = 0
+    db_seconds: float = 0.0
+    hash_seconds: float = 0.0
+    statements: List[Tuple[float, str]] = field(default_factory=list)
+
+MAX_CAPTURED_STATEMENTS = 500
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("lumina_request_stats", default=None)
+
+def record_hash(seconds: float) -> None:
+    HASH_SECONDS.observe(seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.hash_seconds += seconds
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_request.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_seconds += elapsed
+    if stats.capture_sql and len(stats.statements) < MAX_CAPTURED_STATEMENTS:
+        stats.statements.append((elapsed, statement))
+
+def _handle_error(context):
+    # Comando com erro não passa por after_cursor_execute
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+def render(extra: Sequence[str] = ()) -> str:
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(extra)
+    return "\n".join(lines) + "\n"
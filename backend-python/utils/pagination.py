@@ -0,0 +1,84 @@
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+async def paginate(db: AsyncSession, stmt, model, cursor: Optional[str], limit: int, response: Response):
+    """Paginação por keyset em (created_at, id), do mais recente para o mais antigo.
+
+    O cursor da próxima página vai no header X-Next-Cursor; o corpo continua
+    sendo uma lista simples.
+    """
+    rows, next_cursor = await keyset_page(db, stmt, model, cursor, limit)
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+async def keyset_page(db: AsyncSession, stmt, model, cursor: Optional[str], limit: int) -> Tuple[list, Optional[str]]:
+    """Uma página por keyset e o cursor da seguinte (None na última)."""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < (created_at, row_id))
+
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    result = await db.execute(stmt)
+    # select(Model) devolve objetos ORM; select(colunas...) devolve Rows
+    rows = result.scalars().all() if len(stmt.column_descriptions) == 1 else result.all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, encode_cursor(last.created_at, last.id)
+
+    return rows, None
+
+MAX_OFFSET = 1000  # resultados ranqueados: páginas profundas não são úteis
+
+async def paginate_ranked(db: AsyncSession, stmt, cursor: Optional[str], limit: int, response: Response):
+    """Paginação por deslocamento para consultas já ordenadas por relevância.
+
+    O ranking não é uma chave estável para keyset; o cursor guarda só o
+    deslocamento, limitado a MAX_OFFSET.
+    """
+    offset = 0
+    if cursor:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            offset = int(base64.urlsafe_b64decode(padded).decode())
+        except (ValueError, UnicodeDecodeError):
+            offset = -1
+        if not 0 <= offset <= MAX_OFFSET:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor inválido"
+            )
+
+    rows = (await db.execute(stmt.offset(offset).limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if offset + limit <= MAX_OFFSET:
+            next_offset = str(offset + limit).encode()
+            response.headers[NEXT_CURSOR_HEADER] = base64.urlsafe_b64encode(next_offset).decode().rstrip("=")
+
+    return rows
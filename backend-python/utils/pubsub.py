@@ -0,0 +1,90 @@
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Set
+from config import settings
+
+@dataclass
+class Event:
+    channel: str
+    event: str
+    data: str  # JSON já serializado, compartilhado entre todos os assinantes
+    id: Optional[int] = None
+
+class PubSubBackend:
+    """Interface para distribuir eventos entre workers."""
+
+    async def start(self, deliver: Callable[[Event], None]) -> None:
+        raise NotImplementedError
+
+    async def publish(self, event: Event) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+class PubSub:
+    """Pub/sub em processo com backend opcional para vários workers.
+
+    Sem backend, `publish` entrega direto aos assinantes locais. Com backend,
+    o evento passa pelo broker e volta para todos os workers (inclusive este).
+    """
+
+    def __init__(self, backend: Optional[PubSubBackend] = None, queue_size: int = 100):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    async def start(self) -> None:
+        if self.backend is not None:
+            await self.backend.start(self.deliver)
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+
+    async def publish(self, channel: str, event: str, data: str, id: Optional[int] = None) -> None:
+        item = Event(channel, event, data, id)
+        if self.backend is None:
+            self.deliver(item)
+        else:
+            await self.backend.publish(item)
+
+    def deliver(self, item: Event) -> None:
+        for queue in list(self._subscribers.get(item.channel, ())):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Cliente lento: encerra o stream; ele reconecta com Last-Event-ID
+                queue.get_nowait()
+                queue.put_nowait(None)
+                self.unsubscribe(queue)
+
+    def subscribe(self, channels: Iterable[str]) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        queue.channels = list(channels)
+        for channel in queue.channels:
+            self._subscribers[channel].add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        for channel in getattr(queue, "channels", ()):
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._subscribers),
+            "subscribers": len({id(q) for qs in self._subscribers.values() for q in qs}),
+        }
+
+def create_backend(url: str) -> Optional[PubSubBackend]:
+    if not url:
+        return None
+    from utils.broker import LocalBrokerBackend
+    return LocalBrokerBackend(url)
+
+pubsub = PubSub(create_backend(settings.PUBSUB_BROKER_URL))
@@ -0,0 +1,260 @@
+"""Rate limiting por token bucket e descarte de carga (load shedding).
+
+Os buckets ficam em memória, um por processo; com vários workers o limite
+efetivo é multiplicado pelo número de workers, a menos que um backend
+compartilhado seja usado (ver `RateLimitBackend`).
+"""
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import orjson
+from jose import JWTError, jwt
+from config import settings
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+MAX_ACCOUNT_BODY = 16 * 1024  # corpos maiores não são lidos: a regra "account" cai para o IP
+
+# Nunca descartadas: monitoramento e manutenção da sessão
+CRITICAL_PATHS = ("/health", "/metrics", "/api/auth/refresh", "/api/auth/logout")
+# Descartadas primeiro: trabalho pesado que o cliente pode repetir depois
+LOW_PRIORITY_SUFFIXES = ("/search", "/export", "/messages/stream", "/grades/bulk")
+
+@dataclass(frozen=True)
+class Rate:
+    limit: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.limit
+
+def parse_rate(value: str) -> Optional[Rate]:
+    """"10/minute" -> Rate(10, 60). Vazio ou "0/..." desliga o limite."""
+    if not value:
+        return None
+    count, _, unit = value.partition("/")
+    limit = int(count)
+    if limit <= 0:
+        return None
+    return Rate(limit, PERIODS[unit.strip().rstrip("s") or "second"])
+
+class RateLimitBackend:
+    """Interface para buckets compartilhados entre workers (ex.: Redis com script Lua)."""
+
+    async def take(self, key: str, rate: Rate, cost: float = 1) -> float:
+        """Consome `cost` fichas; retorna 0 se permitido ou os segundos até haver fichas."""
+        raise NotImplementedError
+
+    async def refund(self, key: str, rate: Rate, cost: float = 1) -> None:
+        """Devolve fichas de um `take` permitido (outra regra da mesma requisição recusou)."""
+        raise NotImplementedError
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Buckets deste processo, guardados como um único float por chave.
+
+    Usa GCRA, equivalente a um token bucket com capacidade `limit` que
+    recarrega `limit` fichas por `period`: em vez de fichas e horário da
+    última recarga, guarda só o instante em que o bucket estará cheio.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._full_at: Dict[str, float] = {}
+
+    async def take(self, key: str, rate: Rate, cost: float = 1) -> float:
+        now = time.monotonic()
+        full_at = max(self._full_at.get(key, now), now) + rate.interval * cost
+        wait = full_at - now - rate.period
+        if wait > 0:
+            return wait
+        self._full_at[key] = full_at
+        if len(self._full_at) > self.max_keys:
+            self._prune(now)
+        return 0.0
+
+    async def refund(self, key: str, rate: Rate, cost: float = 1) -> None:
+        full_at = self._full_at.get(key)
+        if full_at is not None:
+            self._full_at[key] = full_at - rate.interval * cost
+
+    def _prune(self, now: float) -> None:
+        # Buckets já cheios equivalem a chaves ausentes
+        self._full_at = {k: v for k, v in self._full_at.items() if v > now}
+        if len(self._full_at) > self.max_keys:
+            # Ainda cheio: descarta a metade mais antiga (ordem de inserção)
+            keep = list(self._full_at.items())[len(self._full_at) // 2:]
+            self._full_at = dict(keep)
+
+    def __len__(self) -> int:
+        return len(self._full_at)
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    rate: Rate
+    key: str  # "ip", "user" (cai para o IP sem token válido), "account" (IP + email do corpo) ou "route"
+    methods: Optional[FrozenSet[str]] = None  # None = todos
+    paths: Tuple[str, ...] = ()  # caminhos exatos
+    prefix: str = ""
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.methods is not None and method not in self.methods:
+            return False
+        if self.paths:
+            return path in self.paths
+        return path.startswith(self.prefix)
+
+def default_rules() -> List[Rule]:
+    auth_paths = ("/api/auth/login", "/api/auth/register")
+    candidates = [
+        # Cada login/registro custa um bcrypt inteiro. Por conta, contra tentativas de
+        # senha; por IP, folgado, porque a turma toda entra junta pelo IP da escola
+        ("auth_account", settings.RATE_LIMIT_AUTH_PER_ACCOUNT, "account", dict(methods=frozenset({"POST"}), paths=auth_paths)),
+        ("auth_ip", settings.RATE_LIMIT_AUTH_PER_IP, "ip", dict(methods=frozenset({"POST"}), paths=auth_paths)),
+        ("auth_route", settings.RATE_LIMIT_AUTH_GLOBAL, "route", dict(methods=frozenset({"POST"}), paths=auth_paths)),
+        ("writes_user", settings.RATE_LIMIT_WRITES_PER_USER, "user", dict(methods=WRITE_METHODS, prefix="/api/teacher/")),
+        ("writes_user", settings.RATE_LIMIT_WRITES_PER_USER, "user", dict(methods=WRITE_METHODS, prefix="/api/student/")),
+        ("api_ip", settings.RATE_LIMIT_PER_IP, "ip", dict(prefix="/api/")),
+    ]
+    return [Rule(name, rate, key, **match) for name, value, key, match in candidates if (rate := parse_rate(value))]
+
+def client_ip(scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def _bearer_user(scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return None
+            try:
+                # Só escolhe o bucket: sem verificar a assinatura, que a rota já verifica.
+                # Um "sub" forjado gasta o bucket desse usuário, mas a requisição cai no 401
+                return str(int(jwt.get_unverified_claims(token)["sub"]))
+            except (JWTError, KeyError, TypeError, ValueError):
+                return None
+    return None
+
+def body_account(body: bytes) -> Optional[str]:
+    """Email de um corpo JSON de login/registro, normalizado; None se não houver."""
+    try:
+        email = orjson.loads(body).get("email")
+    except (orjson.JSONDecodeError, AttributeError):
+        return None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+class RateLimiter:
+    def __init__(self, rules: List[Rule], backend: Optional[RateLimitBackend] = None):
+        self.rules = rules
+        self.backend = backend or InMemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+    def needs_body(self, method: str, path: str) -> bool:
+        return any(rule.key == "account" and rule.matches(method, path) for rule in self.rules)
+
+    def _key(self, rule: Rule, scope, path: str, body: bytes) -> str:
+        if rule.key == "route":
+            return f"{rule.name}:{path}"
+        if rule.key == "user":
+            user = _bearer_user(scope)
+            if user is not None:
+                return f"{rule.name}:u:{user}"
+        if rule.key == "account":
+            account = body_account(body)
+            if account is not None:
+                return f"{rule.name}:a:{client_ip(scope)}:{account}"
+        return f"{rule.name}:ip:{client_ip(scope)}"
+
+    async def check(self, scope, body: bytes = b"") -> Tuple[float, Optional[Rule]]:
+        """Consome uma ficha de cada regra aplicável; retorna (espera, regra violada).
+
+        Se uma regra recusa, as fichas já consumidas pelas anteriores são
+        devolvidas: a requisição recusada não conta contra os outros limites.
+        """
+        method, path = scope["method"], scope["path"]
+        taken: List[Tuple[str, Rule]] = []
+        for rule in self.rules:
+            if rule.matches(method, path):
+                key = self._key(rule, scope, path, body)
+                wait = await self.backend.take(key, rule.rate)
+                if wait > 0:
+                    for taken_key, taken_rule in taken:
+                        await self.backend.refund(taken_key, taken_rule.rate)
+                    return wait, rule
+                taken.append((key, rule))
+        return 0.0, None
+
+def request_priority(method: str, path: str) -> str:
+    if path in CRITICAL_PATHS:
+        return "critical"
+    if path.endswith(LOW_PRIORITY_SUFFIXES):
+        return "low"
+    return "normal"
+
+class LoadShedder:
+    """Rejeita trabalho de baixa prioridade quando a API está saturada.
+
+    Sinais: requisições aguardando o início da resposta (fila) e a média
+    móvel da latência até o início da resposta. Acima do limite, descarta
+    as requisições "low"; acima do dobro, todas menos as "critical".
+    """
+
+    DECAY_SECONDS = 5.0  # sem amostras novas, a média volta a zero nesse ritmo
+
+    def __init__(self, max_inflight: int, latency_ms: int, alpha: float = 0.1):
+        self.max_inflight = max_inflight
+        self.latency_target = latency_ms / 1000
+        self.alpha = alpha
+        self.inflight = 0
+        self._latency = 0.0
+        self._sampled_at = time.monotonic()
+        self.shed = 0
+
+    @property
+    def latency(self) -> float:
+        return self._latency * math.exp(-(time.monotonic() - self._sampled_at) / self.DECAY_SECONDS)
+
+    def pressure(self) -> float:
+        """1.0 = no limite; 0 com os dois sinais desligados."""
+        ratios = [0.0]
+        if self.max_inflight:
+            ratios.append(self.inflight / self.max_inflight)
+        if self.latency_target:
+            ratios.append(self.latency / self.latency_target)
+        return max(ratios)
+
+    def admit(self, priority: str) -> bool:
+        if priority == "critical":
+            return True
+        pressure = self.pressure()
+        if pressure >= 2 or (pressure >= 1 and priority == "low"):
+            self.shed += 1
+            return False
+        return True
+
+    def started(self) -> None:
+        self.inflight += 1
+
+    def finished(self, seconds: Optional[float]) -> None:
+        """`seconds` None: requisição sem amostra de latência (ex.: baixa prioridade)."""
+        self.inflight -= 1
+        if seconds is not None:
+            current = self.latency
+            self._latency = current + self.alpha * (seconds - current)
+            self._sampled_at = time.monotonic()
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.latency))
+
+    def stats(self) -> dict:
+        return {
+            "inflight": self.inflight,
+            "latency_ms": round(self.latency * 1000, 1),
+            "pressure": round(self.pressure(), 3),
+            "shed": self.shed,
+        }
+
+rate_limiter = RateLimiter(default_rules())
+load_shedder = LoadShedder(settings.SHED_MAX_INFLIGHT, settings.SHED_LATENCY_MS)
@@ -0,0 +1,109 @@
+import hashlib
+from typing import Any, Awaitable, Callable, Iterable
+from fastapi import Request, Response
+from sqlalchemy import String, cast, event, inspect, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import Class, ResourceVersion, Enrollment
+from utils.cache import BytesLRUCache
+from utils.pagination import NEXT_CURSOR_HEADER
+from utils.serialization import dumps
+from utils.sql import dialect_insert, upsert_insert
+from config import settings
+
+CACHE_FORMAT = 3  # incrementar quando o formato das respostas mudar
+
+response_cache = BytesLRUCache(settings.RESPONSE_CACHE_MAX_BYTES)
+
+def _increment(stmt):
+    return stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.key],
+        set_={"version": ResourceVersion.version + 1}
+    )
+
+async def bump_versions(db: AsyncSession, keys: Iterable[str]) -> None:
+    """Incrementa a versão dos recursos; chamar na mesma transação da escrita."""
+    rows = [{"key": key, "version": 1} for key in sorted(set(keys))]
+    if not rows:
+        return
+    await db.execute(_increment(await upsert_insert(db, ResourceVersion)), rows)
+
+@event.listens_for(Class, "after_insert")
+@event.listens_for(Class, "after_update")
+@event.listens_for(Class, "after_delete")
+def _bump_class_lists(mapper, connection, target):
+    # Turmas criadas, alteradas ou removidas por qualquer sessão ORM invalidam a
+    # listagem do professor (e do antigo dono, se a turma mudou de professor)
+    teachers = {target.teacher_id, *inspect(target).attrs.teacher_id.history.deleted}
+    keys = sorted({f"teacher:{t}" for t in teachers if t is not None} | {f"class:{target.id}"})
+    connection.execute(
+        _increment(dialect_insert(connection.dialect.name, ResourceVersion)),
+        [{"key": key, "version": 1} for key in keys]
+    )
+
+def keys_scope(*keys: str):
+    return ResourceVersion.key.in_(keys)
+
+def teacher_scope(teacher_id: int):
+    # Versão do professor (turmas criadas/removidas) e de cada turma dele
+    # (matrículas, materiais e notas)
+    class_key = literal("class:") + cast(Class.id, String)
+    return or_(
+        ResourceVersion.key == f"teacher:{teacher_id}",
+        ResourceVersion.key.in_(select(class_key).where(Class.teacher_id == teacher_id))
+    )
+
+def student_scope(student_id: int):
+    # Versões do aluno e de cada turma em que está matriculado
+    class_key = literal("class:") + cast(Enrollment.class_id, String)
+    return or_(
+        ResourceVersion.key == f"student:{student_id}",
+        ResourceVersion.key.in_(select(class_key).where(Enrollment.student_id == student_id))
+    )
+
+async def compute_etag(db: AsyncSession, request: Request, user_id: int, scope) -> str:
+    versions = (await db.execute(
+        select(ResourceVersion.key, ResourceVersion.version).where(scope).order_by(ResourceVersion.key)
+    )).all()
+    raw = f"{CACHE_FORMAT}|{user_id}|{request.url.path}?{request.url.query}|" + ",".join(f"{k}={v}" for k, v in versions)
+    return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+async def cached_json(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    user_id: int,
+    scope,
+    build: Callable[[], Awaitable[Any]]
+) -> Response:
+    """Responde com 304, com o corpo em cache ou, se preciso, executa `build`.
+
+    O ETag é derivado das versões dos recursos (uma consulta por chave
+    primária), então dados inalterados não são consultados nem serializados.
+    `build` pode devolver bytes JSON prontos (caminho rápido) ou objetos
+    serializáveis por orjson.
+    """
+    etag = await compute_etag(db, request, user_id, scope)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    cached = response_cache.get(etag)
+    if cached is None:
+        payload = await build()
+        body = payload if isinstance(payload, bytes) else dumps(payload)
+        extra = {}
+        if NEXT_CURSOR_HEADER in response.headers:
+            extra[NEXT_CURSOR_HEADER] = response.headers[NEXT_CURSOR_HEADER]
+        cached = (body, extra)
+        response_cache.set(etag, cached, len(body))
+
+    body, extra = cached
+    return Response(body, media_type="application/json", headers={**headers, **extra})
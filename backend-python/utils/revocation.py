@@ -0,0 +1,108 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import delete, select
+from database.connection import AsyncSessionLocal
+from database.models import RevokedToken
+from utils.pubsub import pubsub
+from utils.sql import upsert_insert
+
+class RevocationList:
+    """Conjunto de jti revogados, consultado em O(1) a cada requisição.
+
+    Guarda cada jti só até a expiração do token correspondente: depois
+    disso o próprio `exp` já invalida o token. Com tokens de acesso curtos,
+    o conjunto fica pequeno e não precisa de filtro de Bloom.
+    """
+
+    def __init__(self, purge_interval: float = 60.0):
+        self.purge_interval = purge_interval
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_purge = time.time() + purge_interval
+
+    def add(self, jti: str, expires_at: float) -> None:
+        with self._lock:
+            self._expires[jti] = expires_at
+
+    def update(self, items: Iterable[Tuple[str, float]]) -> None:
+        with self._lock:
+            self._expires.update(items)
+
+    def __contains__(self, jti: str) -> bool:
+        now = time.time()
+        if now >= self._next_purge:
+            self.purge(now)
+        return jti in self._expires
+
+    def purge(self, now: float = None) -> None:
+        now = now or time.time()
+        with self._lock:
+            self._expires = {jti: exp for jti, exp in self._expires.items() if exp > now}
+            self._next_purge = now + self.purge_interval
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+REVOCATION_CHANNEL = "auth:revoked"
+
+revoked_tokens = RevocationList()
+
+async def _announce(tokens) -> None:
+    revoked_tokens.update(tokens)
+    for jti, exp in tokens:
+        await pubsub.publish(REVOCATION_CHANNEL, "revoked", json.dumps({"jti": jti, "exp": exp}))
+
+async def revoke_tokens(db, tokens: Iterable[Tuple[str, int]]) -> None:
+    """Revoga pares (jti, exp): grava no banco (sobrevive a reinícios) e avisa os outros workers."""
+    tokens = [(jti, exp) for jti, exp in tokens if jti]
+    if not tokens:
+        return
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow()))
+    stmt = await upsert_insert(db, RevokedToken)
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=[RevokedToken.jti]), [
+        {"jti": jti, "expires_at": datetime.utcfromtimestamp(exp)} for jti, exp in tokens
+    ])
+    await db.commit()
+    await _announce(tokens)
+
+async def claim_token(db, jti: str, exp: int) -> bool:
+    """Revoga o token e diz se esta chamada foi a que revogou (uso único).
+
+    O INSERT é o próprio passo de reivindicação: entre chamadas concorrentes
+    com o mesmo jti, só uma insere a linha; as demais recebem False.
+    """
+    stmt = await upsert_insert(db, RevokedToken)
+    claimed = (await db.execute(
+        stmt.values(jti=jti, expires_at=datetime.utcfromtimestamp(exp))
+        .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        .returning(RevokedToken.jti)
+    )).scalar_one_or_none()
+    await db.commit()
+    if claimed is None:
+        return False
+    await _announce([(jti, exp)])
+    return True
+
+async def _listen() -> None:
+    while True:
+        queue = pubsub.subscribe([REVOCATION_CHANNEL])
+        try:
+            while (item := await queue.get()) is not None:
+                data = json.loads(item.data)
+                revoked_tokens.add(data["jti"], data["exp"])
+        finally:
+            pubsub.unsubscribe(queue)
+
+async def start_revocation_sync() -> asyncio.Task:
+    """Carrega as revogações vigentes e passa a receber as dos outros workers."""
+    task = asyncio.create_task(_listen())
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > datetime.utcnow())
+        )).all()
+    revoked_tokens.update((jti, exp.replace(tzinfo=timezone.utc).timestamp()) for jti, exp in rows)
+    return task
@@ -0,0 +1,79 @@
+import re
+from typing import List, Optional
+from fastapi import Response
+from sqlalchemy import Column, Integer, MetaData, Table, Text, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import Material, Message
+from schemas.material import MaterialResponse
+from schemas.message import MessageResponse
+from schemas.search import MaterialHit, MessageHit
+from utils.pagination import paginate_ranked, NEXT_CURSOR_HEADER
+from utils.serialization import columns_for, dump_rows
+
+MAX_TERMS = 8
+TS_CONFIG = "portuguese"  # PostgreSQL; precisa ser o mesmo das migrações 0005 e 0006
+
+_WORD = re.compile(r"\w+")
+
+# Tabelas virtuais FTS5 (SQLite), fora de Base.metadata: criadas e mantidas
+# por triggers nas migrações 0005 e 0006
+_fts_metadata = MetaData()
+materials_fts = Table(
+    "materials_fts", _fts_metadata,
+    Column("rowid", Integer), Column("title", Text), Column("description", Text), Column("extracted_text", Text)
+)
+messages_fts = Table("messages_fts", _fts_metadata, Column("rowid", Integer), Column("title", Text), Column("content", Text))
+
+# tipo -> (model, tabela FTS5, pesos bm25 por coluna, schema base, schema do resultado)
+SEARCHABLE = {
+    "materials": (Material, materials_fts, (10.0, 1.0, 0.5), MaterialResponse, MaterialHit),
+    "messages": (Message, messages_fts, (10.0, 1.0), MessageResponse, MessageHit),
+}
+
+def query_terms(q: str) -> List[str]:
+    """Palavras da busca; pontuação e operadores são descartados."""
+    return _WORD.findall(q.lower())[:MAX_TERMS]
+
+def _fts5_query(terms: List[str]) -> str:
+    # Todos os termos obrigatórios; o último como prefixo (busca enquanto digita)
+    return " ".join(f'"{t}"' for t in terms[:-1]) + f' "{terms[-1]}"*'
+
+def _tsquery(terms: List[str]) -> str:
+    return " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+
+async def search(
+    db: AsyncSession,
+    response: Response,
+    kind: str,
+    q: str,
+    scope,
+    cursor: Optional[str],
+    limit: int
+) -> Response:
+    """Busca textual ranqueada em materiais ou mensagens, restrita por `scope`.
+
+    SQLite usa as tabelas FTS5 com bm25; PostgreSQL usa a coluna gerada
+    search_vector (índice GIN) com ts_rank_cd.
+    """
+    model, fts, weights, base_schema, hit_schema = SEARCHABLE[kind]
+    terms = query_terms(q)
+    if not terms:
+        return Response(dump_rows(hit_schema, []), media_type="application/json")
+
+    columns = columns_for(base_schema, model)
+    if (await db.connection()).dialect.name == "postgresql":
+        query = func.to_tsquery(TS_CONFIG, _tsquery(terms))
+        vector = literal_column(f"{model.__tablename__}.search_vector")
+        rank = func.ts_rank_cd(vector, query)
+        stmt = select(*columns, rank.label("rank")).where(vector.op("@@")(query)).order_by(rank.desc())
+    else:
+        # bm25: quanto menor, mais relevante
+        rank = func.bm25(literal_column(fts.name), *weights)
+        stmt = select(*columns, (-rank).label("rank")).join(
+            fts, fts.c.rowid == model.id
+        ).where(literal_column(fts.name).op("MATCH")(_fts5_query(terms))).order_by(rank)
+
+    stmt = stmt.where(scope).order_by(model.id.desc())
+    rows = await paginate_ranked(db, stmt, cursor, limit, response)
+    headers = {NEXT_CURSOR_HEADER: response.headers[NEXT_CURSOR_HEADER]} if NEXT_CURSOR_HEADER in response.headers else {}
+    return Response(dump_rows(hit_schema, rows), media_type="application/json", headers=headers)
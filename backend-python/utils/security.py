@@ -1,9 +1,25 @@
+import uuid
 from datetime import datetime, timedelta
-from jose import jwt
+from typing import Dict, Optional, Tuple
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
 from passlib.context import CryptContext
 from config import settings
+from utils.hashing import HashingPool, default_workers
+from utils.metrics import record_hash
+from utils.revocation import revoked_tokens
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+hashing_pool = HashingPool(
+    workers=settings.HASH_POOL_WORKERS or default_workers(),
+    max_pending=settings.HASH_QUEUE_LIMIT,
+    observe=record_hash
+)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -11,12 +27,71 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+async def hash_password_async(password: str) -> str:
+    return await hashing_pool.run(hash_password, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    # Retorna um novo hash quando os parâmetros do CryptContext mudaram
+    return await hashing_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+DEFAULT_KID = "default"
+
+class KeyRing:
+    """Chaves de assinatura indexadas por kid, construídas uma única vez.
+
+    A primeira chave assina os tokens novos; as demais continuam válidas
+    para verificação, o que permite rotacionar sem derrubar sessões.
+    """
+
+    def __init__(self, spec: str, fallback_secret: str, algorithm: str):
+        self.algorithm = algorithm
+        self.keys: Dict[str, Key] = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            kid, _, secret = item.partition(":")
+            if not kid or not secret:
+                raise ValueError("JWT_KEYS deve ter o formato kid:segredo,kid:segredo")
+            self.keys[kid] = jwk.construct(secret, algorithm)
+        if not self.keys:
+            self.keys[DEFAULT_KID] = jwk.construct(fallback_secret, algorithm)
+        self.active_kid = next(iter(self.keys))
+
+    def verification_key(self, kid: Optional[str]) -> Key:
+        # Tokens emitidos antes do chaveiro não têm kid
+        key = self.keys.get(kid or DEFAULT_KID)
+        if key is None:
+            raise JWTError("Chave de assinatura desconhecida")
+        return key
+
+key_ring = KeyRing(settings.JWT_KEYS, settings.SECRET_KEY, settings.ALGORITHM)
+
+def _encode(claims: dict, token_type: str, expires: timedelta) -> str:
+    now = datetime.utcnow()
+    to_encode = {**claims, "type": token_type, "jti": uuid.uuid4().hex, "iat": now, "exp": now + expires}
+    return jwt.encode(
+        to_encode,
+        key_ring.keys[key_ring.active_kid],
+        algorithm=settings.ALGORITHM,
+        headers={"kid": key_ring.active_kid}
+    )
+
 def create_access_token(data: dict) -> str:
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
-
-def decode_token(token: str) -> dict:
-    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    return _encode(data, "access", timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+
+def create_refresh_token(data: dict) -> str:
+    return _encode(data, "refresh", timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+
+def create_media_token(user_id: int, user_type: str, filename: str) -> str:
+    """Token de um único arquivo em /uploads, para ir na query string (`?token=`)."""
+    claims = {"sub": str(user_id), "role": user_type, "file": filename}
+    return _encode(claims, "media", timedelta(minutes=settings.MEDIA_URL_EXPIRE_MINUTES))
+
+def decode_token(token: str, token_type: str = "access") -> dict:
+    """Verifica assinatura, expiração, tipo e revogação, sem acessar o banco."""
+    key = key_ring.verification_key(jwt.get_unverified_header(token).get("kid"))
+    payload = jwt.decode(token, key, algorithms=[settings.ALGORITHM])
+    # Tokens antigos (sem "type") eram todos de acesso
+    if payload.get("type", "access") != token_type:
+        raise JWTError("Tipo de token inválido")
+    if payload.get("jti") in revoked_tokens:
+        raise JWTError("Token revogado")
+    return payload
@@ -0,0 +1,26 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Type
+import orjson
+from pydantic import BaseModel, TypeAdapter
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    # Construir um TypeAdapter é caro; um por schema, reutilizado
+    return TypeAdapter(List[schema])
+
+def columns_for(schema: Type[BaseModel], model) -> list:
+    """Colunas do model ORM necessárias para preencher o schema de resposta."""
+    return [getattr(model, field) for field in schema.model_fields]
+
+def dump_rows(schema: Type[BaseModel], rows: Iterable[Any]) -> bytes:
+    """Valida as linhas uma única vez e serializa direto para bytes JSON."""
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(list(rows), from_attributes=True))
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+def dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload, default=_default)
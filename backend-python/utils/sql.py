@@ -0,0 +1,13 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+def dialect_insert(dialect: str, model):
+    """INSERT com suporte a ON CONFLICT para o dialeto informado (SQLite ou PostgreSQL)."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+async def upsert_insert(db: AsyncSession, model):
+    """INSERT com suporte a ON CONFLICT para o banco da sessão (SQLite ou PostgreSQL)."""
+    return dialect_insert((await db.connection()).dialect.name, model)
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+from config import settings
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+# Folga do corpo multipart além do arquivo: boundaries e cabeçalhos das partes
+MULTIPART_OVERHEAD = 64 * 1024
+
+@dataclass
+class StoredFile:
+    filename: str
+    content_hash: str
+    size: int
+    content_type: Optional[str] = None
+
+def _safe_extension(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,10}", ext) else ""
+
+def _write_chunk(buffer, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+def _too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Arquivo excede o limite de {max_size // (1024 * 1024)}MB"
+    )
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+class FilePart:
+    """Callbacks do parser multipart: guarda os bytes da parte `field`, ignora as demais."""
+
+    def __init__(self, field: str):
+        self.field = field.encode()
+        self.headers: List[tuple] = []
+        self._name = self._value = b""
+        self.active = False
+        self.found = False
+        self.filename = ""
+        self.content_type: Optional[str] = None
+        self.size = 0
+        self.pending: List[bytes] = []
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self.headers = []
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self.headers.append((self._name.lower(), self._value))
+        self._name = self._value = b""
+
+    def on_headers_finished(self) -> None:
+        headers = dict(self.headers)
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        # Só a primeira parte de arquivo com o nome esperado é gravada
+        self.active = not self.found and options.get(b"name") == self.field and b"filename" in options
+        if self.active:
+            self.found = True
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+            content_type = headers.get(b"content-type")
+            self.content_type = content_type.decode("latin-1") if content_type else None
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self.active:
+            self.size += end - start
+            self.pending.append(data[start:end])
+
+    def on_part_end(self) -> None:
+        self.active = False
+
+def _check_content_length(request: Request, limit: int, max_size: int) -> None:
+    # Recusa antes de ler qualquer byte; sem o header (chunked) vale a contagem durante a leitura
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit:
+        raise _too_large(max_size)
+
+async def read_body(request: Request, max_size: Optional[int] = None) -> bytes:
+    """Lê o corpo inteiro em memória, abortando com 413 assim que passar de `max_size`."""
+    max_size = max_size or settings.MAX_FILE_SIZE
+    _check_content_length(request, max_size, max_size)
+    chunks = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_size:
+            raise _too_large(max_size)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+async def stream_multipart_file(request: Request, part: FilePart, max_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Gera os bytes do arquivo `part.field` de um corpo multipart/form-data, direto do stream.
+
+    O corpo não passa pelo parser de formulário do Starlette (que o copiaria
+    inteiro para um arquivo temporário antes da rota rodar): um Content-Length
+    acima do limite é recusado sem ler nada, e os bytes são contados enquanto
+    chegam, abortando assim que o arquivo passa de `max_size`. Nome e tipo do
+    arquivo ficam em `part`.
+    """
+    max_size = max_size or settings.MAX_FILE_SIZE
+    body_limit = max_size + MULTIPART_OVERHEAD
+    _check_content_length(request, body_limit, max_size)
+
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not options.get(b"boundary"):
+        raise _bad_request("Envie o arquivo como multipart/form-data")
+    parser = MultipartParser(options[b"boundary"], part.callbacks())
+
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        try:
+            parser.write(chunk)
+        except MultipartParseError:
+            raise _bad_request("Corpo multipart inválido") from None
+        # Sem Content-Length (chunked) o limite do corpo vale do mesmo jeito
+        if part.size > max_size or received > body_limit:
+            raise _too_large(max_size)
+        if part.pending:
+            data = b"".join(part.pending)
+            part.pending.clear()
+            yield data
+    parser.finalize()
+    if not part.found:
+        raise _bad_request(f"Campo de arquivo '{part.field.decode()}' ausente")
+
+async def save_upload(request: Request, max_size: Optional[int] = None, field: str = "file") -> StoredFile:
+    """Grava o arquivo de um upload multipart em blocos (ver `stream_multipart_file`).
+
+    O SHA-256 é calculado durante a cópia e o arquivo final é nomeado por ele,
+    então o mesmo arquivo enviado para várias turmas é armazenado uma única vez.
+    """
+    part = FilePart(field)
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    hasher = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=settings.UPLOAD_DIR, prefix=".upload-")
+
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            async for data in stream_multipart_file(request, part, max_size):
+                await run_in_threadpool(_write_chunk, buffer, hasher, data)
+
+        content_hash = hasher.hexdigest()
+        filename = f"{content_hash}{_safe_extension(part.filename)}"
+        final_path = os.path.join(settings.UPLOAD_DIR, filename)
+
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return StoredFile(filename=filename, content_hash=content_hash, size=part.size, content_type=part.content_type)
@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import case, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import Enrollment, Message, UnreadCounter
+from utils.sql import upsert_insert
+
+def _increment(stmt):
+    return stmt.on_conflict_do_update(
+        index_elements=[UnreadCounter.student_id],
+        set_={"unread": UnreadCounter.unread + 1}
+    )
+
+async def count_new_message(db: AsyncSession, student_id: int) -> None:
+    """+1 no contador do aluno; chamar na mesma transação do INSERT da mensagem."""
+    stmt = (await upsert_insert(db, UnreadCounter)).values(student_id=student_id, unread=1)
+    await db.execute(_increment(stmt))
+
+async def count_broadcast(db: AsyncSession, class_id: int) -> Dict[int, int]:
+    """+1 para cada aluno da turma, no mesmo INSERT ... SELECT das matrículas do envio.
+
+    Retorna o novo total de não lidas de cada aluno (RETURNING do upsert).
+    """
+    recipients = select(Enrollment.student_id, literal(1)).where(Enrollment.class_id == class_id)
+    stmt = (await upsert_insert(db, UnreadCounter)).from_select(["student_id", "unread"], recipients)
+    rows = await db.execute(_increment(stmt).returning(UnreadCounter.student_id, UnreadCounter.unread))
+    return dict(rows.tuples().all())
+
+async def unread_count(db: AsyncSession, student_id: int) -> int:
+    """Uma busca por chave primária, independente do número de mensagens."""
+    return await db.scalar(select(UnreadCounter.unread).where(UnreadCounter.student_id == student_id)) or 0
+
+async def mark_read(db: AsyncSession, student_id: int, message_ids: Optional[Iterable[int]] = None) -> Tuple[int, int]:
+    """Marca como lidas as mensagens do aluno (todas, sem `message_ids`).
+
+    Só as ainda não lidas são atualizadas, e o contador diminui exatamente
+    nesse número; repetir a chamada não altera nada. Retorna (marcadas,
+    não lidas restantes). Não faz commit.
+    """
+    stmt = update(Message).where(Message.student_id == student_id, Message.read_at.is_(None))
+    if message_ids is not None:
+        stmt = stmt.where(Message.id.in_(sorted(set(message_ids))))
+    marked = max((await db.execute(
+        stmt.values(read_at=datetime.utcnow()).execution_options(synchronize_session=False)
+    )).rowcount, 0)
+    if not marked:
+        return 0, await unread_count(db, student_id)
+
+    remaining = (await db.execute(
+        update(UnreadCounter).where(UnreadCounter.student_id == student_id).values(
+            unread=case((UnreadCounter.unread > marked, UnreadCounter.unread - marked), else_=0)
+        ).returning(UnreadCounter.unread)
+    )).scalar_one_or_none()
+    return marked, remaining or 0
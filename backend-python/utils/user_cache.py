@@ -0,0 +1,48 @@
+from typing import Optional
+from schemas.user import UserResponse
+from utils.cache import CacheBackend, TTLCache
+
+class UserCache:
+    """Cache do usuário autenticado, indexado pelo id.
+
+    Primeiro consulta o cache local (LRU com TTL); se houver um backend
+    compartilhado configurado, ele é usado como segundo nível.
+    """
+
+    def __init__(self, maxsize: int, ttl: int, backend: Optional[CacheBackend] = None):
+        self.ttl = ttl
+        self.local = TTLCache(maxsize, ttl)
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"user:{user_id}"
+
+    def get(self, user_id: int) -> Optional[UserResponse]:
+        user = self.local.get(user_id)
+        if user is None and self.backend is not None:
+            raw = self.backend.get(self._key(user_id))
+            if raw is not None:
+                user = UserResponse.model_validate_json(raw)
+                self.local.set(user_id, user)
+
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    def set(self, user: UserResponse) -> None:
+        self.local.set(user.id, user)
+        if self.backend is not None:
+            self.backend.set(self._key(user.id), user.model_dump_json().encode(), self.ttl)
+
+    def invalidate(self, user_id: int) -> None:
+        self.local.delete(user_id)
+        if self.backend is not None:
+            self.backend.delete(self._key(user_id))
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.local)}
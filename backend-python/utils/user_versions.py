@@ -0,0 +1,106 @@
+import asyncio
+import json
+from typing import Callable, Dict, List
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+from database.connection import AsyncSessionLocal
+from database.models import ResourceVersion, User
+from utils.pubsub import pubsub
+from utils.sql import dialect_insert
+
+USERS_CHANNEL = "auth:users"
+KEY_PREFIX = "auth_user:"
+# Colunas copiadas para o access token: mudou alguma, os tokens já emitidos deixam de valer
+TOKEN_COLUMNS = ("name", "email", "user_type")
+
+class UserVersions:
+    """Versão de cada usuário, consultada em O(1) a cada requisição.
+
+    Os access tokens carregam a versão da emissão ("ver"); um token com
+    versão menor que a atual (perfil alterado ou usuário removido) é
+    recusado sem ir ao banco. Só usuários que já mudaram têm entrada.
+    """
+
+    def __init__(self):
+        self._versions: Dict[int, int] = {}
+        # Chamados com o id do usuário quando a versão sobe (ex.: invalidar caches)
+        self.listeners: List[Callable[[int], None]] = []
+
+    def get(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+
+    def update(self, user_id: int, version: int) -> None:
+        if version > self.get(user_id):
+            self._versions[user_id] = version
+            for listener in self.listeners:
+                listener(user_id)
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+user_versions = UserVersions()
+
+async def current_version(db, user_id: int) -> int:
+    """Versão vigente no banco, para o claim "ver" dos tokens emitidos agora."""
+    return await db.scalar(
+        select(ResourceVersion.version).where(ResourceVersion.key == f"{KEY_PREFIX}{user_id}")
+    ) or 0
+
+def _bump(connection, session, user_id: int) -> None:
+    stmt = dialect_insert(connection.dialect.name, ResourceVersion).values(key=f"{KEY_PREFIX}{user_id}", version=1)
+    version = connection.execute(stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.key],
+        set_={"version": ResourceVersion.version + 1}
+    ).returning(ResourceVersion.version)).scalar_one()
+    # Aplicada e publicada só depois do commit
+    session.info.setdefault("user_versions", {})[user_id] = version
+
+@event.listens_for(User, "after_update")
+def _bump_changed_user(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[column].history.has_changes() for column in TOKEN_COLUMNS):
+        _bump(connection, object_session(target), target.id)
+
+@event.listens_for(User, "after_delete")
+def _bump_deleted_user(mapper, connection, target):
+    _bump(connection, object_session(target), target.id)
+
+@event.listens_for(Session, "after_commit")
+def _publish_versions(session):
+    changed = session.info.pop("user_versions", None)
+    if not changed:
+        return
+    for user_id, version in changed.items():
+        user_versions.update(user_id, version)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Sessão síncrona (scripts): os workers só veem a mudança ao reiniciar
+        return
+    for user_id, version in changed.items():
+        loop.create_task(pubsub.publish(USERS_CHANNEL, "version", json.dumps({"id": user_id, "version": version})))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_versions(session):
+    session.info.pop("user_versions", None)
+
+async def _listen() -> None:
+    while True:
+        queue = pubsub.subscribe([USERS_CHANNEL])
+        try:
+            while (item := await queue.get()) is not None:
+                data = json.loads(item.data)
+                user_versions.update(data["id"], data["version"])
+        finally:
+            pubsub.unsubscribe(queue)
+
+async def start_user_version_sync() -> asyncio.Task:
+    """Carrega as versões do banco e passa a receber as mudanças dos outros workers."""
+    task = asyncio.create_task(_listen())
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(ResourceVersion.key, ResourceVersion.version).where(ResourceVersion.key.startswith(KEY_PREFIX))
+        )).all()
+    for key, version in rows:
+        user_versions.update(int(key[len(KEY_PREFIX):]), version)
+    return task